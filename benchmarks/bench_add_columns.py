@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ----------------------------------------------------------------------
+# Name:         bench_add_columns.py
+# Description:
+#    benchmark of '--add_columns' of csv_uty.py: runtime of each evaluation path(numexpr, vectorized, python)
+#    and check of results against evaluation by python objects for each row.
+#
+# Author:       m.akei
+# Copyright:    (c) 2021 by m.na.akei
+# Time-stamp:   <2021-05-24 21:03:44>
+# Licence:
+#  Copyright (c) 2021 Masaharu N. Akei
+#
+#  This software is released under the MIT License.
+#    http://opensource.org/licenses/mit-license.php
+# ----------------------------------------------------------------------
+import argparse
+import textwrap
+import sys
+
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "csv_utility"))
+from csv_uty import compile_add_columns, add_columns_to_df, prefix_number_to_int
+
+VERSION = 1.0
+
+# definition for '--add_columns' and function for each row as reference.
+# 'H' has 64-bit hex numbers, those are uint64 that numexpr does not support.
+CASES = [
+    ("X=${I}*2+1", lambda r: r["I"] * 2 + 1),
+    ("X=${F}/3", lambda r: r["F"] / 3),
+    ("X=${I}>${F}", lambda r: r["I"] > r["F"]),
+    ("X=${H}", lambda r: r["H"]),
+    ("X=${H}+1", lambda r: r["H"] + 1),
+    ("X=${H}>${I}", lambda r: r["H"] > r["I"]),
+    ("X=${S}.apply(lambda x: int(x\\,16))", lambda r: int(r["S"], 16)),
+]
+
+
+def make_data_frame(n_rows, seed=1):
+    """make data frame with integers, floats with NA, 64-bit hex numbers and strings of hex numbers
+
+    :param n_rows: number of rows
+    :param seed: seed of random
+    :returns: data frame as read by csv_uty.py
+    :rtype: pandas.DataFrame
+
+    """
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "I": rng.integers(-1000, 1000, size=n_rows),
+        "F": rng.normal(size=n_rows),
+        "H": ["0x{:016x}".format(v) for v in rng.integers(0, 2**64 - 1, size=n_rows, dtype=np.uint64)],
+        "S": ["{:x}".format(v) for v in rng.integers(0, 2**32, size=n_rows)],
+    })
+    df.loc[rng.choice(n_rows, n_rows // 100), "F"] = np.nan
+    df.loc[0, "H"] = "0x000000000000000f"
+    df.loc[1, "H"] = "0xffffffffffffff00"
+    prefix_number_to_int(df, columns=["H"])
+    return df
+
+
+def is_same(result, expected):
+    """compare result with values by python objects
+
+    :param result: pandas.Series or None
+    :param expected: list of values
+    :returns: True if all values are same
+    :rtype: bool
+
+    """
+    if result is None:
+        return False
+    values = result.tolist()
+    if len(values) != len(expected):
+        return False
+    for v_r, v_e in zip(values, expected):
+        if isinstance(v_e, float):
+            if not (v_r == v_e or (v_r != v_r and v_e != v_e)):
+                return False
+        elif v_r != v_e or type(v_r) == float:
+            return False
+    return True
+
+
+def init():
+    arg_parser = argparse.ArgumentParser(description="benchmark and check of '--add_columns' of csv_uty.py",
+                                         formatter_class=argparse.RawDescriptionHelpFormatter,
+                                         epilog=textwrap.dedent('''
+remark:
+  data frame is made in memory, parsing is not included, 'H' has 64-bit hex numbers as uint64.
+  Each definition is evaluated by add_columns_to_df of csv_uty.py, and results are compared with
+  evaluation by python objects for each row. Runtime and path of evaluation are printed with csv format.
+  If any result is different or missing, exit code is 1.
+
+example:
+  bench_add_columns.py
+  bench_add_columns.py --rows=10000000 --repeat=3
+
+'''))
+    arg_parser.add_argument('-v', '--version', action='version', version='%(prog)s {}'.format(VERSION))
+    arg_parser.add_argument("--rows", dest="ROWS", help="number of rows, default=100000", type=int, metavar="INT", default=100000)
+    arg_parser.add_argument("--repeat", dest="REPEAT", help="number of repeats, default=1", type=int, metavar="INT", default=1)
+
+    args = arg_parser.parse_args()
+    return args
+
+
+if __name__ == "__main__":
+    args = init()
+    n_rows = args.ROWS
+    n_repeat = args.REPEAT
+
+    df = make_data_frame(n_rows)
+    records = df.astype(object).to_dict(orient="records")
+    print("%inf:bench_add_columns:rows={}, dtypes={}".format(n_rows, dict(df.dtypes.astype(str))), file=sys.stderr)
+
+    n_bad = 0
+    print("definition,path,numexpr,vectorized,python,min_sec,ns_per_row,same")
+    for definition, row_func in CASES:
+        add_columns = compile_add_columns([definition])
+        times = []
+        result = None
+        for _ in range(n_repeat):
+            w_df = df.copy()
+            t0 = time.perf_counter()
+            add_columns_to_df(w_df, add_columns)
+            times.append(time.perf_counter() - t0)
+            result = w_df["X"] if "X" in w_df.columns else None
+        same = is_same(result, [row_func(r) for r in records])
+        st = add_columns[0]["stats"]
+        print("\"{}\",{},{},{},{},{:.3f},{:.1f},{}".format(definition, add_columns[0]["path"], st["numexpr"], st["vectorized"],
+                                                          st["python"], min(times),
+                                                          min(times) / n_rows * 1e9, same))
+        if not same:
+            n_bad += 1
+            print("#warn:bench_add_columns:result is different from python objects:{}".format(definition), file=sys.stderr)
+    if n_bad > 0:
+        sys.exit(1)
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ----------------------------------------------------------------------
+# Name:         bench_daemon.py
+# Description:
+#    benchmark of csv_daemon.py: throughput of cold invocations of scripts and of invocations through the resident worker.
+#
+# Author:       m.akei
+# Copyright:    (c) 2021 by m.na.akei
+# Time-stamp:   <2021-05-16 11:20:37>
+# Licence:
+#  Copyright (c) 2021 Masaharu N. Akei
+#
+#  This software is released under the MIT License.
+#    http://opensource.org/licenses/mit-license.php
+# ----------------------------------------------------------------------
+import argparse
+import textwrap
+import sys
+
+import os
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+VERSION = 1.0
+
+UTILITY_DIR = Path(__file__).resolve().parent.parent / "csv_utility"
+DAEMON = UTILITY_DIR / "csv_daemon.py"
+CLIENT = UTILITY_DIR / "csv_daemon_client.py"
+
+SMALL_CSV_HEADER = "A,B,C,D\n"
+
+# commands to run, '{csv}' is replaced with path of small csv file.
+COMMANDS = [
+    ["csv_uty.py", "--sort=A", "{csv}"],
+    ["csv_trimtime.py", "--get_range_of_time=D:S", "{csv}"],
+    ["csv_status.py", "{csv}"],
+]
+
+
+def make_small_csv(csv_file, n_rows):
+    """make small csv file
+
+    :param csv_file: path of csv file
+    :param n_rows: number of rows
+
+    """
+    with open(csv_file, "w") as f:
+        f.write(SMALL_CSV_HEADER)
+        for i in range(n_rows):
+            f.write("{},{},{},2021-01-01 00:{:02d}:{:02d}\n".format(i, i * 0.5, "xyz"[i % 3], (i // 60) % 60, i % 60))
+
+
+def run_all(prefix, commands, n_calls, n_jobs, env):
+    """run commands and measure throughput
+
+    :param prefix: command to run script, list
+    :param commands: list of commands
+    :param n_calls: number of calls of each command
+    :param n_jobs: number of parallel calls
+    :param env: environment variables
+    :returns: elapsed time in seconds, list of outputs of first calls and number of failed calls
+    :rtype: tuple
+
+    """
+    jobs = [c for c in commands for _ in range(n_calls)]
+
+    def run_one(cmd):
+        cp = subprocess.run(prefix(cmd[0]) + cmd[1:], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, env=env)
+        return cp.returncode, cp.stdout
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+        results = list(executor.map(run_one, jobs))
+    elapsed = time.perf_counter() - t0
+    n_failed = sum([1 for v in results if v[0] != 0])
+    outputs = [results[i * n_calls][1] for i in range(len(commands))]
+    return elapsed, outputs, n_failed
+
+
+def init():
+    arg_parser = argparse.ArgumentParser(description="benchmark of cold invocation and resident worker of csv_tools",
+                                         formatter_class=argparse.RawDescriptionHelpFormatter,
+                                         epilog=textwrap.dedent('''
+remark:
+  csv_uty.py, csv_trimtime.py and csv_status.py are called with small csv file,
+  directly(cold invocation) and through csv_daemon_client.py with the resident worker.
+  The worker is started with temporary socket and is stopped at end.
+  Outputs of both ways are compared, and throughput(calls/sec) is printed with csv format.
+
+example:
+  bench_daemon.py
+  bench_daemon.py --calls=50 --jobs=4 --rows=1000
+
+'''))
+    arg_parser.add_argument('-v', '--version', action='version', version='%(prog)s {}'.format(VERSION))
+    arg_parser.add_argument("--calls", dest="CALLS", help="number of calls of each command, default=20", type=int, metavar="INT", default=20)
+    arg_parser.add_argument("--jobs", dest="JOBS", help="number of parallel calls, default=1", type=int, metavar="INT", default=1)
+    arg_parser.add_argument("--rows", dest="ROWS", help="number of rows of small csv file, default=100", type=int, metavar="INT", default=100)
+
+    args = arg_parser.parse_args()
+    return args
+
+
+if __name__ == "__main__":
+    args = init()
+    n_calls = args.CALLS
+    n_jobs = args.JOBS
+    n_rows = args.ROWS
+
+    with tempfile.TemporaryDirectory(prefix="bench_daemon_") as tmp_dir:
+        csv_file = Path(tmp_dir) / "small.csv"
+        make_small_csv(csv_file, n_rows)
+        commands = [[v.format(csv=csv_file) for v in c] for c in COMMANDS]
+        env = dict(os.environ)
+        env["CSV_TOOLS_DAEMON_SOCKET"] = str(Path(tmp_dir) / "daemon.sock")
+
+        # make schema sidecar in advance, then both ways read the same files.
+        subprocess.run([sys.executable, str(UTILITY_DIR / "csv_schema.py"), str(csv_file)], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+        cold_time, cold_outputs, cold_failed = run_all(lambda sc: [sys.executable, str(UTILITY_DIR / sc)], commands, n_calls, n_jobs, env)
+
+        subprocess.run([sys.executable, str(DAEMON), "--detach", "--log", str(Path(tmp_dir) / "daemon.log")], env=env, check=True)
+        try:
+            daemon_time, daemon_outputs, daemon_failed = run_all(lambda sc: [sys.executable, str(CLIENT), sc], commands, n_calls, n_jobs,
+                                                                 env)
+        finally:
+            subprocess.run([sys.executable, str(DAEMON), "--stop"], env=env, stderr=subprocess.DEVNULL)
+
+    n_total = n_calls * len(commands)
+    print("mode,calls,jobs,elapsed_sec,calls_per_sec,failed")
+    print("cold,{},{},{:.3f},{:.2f},{}".format(n_total, n_jobs, cold_time, n_total / cold_time, cold_failed))
+    print("daemon,{},{},{:.3f},{:.2f},{}".format(n_total, n_jobs, daemon_time, n_total / daemon_time, daemon_failed))
+    print("%inf:bench_daemon:speedup={:.2f}".format(cold_time / daemon_time), file=sys.stderr)
+    for c, co, do in zip(commands, cold_outputs, daemon_outputs):
+        if co != do:
+            print("#warn:bench_daemon:outputs are different:{}".format(c[0]), file=sys.stderr)
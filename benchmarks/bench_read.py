@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ----------------------------------------------------------------------
+# Name:         bench_read.py
+# Description:
+#    benchmark of csv_parallel.py: runtime of sequential pandas.read_csv and of parallel reading of big csv file.
+#
+# Author:       m.akei
+# Copyright:    (c) 2021 by m.na.akei
+# Time-stamp:   <2021-05-19 22:15:06>
+# Licence:
+#  Copyright (c) 2021 Masaharu N. Akei
+#
+#  This software is released under the MIT License.
+#    http://opensource.org/licenses/mit-license.php
+# ----------------------------------------------------------------------
+import argparse
+import textwrap
+import sys
+
+import os
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "csv_utility"))
+from csv_parallel import read_csv_parallel
+
+VERSION = 1.0
+
+# text fields with commas, doubled quotes and newlines in quoted fields.
+TEXTS = ["吾輩は猫である", "\"名前はまだ無い。\nどこで生れたかとんと見当がつかぬ。\"", "\"a,b,c\"", "\"He said \"\"meow\"\"\"", "", "plain text"]
+
+
+def make_big_csv(csv_file, size_mb, seed=1):
+    """make csv file with numbers, datetime and quoted text
+
+    :param csv_file: path of csv file
+    :param size_mb: size of file in MB
+    :param seed: seed of random
+
+    """
+    rnd = random.Random(seed)
+    size = size_mb * 1024 * 1024
+    with open(csv_file, "w", encoding="utf-8") as f:
+        f.write("id,value,category,datetime,text\n")
+        i_row = 0
+        while f.tell() < size:
+            lines = []
+            for _ in range(10000):
+                lines.append("{},{:.6f},{},2021-01-01 {:02d}:{:02d}:{:02d},{}\n".format(i_row, rnd.random() * 1000, "ABC"[i_row % 3],
+                                                                                       (i_row // 3600) % 24, (i_row // 60) % 60, i_row % 60,
+                                                                                       rnd.choice(TEXTS)))
+                i_row += 1
+            f.write("".join(lines))
+
+
+def measure(func, n_repeat):
+    """measure runtime of function
+
+    :param func: function to measure
+    :param n_repeat: number of repeats
+    :returns: min and median of runtime in seconds, and result of the last call
+    :rtype: tuple
+
+    """
+    times = []
+    result = None
+    for _ in range(n_repeat):
+        t0 = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - t0)
+    return min(times), statistics.median(times), result
+
+
+def init():
+    arg_parser = argparse.ArgumentParser(description="benchmark of sequential and parallel reading of big csv file",
+                                         formatter_class=argparse.RawDescriptionHelpFormatter,
+                                         epilog=textwrap.dedent('''
+remark:
+  csv file with quoted text fields, that have newlines, is made in temporary directory or given file is used.
+  The file is read by pandas.read_csv and by read_csv_parallel of csv_parallel.py with each number of processes.
+  Results are compared with pandas.read_csv, and runtime is printed with csv format.
+
+example:
+  bench_read.py
+  bench_read.py --size=1024 --workers=4,8,16,32
+  bench_read.py --workers=8 big_sample_arb.csv
+
+'''))
+    arg_parser.add_argument('-v', '--version', action='version', version='%(prog)s {}'.format(VERSION))
+    arg_parser.add_argument("--size", dest="SIZE", help="size of csv file to make in MB, default=256", type=int, metavar="INT", default=256)
+    arg_parser.add_argument("--workers",
+                            dest="WORKERS",
+                            help="numbers of processes, default=number of cpus",
+                            type=str,
+                            metavar="INT[,INT...]",
+                            default=None)
+    arg_parser.add_argument("--repeat", dest="REPEAT", help="number of repeats, default=3", type=int, metavar="INT", default=3)
+    arg_parser.add_argument("--dtype", dest="DTYPE", help="dtype to read all columns, ex. 'string' as csv_uty.py", type=str, default=None)
+    arg_parser.add_argument('csv_file', metavar='CSV_FILE', help="csv file to read, default=made csv file", nargs="?", default=None)
+
+    args = arg_parser.parse_args()
+    return args
+
+
+if __name__ == "__main__":
+    args = init()
+    n_repeat = args.REPEAT
+    if args.WORKERS is None:
+        workers = [os.cpu_count() or 1]
+    else:
+        workers = [int(v) for v in args.WORKERS.split(",")]
+    kwargs = {} if args.DTYPE is None else {"dtype": args.DTYPE}
+
+    with tempfile.TemporaryDirectory(prefix="bench_read_") as tmp_dir:
+        csv_file = args.csv_file
+        if csv_file is None:
+            csv_file = Path(tmp_dir) / "big.csv"
+            make_big_csv(csv_file, args.SIZE)
+        f_size = os.path.getsize(csv_file) / 1024 / 1024
+        print("%inf:bench_read:file={}, size={:.1f}MB, cpus={}".format(csv_file, f_size, os.cpu_count()), file=sys.stderr)
+
+        seq_min, seq_med, seq_df = measure(lambda: pd.read_csv(csv_file, low_memory=False, **kwargs), n_repeat)
+        print("mode,workers,min_sec,median_sec,MB_per_sec,speedup,same")
+        print("sequential,1,{:.3f},{:.3f},{:.1f},1.00,True".format(seq_min, seq_med, f_size / seq_min))
+        for n_w in workers:
+            p_min, p_med, p_df = measure(lambda: read_csv_parallel(csv_file, n_workers=n_w, min_size=0, **kwargs), n_repeat)
+            same = seq_df.equals(p_df) and list(seq_df.dtypes) == list(p_df.dtypes)
+            print("parallel,{},{:.3f},{:.3f},{:.1f},{:.2f},{}".format(n_w, p_min, p_med, f_size / p_min, seq_min / p_min, same))
+            if not same:
+                print("#warn:bench_read:result is different from pandas.read_csv:workers={}".format(n_w), file=sys.stderr)
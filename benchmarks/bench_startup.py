@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ----------------------------------------------------------------------
+# Name:         bench_startup.py
+# Description:
+#    startup benchmark of csv_tools: runtime of '-h' and of runs with tiny csv file for each entry point.
+#
+# Author:       m.akei
+# Copyright:    (c) 2021 by m.na.akei
+# Time-stamp:   <2021-05-15 09:40:12>
+# Licence:
+#  Copyright (c) 2021 Masaharu N. Akei
+#
+#  This software is released under the MIT License.
+#    http://opensource.org/licenses/mit-license.php
+# ----------------------------------------------------------------------
+import argparse
+import textwrap
+import sys
+
+import csv
+import re
+import statistics
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+VERSION = 1.0
+
+TOP_DIR = Path(__file__).resolve().parent.parent
+SCRIPT_DIRS = [TOP_DIR / "csv_utility", TOP_DIR / "csv_plot"]
+
+TINY_CSV = """A,B,C,D
+1,0.5,x,2021-01-01 00:00:00
+2,1.5,y,2021-01-01 00:01:00
+3,2.5,x,2021-01-01 00:02:00
+"""
+
+# arguments for run with tiny csv file, '{csv}' is replaced with path of tiny csv file, '{out}' with path of output.
+TINY_RUNS = {
+    "csv_uty.py": ["--add_columns=E=${{A}}+1", "{csv}"],
+    "csv_status.py": ["{csv}"],
+    "csv_sample.py": ["{csv}", "2"],
+    "csv_query.py": ["{csv}", "A>1"],
+    "csv_trimtime.py": ["--get_range_of_time=D:S", "{csv}"],
+    "csv_histogram.py": ["--nbin_modes=sturges", "--output=-", "{csv}", "B"],
+    "csv_columns_summary.py": ["{csv}"],
+    "csv_window_rolling.py": ["{csv}", "A", "2"],
+    "csv_meltpivot.py": ["--mode=melt", "--category_name=category", "--value_name=value", "{csv}", "C", "A,B"],
+    "csv_schema.py": ["{csv}"],
+    "csv_plot_line.py": ["--format=html", "--output={out}.html", "{csv}", "A", "B"],
+    "csv_plot_bar.py": ["--format=html", "--output={out}.html", "{csv}", "C", "A"],
+}
+
+
+def list_entry_points(pattern=None):
+    """list of python scripts, those have main block
+
+    :param pattern: regular expression to select scripts
+    :returns: list of paths
+    :rtype: list[Path]
+
+    """
+    result = []
+    for sd in SCRIPT_DIRS:
+        for sc in sorted(sd.glob("*.py")):
+            if pattern is not None and re.search(pattern, sc.name) is None:
+                continue
+            if "if __name__ == \"__main__\":" in sc.read_text():
+                result.append(sc)
+    return result
+
+
+def measure(cmd, n_repeat, cwd=None):
+    """measure runtime of command
+
+    :param cmd: command as list
+    :param n_repeat: number of repeats
+    :param cwd: working directory
+    :returns: min and median of runtimes in seconds, and return code of last run
+    :rtype: tuple
+
+    """
+    times = []
+    ret = 0
+    for _ in range(n_repeat):
+        t0 = time.perf_counter()
+        ret = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, cwd=cwd).returncode
+        times.append(time.perf_counter() - t0)
+    return min(times), statistics.median(times), ret
+
+
+def read_baseline(baseline_file):
+    """read result of previous run
+
+    :param baseline_file: path of csv file
+    :returns: dict of (script,mode) -> median
+    :rtype: dict
+
+    """
+    result = {}
+    with open(baseline_file) as f:
+        for row in csv.DictReader(f):
+            result[(row["script"], row["mode"])] = float(row["median_sec"])
+    return result
+
+
+def init():
+    arg_parser = argparse.ArgumentParser(description="startup benchmark of csv_tools",
+                                         formatter_class=argparse.RawDescriptionHelpFormatter,
+                                         epilog=textwrap.dedent('''
+remark:
+  For each python script in csv_utility and csv_plot, runtime of '-h' is measured.
+  For some scripts, runtime of run with tiny csv file(4 rows) is measured, too.
+  Result is printed with csv format: script,mode,min_sec,median_sec,return_code.
+
+  With '--baseline', result of previous run is compared, and scripts that are slower than
+  baseline by '--threshold' are reported and exit code is 1.
+
+example:
+  bench_startup.py --output=startup_base.csv
+  bench_startup.py --baseline=startup_base.csv --threshold=1.2
+  bench_startup.py --repeat=10 --scripts='csv_uty|csv_status'
+
+'''))
+    arg_parser.add_argument('-v', '--version', action='version', version='%(prog)s {}'.format(VERSION))
+    arg_parser.add_argument("--repeat", dest="REPEAT", help="number of repeats, default=5", type=int, metavar="INT", default=5)
+    arg_parser.add_argument("--scripts",
+                            dest="SCRIPTS",
+                            help="regular expression to select scripts",
+                            type=str,
+                            metavar="REGEX",
+                            default=None)
+    arg_parser.add_argument("--baseline", dest="BASELINE", help="result of previous run to compare", type=str, metavar="FILE", default=None)
+    arg_parser.add_argument("--threshold",
+                            dest="THRESHOLD",
+                            help="ratio to baseline to report as regression, default=1.25",
+                            type=float,
+                            metavar="RATIO",
+                            default=1.25)
+    arg_parser.add_argument("--output", dest="OUTPUT", help="path of output, default=stdout", type=str, metavar="FILE", default=None)
+
+    args = arg_parser.parse_args()
+    return args
+
+
+if __name__ == "__main__":
+    args = init()
+    n_repeat = args.REPEAT
+    threshold = args.THRESHOLD
+    output_file = sys.stdout if args.OUTPUT is None else open(args.OUTPUT, "w")
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="bench_startup_") as tmp_dir:
+        tiny_csv = Path(tmp_dir) / "tiny.csv"
+        tiny_csv.write_text(TINY_CSV)
+        t_min, t_med, ret = measure([sys.executable, "-c", "pass"], n_repeat)
+        results.append(["python", "empty", t_min, t_med, ret])
+        for sc in list_entry_points(args.SCRIPTS):
+            t_min, t_med, ret = measure([sys.executable, str(sc), "-h"], n_repeat)
+            results.append([sc.name, "help", t_min, t_med, ret])
+            if sc.name in TINY_RUNS:
+                sc_args = [v.format(csv=tiny_csv, out=Path(tmp_dir) / sc.stem) for v in TINY_RUNS[sc.name]]
+                t_min, t_med, ret = measure([sys.executable, str(sc)] + sc_args, n_repeat, cwd=tmp_dir)
+                results.append([sc.name, "tiny", t_min, t_med, ret])
+            print("%inf:bench_startup:{}".format(sc.name), file=sys.stderr)
+
+    writer = csv.writer(output_file, lineterminator="\n")
+    writer.writerow(["script", "mode", "min_sec", "median_sec", "return_code"])
+    for row in results:
+        writer.writerow([row[0], row[1], "{:.4f}".format(row[2]), "{:.4f}".format(row[3]), row[4]])
+
+    if args.BASELINE is not None:
+        baseline = read_baseline(args.BASELINE)
+        regressions = []
+        for row in results:
+            b_med = baseline.get((row[0], row[1]))
+            if b_med is not None and row[3] > b_med * threshold:
+                regressions.append(row)
+                print("#warn:bench_startup:regression:{}:{}:{:.4f} > {:.4f} * {}".format(row[0], row[1], row[3], b_med, threshold),
+                      file=sys.stderr)
+        if len(regressions) > 0:
+            sys.exit(1)
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ----------------------------------------------------------------------
+# Name:         bench_trimtime.py
+# Description:
+#    micro benchmark of csv_trimtime.py: per-row cost of time diff, elapsed time and timestamp,
+#    by python objects for each row and by vectorized operations.
+#
+# Author:       m.akei
+# Copyright:    (c) 2021 by m.na.akei
+# Time-stamp:   <2021-05-21 19:42:15>
+# Licence:
+#  Copyright (c) 2021 Masaharu N. Akei
+#
+#  This software is released under the MIT License.
+#    http://opensource.org/licenses/mit-license.php
+# ----------------------------------------------------------------------
+import argparse
+import textwrap
+import sys
+
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "csv_utility"))
+import csv_trimtime
+
+VERSION = 1.0
+
+
+def make_datetime_series(n_rows, tz=None, seed=1):
+    """make series of datetime with irregular steps
+
+    :param n_rows: number of rows
+    :param tz: time zone, if None, datetime is naive.
+    :param seed: seed of random
+    :returns: pandas.Series of datetime
+    :rtype: pandas.Series
+
+    """
+    rng = np.random.default_rng(seed)
+    steps = rng.integers(1, 120, size=n_rows).cumsum()
+    ts = pd.Series(pd.Timestamp("2021-01-01") + pd.to_timedelta(steps, unit="s"))
+    if tz is not None:
+        ts = ts.dt.tz_localize("UTC").dt.tz_convert(tz)
+    return ts
+
+
+def measure(func, n_repeat):
+    """measure runtime of function
+
+    :param func: function to measure
+    :param n_repeat: number of repeats
+    :returns: min of runtime in seconds, and result of the last call
+    :rtype: tuple
+
+    """
+    times = []
+    result = None
+    for _ in range(n_repeat):
+        t0 = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - t0)
+    return min(times), result
+
+
+def by_chunks(func, ps, chunksize):
+    """apply function to chunks of series, not to use memory for python objects of all rows at once
+
+    :param func: function for chunk
+    :param ps: pandas.Series
+    :param chunksize: number of rows in each chunk
+    :returns: pandas.Series
+    :rtype: pandas.Series
+
+    """
+    return pd.concat([func(ps.iloc[i:i + chunksize]) for i in range(0, len(ps), chunksize)])
+
+
+def benchmarks(ts, chunksize):
+    """operations of csv_trimtime.py, by python objects for each row as former csv_trimtime.py and by vectorized operations
+
+    :param ts: pandas.Series of datetime
+    :param chunksize: number of rows in each chunk of python objects
+    :returns: list of name of operation, function of python objects and vectorized function
+    :rtype: list
+
+    """
+    t_org = ts[0]
+
+    def total_seconds(ps):
+        return ps.apply(lambda x: x.total_seconds())
+
+    def timestamp(ps):
+        return pd.Series(list(map(lambda x: x.timestamp(), ps.dt.to_pydatetime())), index=ps.index)
+
+    return [
+        ("time_diff", lambda: by_chunks(total_seconds, ts.diff(1), chunksize), lambda: ts.diff(1).dt.total_seconds()),
+        ("elapsed_time", lambda: by_chunks(total_seconds, ts - t_org, chunksize), lambda: (ts - t_org).dt.total_seconds()),
+        ("timestamp", lambda: by_chunks(timestamp, ts, chunksize), lambda: csv_trimtime.epoch_seconds(ts)),
+    ]
+
+
+def init():
+    arg_parser = argparse.ArgumentParser(description="micro benchmark of time diff, elapsed time and timestamp of csv_trimtime.py",
+                                         formatter_class=argparse.RawDescriptionHelpFormatter,
+                                         epilog=textwrap.dedent('''
+remark:
+  series of datetime is made in memory, parsing is not included.
+  'rowwise' is conversion by python object for each row, as former csv_trimtime.py,
+  that is done by chunks of '--chunksize' rows, because python objects of all rows need large memory.
+  'vectorized' is '.dt.total_seconds()' and int64 epoch arithmetic of csv_trimtime.py.
+  Results are compared with those of 'rowwise', and runtime is printed with csv format.
+
+example:
+  bench_trimtime.py
+  bench_trimtime.py --rows=1000000 --repeat=3
+  TZ=Asia/Tokyo bench_trimtime.py --tz=Europe/Berlin
+
+'''))
+    arg_parser.add_argument('-v', '--version', action='version', version='%(prog)s {}'.format(VERSION))
+    arg_parser.add_argument("--rows", dest="ROWS", help="number of rows, default=10000000", type=int, metavar="INT", default=10000000)
+    arg_parser.add_argument("--repeat", dest="REPEAT", help="number of repeats, default=1", type=int, metavar="INT", default=1)
+    arg_parser.add_argument("--chunksize",
+                            dest="CHUNKSIZE",
+                            help="number of rows in each chunk for 'rowwise', default=1000000",
+                            type=int,
+                            metavar="INT",
+                            default=1000000)
+    arg_parser.add_argument("--tz", dest="TZ", help="time zone of datetime, default=naive datetime", type=str, metavar="TZ", default=None)
+
+    args = arg_parser.parse_args()
+    return args
+
+
+if __name__ == "__main__":
+    args = init()
+    n_rows = args.ROWS
+    n_repeat = args.REPEAT
+
+    ts = make_datetime_series(n_rows, tz=args.TZ)
+    print("%inf:bench_trimtime:rows={}, tz={}, local tz={}".format(n_rows, args.TZ, csv_trimtime.local_timezone()), file=sys.stderr)
+
+    print("operation,method,min_sec,ns_per_row,speedup,same")
+    for name, rowwise_func, vectorized_func in benchmarks(ts, args.CHUNKSIZE):
+        r_min, r_res = measure(rowwise_func, n_repeat)
+        v_min, v_res = measure(vectorized_func, n_repeat)
+        same = np.array_equal(r_res.to_numpy(dtype=float), v_res.to_numpy(dtype=float), equal_nan=True)
+        print("{},rowwise,{:.3f},{:.1f},1.00,True".format(name, r_min, r_min / n_rows * 1e9))
+        print("{},vectorized,{:.3f},{:.1f},{:.1f},{}".format(name, v_min, v_min / n_rows * 1e9, r_min / v_min, same))
+        if not same:
+            print("#warn:bench_trimtime:result is different from rowwise:{}".format(name), file=sys.stderr)
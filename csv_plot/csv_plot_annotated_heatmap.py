@@ -20,9 +20,7 @@ import re
 import json
 from pathlib import Path
 
-import numpy as np
-import plotly.figure_factory as pff
-import pandas as pd
+sys.path.insert(0, format(Path(__file__).parent.parent / "csv_utility"))
 
 VERSION = 1.0
 
@@ -93,6 +91,11 @@ if __name__ == "__main__":
     npts_limit = 100
 
     args = init()
+    import numpy as np
+    import plotly.figure_factory as pff
+    import pandas as pd
+    from csv_schema import read_csv_with_schema
+
     csv_file = args.csv_file[0]
     output_format = args.FORMAT
     packed_html = args.PACKED_HTML
@@ -151,7 +154,7 @@ if __name__ == "__main__":
 
     #--- processing
 
-    csv_df = pd.read_csv(csv_file)
+    csv_df = read_csv_with_schema(csv_file)
 
     if df_query is not None:
         try:
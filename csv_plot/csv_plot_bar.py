@@ -20,8 +20,7 @@ import re
 import json
 from pathlib import Path
 
-import plotly.express as px
-import pandas as pd
+sys.path.insert(0, format(Path(__file__).parent.parent / "csv_utility"))
 
 VERSION = 1.0
 
@@ -126,6 +125,10 @@ example:
 
 if __name__ == "__main__":
     args = init()
+    import plotly.express as px
+    import pandas as pd
+    from csv_schema import read_csv_with_schema
+
     csv_file = args.csv_file
     output_format = args.FORMAT
     packed_html = args.PACKED_HTML
@@ -208,7 +211,7 @@ if __name__ == "__main__":
     #--- processing
 
     # 2D Histograms | Python | Plotly https://plotly.com/python/2D-Histogram/
-    csv_df = pd.read_csv(csv_file)
+    csv_df = read_csv_with_schema(csv_file)
 
     if x_column is None:
         x_column = "csv_plot_bar_x"
@@ -20,8 +20,7 @@ import re
 import json
 from pathlib import Path
 
-import plotly.express as px
-import pandas as pd
+sys.path.insert(0, format(Path(__file__).parent.parent / "csv_utility"))
 
 VERSION = 1.0
 
@@ -114,6 +113,10 @@ example:
 
 if __name__ == "__main__":
     args = init()
+    import plotly.express as px
+    import pandas as pd
+    from csv_schema import read_csv_with_schema
+
     csv_file = args.csv_file[0]
     output_format = args.FORMAT
     packed_html = args.PACKED_HTML
@@ -188,7 +191,7 @@ if __name__ == "__main__":
             sys.exit(1)
 
     #--- processing
-    csv_df = pd.read_csv(csv_file)
+    csv_df = read_csv_with_schema(csv_file)
 
     if y_col_name is not None:
         fig_params = {"x": x_col_name, "y": y_col_name}
@@ -21,15 +21,8 @@ import json
 from pathlib import Path
 
 import math
-import numpy as np
 
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-
-import plotly.express as px
-import pandas as pd
-
-from scipy.stats import moment
+sys.path.insert(0, format(Path(__file__).parent.parent / "csv_utility"))
 
 VERSION = 1.0
 
@@ -284,6 +277,14 @@ def evaluate_number_of_bin_Freedman_Diaconis(ds):
 
 if __name__ == "__main__":
     args = init()
+    import numpy as np
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+    import plotly.express as px
+    import pandas as pd
+    from scipy.stats import moment
+    from csv_schema import read_csv_with_schema
+
     csv_file = args.csv_file[0]
     output_format = args.FORMAT
     packed_html = args.PACKED_HTML
@@ -364,7 +365,7 @@ if __name__ == "__main__":
     #--- processing
 
     # 2D Histograms | Python | Plotly https://plotly.com/python/2D-Histogram/
-    csv_df = pd.read_csv(csv_file)
+    csv_df = read_csv_with_schema(csv_file)
 
     if nbin_mode is not None:
         nbin = evaluate_number_of_bin(csv_df[x_col_name], nbin_mode)
@@ -20,8 +20,7 @@ import re
 import json
 from pathlib import Path
 
-import plotly.express as px
-import pandas as pd
+sys.path.insert(0, format(Path(__file__).parent.parent / "csv_utility"))
 
 VERSION = 1.0
 
@@ -39,6 +38,9 @@ remark:
   if datetime column was used as column for animation, format of datetime should be defined.
   see datetime  Basic date and time types  Python 3.9.4 documentation https://docs.python.org/3/library/datetime.html#strftime-and-strptime-behavior
 
+  When environment variable 'CSV_TOOLS_CACHE_DIR' is defined, parsed data is stored into the cache and is used by later reading,
+  see 'csv_cache.py --help'. '--no_cache' disables the cache, '--refresh_cache' makes the cache again.
+
 example:
   csv_plot_line.py --facets=COL_0006 --output=test.html big_sample_arb.csv COL_0008,COL_0033,COL_0097
   csv_plot_line.py --facets=COL_0006 --format html big_sample_arb.csv COL_0000 COL_0008,COL_0033,COL_0097
@@ -87,6 +89,12 @@ example:
     arg_parser.add_argument("--error_y", dest="ERRORY", help="column name of error y", type=str, metavar='COLUMN')
     # arg_parser.add_argument("--spline", dest="SPLINE", help="spline mode", action="store_true", default=False)
 
+    arg_parser.add_argument("--no_cache", dest="NO_CACHE", help="not use cache of parsed data", action="store_true", default=False)
+    arg_parser.add_argument("--refresh_cache",
+                            dest="REFRESH_CACHE",
+                            help="make cache of parsed data again",
+                            action="store_true",
+                            default=False)
     arg_parser.add_argument("--output", dest="OUTPUT", help="path of output file", type=str, metavar="FILE")
     arg_parser.add_argument("--format",
                             dest="FORMAT",
@@ -111,6 +119,10 @@ example:
 
 if __name__ == "__main__":
     args = init()
+    import plotly.express as px
+    import pandas as pd
+    from csv_cache import read_csv_cached
+
     csv_file = args.csv_file
     output_format = args.FORMAT
     packed_html = args.PACKED_HTML
@@ -125,6 +137,8 @@ if __name__ == "__main__":
     error_x = args.ERRORX
     error_y = args.ERRORY
     x_rangeslider = args.RANGESLIDER
+    no_cache = args.NO_CACHE
+    refresh_cache = args.REFRESH_CACHE
     # spline_mode = args.SPLINE
 
     if output_file is None:
@@ -192,7 +206,12 @@ if __name__ == "__main__":
     #--- processing
 
     # 2D Histograms | Python | Plotly https://plotly.com/python/2D-Histogram/
-    csv_df = pd.read_csv(csv_file)
+    cache_columns = y_columns + [v for v in [x_column, categ, error_x, error_y] if v is not None]
+    if facet_mode:
+        cache_columns.extend([v for v in [row_facet, col_facet] if v is not None and len(v) > 0])
+    if animation_col is not None:
+        cache_columns.append(re.split(r"(?<!\\):", animation_col)[0].replace("\\:", ":"))
+    csv_df = read_csv_cached(csv_file, columns=cache_columns, no_cache=no_cache, refresh=refresh_cache)
 
     if x_column is None:
         x_column = "csv_plot_line_x"
@@ -20,8 +20,7 @@ import re
 import json
 from pathlib import Path
 
-import plotly.express as px
-import pandas as pd
+sys.path.insert(0, format(Path(__file__).parent.parent / "csv_utility"))
 
 VERSION = 1.0
 
@@ -92,6 +91,10 @@ example:
 
 if __name__ == "__main__":
     args = init()
+    import plotly.express as px
+    import pandas as pd
+    from csv_schema import read_csv_with_schema
+
     csv_file = args.csv_file
     output_format = args.FORMAT
     packed_html = args.PACKED_HTML
@@ -164,7 +167,7 @@ if __name__ == "__main__":
 
     #--- processing
 
-    csv_df = pd.read_csv(csv_file)
+    csv_df = read_csv_with_schema(csv_file)
 
     if categ is not None:
         color_params = {"color": categ}
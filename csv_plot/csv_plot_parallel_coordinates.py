@@ -19,8 +19,7 @@ import sys
 import re
 from pathlib import Path
 
-import plotly.express as px
-import pandas as pd
+sys.path.insert(0, format(Path(__file__).parent.parent / "csv_utility"))
 
 VERSION = 1.0
 
@@ -89,6 +88,10 @@ example:
 
 if __name__ == "__main__":
     args = init()
+    import plotly.express as px
+    import pandas as pd
+    from csv_schema import read_csv_with_schema
+
     csv_file = args.csv_file[0]
     animation_col = args.ANIMATION_COL
 
@@ -132,7 +135,7 @@ if __name__ == "__main__":
     #--- processing
 
     # 2D Histograms | Python | Plotly https://plotly.com/python/2D-Histogram/
-    csv_df = pd.read_csv(csv_file)
+    csv_df = read_csv_with_schema(csv_file)
 
     color_params = {"color_continuous_scale": color_scale}
 
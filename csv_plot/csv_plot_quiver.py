@@ -19,11 +19,7 @@ import sys
 import re
 from pathlib import Path
 
-import scipy.interpolate as scii
-import numpy as np
-import pandas as pd
-import plotly.figure_factory as ff
-import plotly.graph_objects as go
+sys.path.insert(0, format(Path(__file__).parent.parent / "csv_utility"))
 
 VERSION = 1.0
 
@@ -106,6 +102,13 @@ def convert_griddata(x_data, y_data, u_data, v_data, n_of_gridx, n_of_gridy):
 
 if __name__ == "__main__":
     args = init()
+    import scipy.interpolate as scii
+    import numpy as np
+    import pandas as pd
+    import plotly.figure_factory as ff
+    import plotly.graph_objects as go
+    from csv_schema import read_csv_with_schema
+
     csv_file = args.csv_file
     output_format = args.FORMAT
     packed_html = args.PACKED_HTML
@@ -174,7 +177,7 @@ if __name__ == "__main__":
     #--- processing
 
     # 2D Histograms | Python | Plotly https://plotly.com/python/2D-Histogram/
-    csv_df = pd.read_csv(csv_file)
+    csv_df = read_csv_with_schema(csv_file)
 
     x_column_data = csv_df[x_column].values
     y_column_data = csv_df[y_column].values
@@ -20,8 +20,7 @@ import re
 import json
 from pathlib import Path
 
-import plotly.express as px
-import pandas as pd
+sys.path.insert(0, format(Path(__file__).parent.parent / "csv_utility"))
 
 VERSION = 1.0
 
@@ -73,6 +72,10 @@ if __name__ == "__main__":
     color_limit = 10
 
     args = init()
+    import plotly.express as px
+    import pandas as pd
+    from csv_schema import read_csv_with_schema
+
     csv_file = args.csv_file[0]
 
     output_format = args.FORMAT
@@ -114,7 +117,7 @@ if __name__ == "__main__":
     fig_params = {"dimensions": dimensions, "opacity": 1.0}
 
     # 2D Histograms | Python | Plotly https://plotly.com/python/2D-Histogram/
-    csv_df = pd.read_csv(csv_file)
+    csv_df = read_csv_with_schema(csv_file)
 
     if symbol is not None:
         csv_df[symbol] = csv_df[symbol].astype(str, errors="ignore")
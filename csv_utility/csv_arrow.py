@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ----------------------------------------------------------------------
+# Name:         csv_arrow.py
+# Description:
+#    Arrow IPC stream as binary format between csv_tools through pipe.
+#    readers of csv_tools detect Arrow IPC stream on stdin, and '--output_format=arrow_stream' writes it.
+#
+# Author:       m.akei
+# Copyright:    (c) 2021 by m.na.akei
+# Time-stamp:   <2021-05-18 20:11:02>
+# Licence:
+#  Copyright (c) 2021 Masaharu N. Akei
+#
+#  This software is released under the MIT License.
+#    http://opensource.org/licenses/mit-license.php
+# ----------------------------------------------------------------------
+import argparse
+import textwrap
+import sys
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, format(Path(__file__).parent))
+
+VERSION = 1.0
+
+OUTPUT_FORMATS = ["csv", "arrow_stream"]
+# Arrow IPC stream starts with continuation marker, that is not valid in text.
+ARROW_STREAM_MAGIC = b"\xff\xff\xff\xff"
+BOOL_STRINGS = {"True": True, "TRUE": True, "true": True, "False": False, "FALSE": False, "false": False}
+
+pyarrow_module = None
+
+
+def get_pyarrow():
+    """import pyarrow, if it is available
+
+    :returns: module of pyarrow or None
+    :rtype: module
+
+    """
+    global pyarrow_module
+    if pyarrow_module is None:
+        try:
+            import pyarrow
+            import pyarrow.ipc
+            pyarrow_module = pyarrow
+        except ImportError:
+            pyarrow_module = False
+    return pyarrow_module if pyarrow_module else None
+
+
+def binary_stream(f):
+    """binary stream under text stream, ex. sys.stdin.buffer
+
+    :param f: file object
+    :returns: binary file object
+    :rtype: file object
+
+    """
+    return getattr(f, "buffer", f)
+
+
+def is_arrow_stream(f):
+    """check that input is Arrow IPC stream, without consuming input
+
+    :param f: file object, ex. sys.stdin
+    :returns: True if input starts with Arrow IPC stream
+    :rtype: bool
+
+    """
+    if isinstance(f, str):
+        return False
+    b_f = binary_stream(f)
+    if not hasattr(b_f, "peek"):
+        return False
+    try:
+        head = b_f.peek(len(ARROW_STREAM_MAGIC))[:len(ARROW_STREAM_MAGIC)]
+    except (OSError, ValueError):
+        return False
+    return head == ARROW_STREAM_MAGIC
+
+
+def to_string_columns(df):
+    """convert all columns into string, as pandas.read_csv with dtype='string' for csv text of df
+
+    :param df: pandas.DataFrame
+    :returns: pandas.DataFrame
+    :rtype: pandas.DataFrame
+
+    """
+    for cname in df.columns:
+        if df[cname].dtype != "string":
+            df[cname] = df[cname].astype("string")
+    return df
+
+
+def to_object_columns(df):
+    """convert all columns into strings of object, as pandas.read_csv with dtype='object' for csv text of df
+
+    :param df: pandas.DataFrame
+    :returns: pandas.DataFrame
+    :rtype: pandas.DataFrame
+
+    """
+    for cname in df.columns:
+        ps = df[cname]
+        df[cname] = ps.astype(str).where(ps.notna(), np.nan).astype(object)
+    return df
+
+
+def datetime_to_string_columns(df):
+    """convert columns of datetime or timedelta into strings, as csv text written by pandas.DataFrame.to_csv
+
+    :param df: pandas.DataFrame
+    :returns: pandas.DataFrame
+    :rtype: pandas.DataFrame
+
+    """
+    for cname in df.select_dtypes(include=["datetime", "datetimetz", "timedelta"]).columns:
+        ps = df[cname]
+        df[cname] = ps.astype(str).where(ps.notna(), np.nan).astype(object)
+    return df
+
+
+def infer_string_columns(df):
+    """infer dtypes of columns of strings, as pandas.read_csv for csv text of df
+
+    columns of other dtypes, numbers or datetime, are kept.
+
+    :param df: pandas.DataFrame
+    :returns: pandas.DataFrame
+    :rtype: pandas.DataFrame
+
+    """
+    for cname in df.columns:
+        ps = df[cname]
+        if ps.dtype != "string" and ps.dtype != object:
+            continue
+        ps = ps.astype(object).where(ps.notna(), np.nan)
+        values = ps.dropna()
+        if len(values) == 0:
+            df[cname] = ps.astype(float) if len(ps) > 0 else ps
+            continue
+        if not all([isinstance(v, str) for v in values.head(1000)]):
+            df[cname] = ps
+            continue
+        try:
+            df[cname] = pd.to_numeric(ps)
+            continue
+        except (ValueError, TypeError):
+            pass
+        if len(values) == len(ps) and values.isin(BOOL_STRINGS.keys()).all():
+            df[cname] = ps.map(BOOL_STRINGS).astype(bool)
+        else:
+            df[cname] = ps
+    return df
+
+
+def convert_input_columns(df, usecols=None, nrows=None, dtype=None):
+    """select columns and convert dtypes of DataFrame from Arrow IPC stream, as options of pandas.read_csv
+
+    :param df: pandas.DataFrame
+    :param usecols: names of columns to use
+    :param nrows: number of rows to use
+    :param dtype: 'string' or 'object' to use all columns as string, otherwise dtypes of strings are inferred.
+    :returns: pandas.DataFrame
+    :rtype: pandas.DataFrame
+
+    """
+    if usecols is not None:
+        df = df[[v for v in df.columns if v in usecols]]
+    if nrows is not None:
+        df = df.head(nrows)
+    df = df.copy()
+    if dtype == "string":
+        df = to_string_columns(df)
+    elif dtype in ["object", object, str]:
+        df = to_object_columns(df)
+    else:
+        df = infer_string_columns(df)
+    return df
+
+
+def read_arrow_stream(f, usecols=None, nrows=None, dtype=None, **kwargs):
+    """read Arrow IPC stream
+
+    other arguments for pandas.read_csv are ignored.
+
+    :param f: file object, ex. sys.stdin
+    :param usecols: names of columns to use
+    :param nrows: number of rows to read
+    :param dtype: 'string' or 'object' to use all columns as string, otherwise dtypes of strings are inferred.
+    :returns: pandas.DataFrame
+    :rtype: pandas.DataFrame
+
+    """
+    pa = get_pyarrow()
+    if pa is None:
+        print("??error:csv_arrow:pyarrow is required to read Arrow IPC stream", file=sys.stderr)
+        sys.exit(1)
+    reader = pa.ipc.open_stream(binary_stream(f))
+    if nrows is not None:
+        batches = []
+        n_read = 0
+        for batch in reader:
+            batches.append(batch)
+            n_read += batch.num_rows
+            if n_read >= nrows:
+                break
+        table = pa.Table.from_batches(batches, schema=reader.schema)
+    else:
+        table = reader.read_all()
+    print("%inf:csv_arrow:read Arrow IPC stream:rows={},columns={}".format(table.num_rows, table.num_columns), file=sys.stderr)
+    return convert_input_columns(table.to_pandas(), usecols=usecols, nrows=nrows, dtype=dtype)
+
+
+def iter_arrow_stream(f, chunksize, usecols=None, dtype=None):
+    """read Arrow IPC stream as chunks
+
+    :param f: file object, ex. sys.stdin
+    :param chunksize: number of rows in each chunk
+    :param usecols: names of columns to use
+    :param dtype: 'string' or 'object' to use all columns as string, otherwise dtypes of strings are inferred.
+    :returns: iterator of pandas.DataFrame
+    :rtype: iterator
+
+    """
+    pa = get_pyarrow()
+    if pa is None:
+        print("??error:csv_arrow:pyarrow is required to read Arrow IPC stream", file=sys.stderr)
+        sys.exit(1)
+    reader = pa.ipc.open_stream(binary_stream(f))
+    batches = []
+    n_rows = 0
+    for batch in reader:
+        batches.append(batch)
+        n_rows += batch.num_rows
+        while n_rows >= chunksize:
+            table = pa.Table.from_batches(batches, schema=reader.schema)
+            yield convert_input_columns(table.slice(0, chunksize).to_pandas(), usecols=usecols, dtype=dtype)
+            rest = table.slice(chunksize)
+            batches = rest.to_batches()
+            n_rows = rest.num_rows
+    if n_rows > 0:
+        table = pa.Table.from_batches(batches, schema=reader.schema)
+        yield convert_input_columns(table.to_pandas(), usecols=usecols, dtype=dtype)
+
+
+def dataframe_to_table(df):
+    """convert DataFrame into table of pyarrow
+
+    columns of objects, those can not be converted by pyarrow, ex. mixed types, are converted into strings.
+
+    :param df: pandas.DataFrame
+    :returns: pyarrow.Table
+    :rtype: pyarrow.Table
+
+    """
+    pa = get_pyarrow()
+    df.columns = [str(v) for v in df.columns]
+    try:
+        return pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+        df = df.copy()
+        for cname in df.columns:
+            ps = df[cname]
+            if ps.dtype == object:
+                df[cname] = ps.astype(str).where(ps.notna(), None)
+        return pa.Table.from_pandas(df, preserve_index=False)
+
+
+def write_arrow_stream(df, output_file, index=False):
+    """write DataFrame as Arrow IPC stream
+
+    :param df: pandas.DataFrame
+    :param output_file: path of output or file object, ex. sys.stdout
+    :param index: if True, index is written as columns, as pandas.DataFrame.to_csv.
+
+    """
+    pa = get_pyarrow()
+    if pa is None:
+        print("??error:csv_arrow:pyarrow is required to write Arrow IPC stream", file=sys.stderr)
+        sys.exit(1)
+    if isinstance(df, pd.Series):
+        df = df.to_frame()
+    if index:
+        df = df.reset_index()
+    table = dataframe_to_table(df)
+    if isinstance(output_file, str):
+        sink = open(output_file, "wb")
+    else:
+        output_file.flush()
+        sink = binary_stream(output_file)
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    sink.flush()
+    if isinstance(output_file, str):
+        sink.close()
+
+
+def write_dataframe(df, output_file, output_format, index=True, date_format=None, **kwargs):
+    """write DataFrame as csv or Arrow IPC stream
+
+    :param df: pandas.DataFrame
+    :param output_file: path of output or file object, ex. sys.stdout
+    :param output_format: 'csv' or 'arrow_stream'
+    :param index: if True, index is written.
+    :param date_format: format of datetime
+    :param kwargs: other arguments for pandas.DataFrame.to_csv
+
+    """
+    if output_format == "arrow_stream":
+        if date_format is not None:
+            # as to_csv with 'date_format'
+            df = df.copy()
+            for cname in df.select_dtypes(include="datetime").columns:
+                df[cname] = df[cname].dt.strftime(date_format)
+        write_arrow_stream(df, output_file, index=index)
+    else:
+        df.to_csv(output_file, index=index, date_format=date_format, **kwargs)
+
+
+def init():
+    arg_parser = argparse.ArgumentParser(description="convert csv file into Arrow IPC stream, or Arrow IPC stream into csv",
+                                         formatter_class=argparse.RawDescriptionHelpFormatter,
+                                         epilog=textwrap.dedent('''
+remark:
+  Readers of csv_tools, that accept '-' as input, detect Arrow IPC stream on stdin.
+  Tools that have '--output_format=arrow_stream' write result as Arrow IPC stream, then
+  dtypes of numbers and datetime are kept between processes and parsing of csv text is not needed.
+  Columns of strings in stream are converted as inference of pandas.read_csv.
+  pyarrow is required.
+
+  Without '--to_csv', csv file is converted into Arrow IPC stream.
+  With '--to_csv', Arrow IPC stream on stdin is converted into csv.
+
+example:
+  csv_arrow.py big_sample_arb.csv | csv_status.py -
+  csv_uty.py --output_format=arrow_stream --sort=A test_trimtime.csv | csv_trimtime.py --resample='A:%Y-%m-%d %H\:%M\:%S:1D:B,C' - | csv_status.py -
+  csv_trimtime.py --output_format=arrow_stream --sort_datetime=A test_trimtime.csv | csv_arrow.py --to_csv - |head
+
+'''))
+    arg_parser.add_argument('-v', '--version', action='version', version='%(prog)s {}'.format(VERSION))
+
+    arg_parser.add_argument("--to_csv", dest="TO_CSV", help="convert Arrow IPC stream into csv", action="store_true", default=False)
+    arg_parser.add_argument("--output", dest="OUTPUT", help="path of output, default=stdout", type=str, metavar="FILE", default=sys.stdout)
+
+    arg_parser.add_argument('csv_file', metavar='CSV_FILE', help="files to read, if '-', stdin is used")
+
+    args = arg_parser.parse_args()
+    return args
+
+
+if __name__ == "__main__":
+    args = init()
+    from csv_schema import read_csv_with_schema
+
+    csv_file = args.csv_file
+    output_file = args.OUTPUT
+    to_csv = args.TO_CSV
+
+    if csv_file == "-":
+        csv_file = sys.stdin
+
+    csv_df = read_csv_with_schema(csv_file)
+    write_dataframe(csv_df, output_file, "csv" if to_csv else "arrow_stream", index=False)
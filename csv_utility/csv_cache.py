@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ----------------------------------------------------------------------
+# Name:         csv_cache.py
+# Description:
+#    persistent columnar cache of parsed csv file for csv_tools.
+#    When environment variable 'CSV_TOOLS_CACHE_DIR' is defined, parsed DataFrame is stored as Feather or Parquet
+#    in the directory, keyed by path, size, mtime of csv file and options to read.
+#
+# Author:       m.akei
+# Copyright:    (c) 2021 by m.na.akei
+# Time-stamp:   <2021-05-09 14:21:05>
+# Licence:
+#  Copyright (c) 2021 Masaharu N. Akei
+#
+#  This software is released under the MIT License.
+#    http://opensource.org/licenses/mit-license.php
+# ----------------------------------------------------------------------
+import argparse
+import textwrap
+import sys
+
+import os
+import json
+import codecs
+import hashlib
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, format(Path(__file__).parent))
+from csv_schema import read_csv_with_schema
+
+VERSION = 1.0
+
+CACHE_DIR_ENV = "CSV_TOOLS_CACHE_DIR"
+CACHE_SIZE_ENV = "CSV_TOOLS_CACHE_SIZE"
+CACHE_FORMAT_ENV = "CSV_TOOLS_CACHE_FORMAT"
+CACHE_DEFAULT_SIZE = 4096
+CACHE_FORMATS = ["feather", "parquet"]
+# default values of options to read csv file, those are not a part of key of cache.
+CACHE_DEFAULT_OPTIONS = {"encoding": "utf-8"}
+
+pyarrow_module = None
+
+
+def get_pyarrow():
+    """import pyarrow, if it is available
+
+    :returns: module of pyarrow or None
+    :rtype: module
+
+    """
+    global pyarrow_module
+    if pyarrow_module is None:
+        try:
+            import pyarrow
+            import pyarrow.feather
+            import pyarrow.parquet
+            pyarrow_module = pyarrow
+        except ImportError:
+            pyarrow_module = False
+    return pyarrow_module if pyarrow_module else None
+
+
+def get_cache_config():
+    """configuration of cache from environment variables
+
+    :returns: directory, max size in bytes and format of cache, or None if cache is not enabled.
+    :rtype: tuple
+
+    """
+    cache_dir = os.environ.get(CACHE_DIR_ENV)
+    if cache_dir is None or len(cache_dir) == 0:
+        return None
+    try:
+        max_size = int(os.environ.get(CACHE_SIZE_ENV, CACHE_DEFAULT_SIZE)) * 1024 * 1024
+    except ValueError:
+        print("#warn:csv_cache:invalid {}, {}MB is used".format(CACHE_SIZE_ENV, CACHE_DEFAULT_SIZE), file=sys.stderr)
+        max_size = CACHE_DEFAULT_SIZE * 1024 * 1024
+    cache_format = os.environ.get(CACHE_FORMAT_ENV, CACHE_FORMATS[0])
+    if cache_format not in CACHE_FORMATS:
+        print("#warn:csv_cache:invalid {}, {} is used".format(CACHE_FORMAT_ENV, CACHE_FORMATS[0]), file=sys.stderr)
+        cache_format = CACHE_FORMATS[0]
+    return Path(cache_dir), max_size, cache_format
+
+
+def normalize_read_options(options):
+    """options to read csv file without None and default values, then the same data has the same key for any tool.
+
+    :param options: options to read csv file
+    :returns: normalized options
+    :rtype: dict
+
+    """
+    result = {}
+    for k, v in options.items():
+        if v is None:
+            continue
+        if k == "encoding":
+            try:
+                v = codecs.lookup(v).name
+            except LookupError:
+                pass
+        if CACHE_DEFAULT_OPTIONS.get(k) == v:
+            continue
+        result[k] = v
+    return result
+
+
+def cache_key(csv_file, options):
+    """key of cache for csv file
+
+    :param csv_file: path of csv file
+    :param options: options to read csv file
+    :returns: key
+    :rtype: str
+
+    """
+    st = os.stat(csv_file)
+    key_s = json.dumps({
+        "path": str(Path(csv_file).resolve()),
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "options": normalize_read_options(options)
+    },
+                       sort_keys=True,
+                       default=str)
+    return hashlib.sha1(key_s.encode()).hexdigest()
+
+
+def list_cache_files(cache_dir):
+    """list of cache files, older used one is first
+
+    :param cache_dir: directory of cache
+    :returns: list of path
+    :rtype: list[Path]
+
+    """
+    c_files = [v for v in cache_dir.glob("*") if v.suffix[1:] in CACHE_FORMATS]
+    return sorted(c_files, key=lambda v: v.stat().st_mtime)
+
+
+def evict_cache(cache_dir, max_size):
+    """remove least recently used cache files to keep total size under max size
+
+    :param cache_dir: directory of cache
+    :param max_size: max size in bytes
+
+    """
+    c_files = list_cache_files(cache_dir)
+    total_size = sum([v.stat().st_size for v in c_files])
+    for cf in c_files:
+        if total_size <= max_size:
+            break
+        total_size -= cf.stat().st_size
+        cf.unlink()
+        print("%inf:csv_cache:evicted:{}".format(cf), file=sys.stderr)
+
+
+def load_cache(c_path, cache_format, columns=None):
+    """load DataFrame from cache file
+
+    :param c_path: path of cache file
+    :param cache_format: 'feather' or 'parquet'
+    :param columns: names of columns to load, None means all columns.
+    :returns: pandas.DataFrame
+    :rtype: pandas.DataFrame
+
+    """
+    pa = get_pyarrow()
+    if cache_format == "feather":
+        c_names = pa.ipc.open_file(c_path).schema.names
+        read_table = pa.feather.read_table
+    else:
+        c_names = pa.parquet.read_schema(c_path).names
+        read_table = pa.parquet.read_table
+    if columns is not None and any([v not in c_names for v in columns]):
+        columns = None
+    df = read_table(c_path, columns=columns).to_pandas()
+    # null of string is None in pyarrow, but NaN in pandas.read_csv
+    for cname in df.columns:
+        if df[cname].dtype == object and df[cname].isna().any():
+            df[cname] = df[cname].where(df[cname].notna(), np.nan)
+    return df
+
+
+def save_cache(df, c_path, cache_format):
+    """save DataFrame into cache file
+
+    :param df: pandas.DataFrame
+    :param c_path: path of cache file
+    :param cache_format: 'feather' or 'parquet'
+
+    """
+    tmp_path = c_path.with_name(c_path.name + ".tmp")
+    if cache_format == "feather":
+        df.to_feather(tmp_path)
+    else:
+        df.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, c_path)
+
+
+def read_csv_cached(csv_file, columns=None, no_cache=False, refresh=False, **kwargs):
+    """read csv file through persistent columnar cache
+
+    The cache is used only when environment variable 'CSV_TOOLS_CACHE_DIR' is defined and pyarrow is available.
+
+    :param csv_file: path of csv file, or file object. for file object, cache is not used.
+    :param columns: names of columns that are needed, None means all columns.
+    :param no_cache: if True, cache is not used.
+    :param refresh: if True, cache and schema are made again.
+    :returns: pandas.DataFrame
+    :rtype: pandas.DataFrame
+
+    """
+    config = get_cache_config()
+    if no_cache or config is None or not isinstance(csv_file, (str, Path)) or str(csv_file) == "-":
+        return read_csv_with_schema(csv_file, refresh=refresh, **kwargs)
+    if get_pyarrow() is None:
+        print("#warn:csv_cache:pyarrow is not available, cache is not used", file=sys.stderr)
+        return read_csv_with_schema(csv_file, refresh=refresh, **kwargs)
+
+    cache_dir, max_size, cache_format = config
+    if columns is not None:
+        columns = list(dict.fromkeys(columns))
+    c_path = cache_dir / "{}.{}".format(cache_key(csv_file, kwargs), cache_format)
+    if c_path.exists() and not refresh:
+        try:
+            df = load_cache(c_path, cache_format, columns=columns)
+            os.utime(c_path)
+            print("%inf:csv_cache:read from cache:{}".format(c_path), file=sys.stderr)
+            return df
+        except (OSError, ValueError, get_pyarrow().ArrowException) as e:
+            print("#warn:csv_cache:cache was broken, csv file is read:{}".format(e), file=sys.stderr)
+
+    df = read_csv_with_schema(csv_file, refresh=refresh, **kwargs)
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        save_cache(df, c_path, cache_format)
+        print("%inf:csv_cache:stored into cache:{}".format(c_path), file=sys.stderr)
+        evict_cache(cache_dir, max_size)
+    except (OSError, ValueError, TypeError, get_pyarrow().ArrowException) as e:
+        print("#warn:csv_cache:data was not cached:{}".format(e), file=sys.stderr)
+
+    if columns is not None and all([v in df.columns for v in columns]):
+        df = df[columns]
+    return df
+
+
+def init():
+    arg_parser = argparse.ArgumentParser(description="manage persistent columnar cache of csv_tools",
+                                         formatter_class=argparse.RawDescriptionHelpFormatter,
+                                         epilog=textwrap.dedent('''
+remark:
+  The cache is enabled by environment variable 'CSV_TOOLS_CACHE_DIR', that is path of directory of cache.
+  With the cache, csv_status.py, csv_histogram.py, csv_plot_line.py and csv_query.py store
+  parsed data into the cache at first reading, and later reading loads only needed columns from the cache.
+  pyarrow is required for the cache.
+
+  'CSV_TOOLS_CACHE_SIZE': max size of cache in MB, default=4096. Least recently used files are evicted.
+  'CSV_TOOLS_CACHE_FORMAT': 'feather' or 'parquet', default=feather.
+
+example:
+  export CSV_TOOLS_CACHE_DIR=~/.cache/csv_tools
+  csv_cache.py
+  csv_cache.py --clear
+
+'''))
+    arg_parser.add_argument('-v', '--version', action='version', version='%(prog)s {}'.format(VERSION))
+
+    arg_parser.add_argument("--clear", dest="CLEAR", help="remove all cache files", action="store_true", default=False)
+
+    args = arg_parser.parse_args()
+    return args
+
+
+if __name__ == "__main__":
+    args = init()
+    clear_mode = args.CLEAR
+
+    config = get_cache_config()
+    if config is None:
+        print("??Error:csv_cache:cache is not enabled, define {}".format(CACHE_DIR_ENV), file=sys.stderr)
+        sys.exit(1)
+    cache_dir, max_size, cache_format = config
+    if not cache_dir.exists():
+        print("%inf:csv_cache:no cache:{}".format(cache_dir), file=sys.stderr)
+        sys.exit(0)
+
+    c_files = list_cache_files(cache_dir)
+    if clear_mode:
+        for cf in c_files:
+            cf.unlink()
+        print("%inf:csv_cache:{} files were removed:{}".format(len(c_files), cache_dir), file=sys.stderr)
+    else:
+        total_size = sum([v.stat().st_size for v in c_files])
+        print("directory,files,size_MB,max_size_MB,format")
+        print("{},{},{:.1f},{:.1f},{}".format(cache_dir, len(c_files), total_size / 1024 / 1024, max_size / 1024 / 1024, cache_format))
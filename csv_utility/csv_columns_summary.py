@@ -18,8 +18,8 @@ import textwrap
 import sys
 
 import re
-import numpy as np
-import pandas as pd
+from pathlib import Path
+sys.path.insert(0, format(Path(__file__).parent))
 
 VERSION = 1.0
 
@@ -58,6 +58,11 @@ example:
                             default=None)
 
     arg_parser.add_argument("--output", dest="OUTPUT", help="path of output file, default=stdout", type=str, metavar='FILE', default=None)
+    arg_parser.add_argument("--output_format",
+                            dest="OFORMAT",
+                            help="format of output, 'arrow_stream' is Arrow IPC stream for other csv_tools, default=csv",
+                            choices=["csv", "arrow_stream"],
+                            default="csv")
 
     arg_parser.add_argument('csv_file', metavar='CSV_FILE', help='files to read, if empty, stdin is used')
     args = arg_parser.parse_args()
@@ -80,10 +85,16 @@ def count_in_series(ds, string_for_count):
 
 if __name__ == "__main__":
     args = init()
+    import numpy as np
+    import pandas as pd
+    from csv_schema import read_csv_with_schema
+    from csv_arrow import write_dataframe
+
     csv_file = args.csv_file
     columns_s = args.COLUMNS
     f_mode = args.FUNC
     output_file = args.OUTPUT
+    output_format = args.OFORMAT
     count_s = args.COUNTS
 
     if csv_file == "-":
@@ -92,7 +103,7 @@ if __name__ == "__main__":
     if output_file is None:
         output_file = sys.stdout
 
-    csv_df = pd.read_csv(csv_file)
+    csv_df = read_csv_with_schema(csv_file)
     if columns_s is not None:
         columns = re.split(r"\s*,\s*", columns_s)
     else:
@@ -141,6 +152,6 @@ if __name__ == "__main__":
         out_df.loc[cname] = vals
 
     if len(out_df) > 0:
-        out_df.to_csv(output_file)
+        write_dataframe(out_df, output_file, output_format)
     else:
         print("??Error:csv_columns_summary:result is empty ", file=sys.stderr)
@@ -20,7 +20,7 @@ import sys
 from pathlib import Path
 
 import re
-import pandas as pd
+sys.path.insert(0, format(Path(__file__).parent))
 
 VERSION = 1.0
 
@@ -133,6 +133,11 @@ example:
                             type=str,
                             metavar='FILE',
                             default=sys.stdout)
+    arg_parser.add_argument("--output_format",
+                            dest="OFORMAT",
+                            help="format of output, 'arrow_stream' is Arrow IPC stream for other csv_tools, default=csv",
+                            choices=["csv", "arrow_stream"],
+                            default="csv")
 
     arg_parser.add_argument('csv_file_1', metavar='CSV_FILE', help='first csv file to complement')
     arg_parser.add_argument('csv_file_2_or_value', metavar='CSV_FILE_or_VALUE', help='second csv file or scalar float value')
@@ -165,9 +170,14 @@ def combine_fillna(s1, s2):
 
 if __name__ == "__main__":
     args = init()
+    import pandas as pd
+    from csv_schema import read_csv_with_schema
+    from csv_arrow import write_dataframe
+
     csv_file_1 = args.csv_file_1
     csv_file_2_or_value = args.csv_file_2_or_value
     output_file = args.OUTPUT_FILE
+    output_format = args.OFORMAT
 
     c_mode = args.MODE
     f_lambda = args.FUNC
@@ -193,9 +203,9 @@ if __name__ == "__main__":
             print("%Inf:csv_uty:exec python code:{}".format(pp), file=sys.stderr)
             exec(pp)
 
-    csv_df_1 = pd.read_csv(csv_file_1)
+    csv_df_1 = read_csv_with_schema(csv_file_1)
     if Path(csv_file_2_or_value).exists():
-        csv_df_2 = pd.read_csv(csv_file_2_or_value)
+        csv_df_2 = read_csv_with_schema(csv_file_2_or_value)
     else:
         csv_df_2 = csv_df_1.copy()
         csv_df_2[csv_df_2.columns] = float(csv_file_2_or_value)
@@ -247,4 +257,4 @@ if __name__ == "__main__":
     if bool_by_num and c_mode in ["lt", "le", "gt", "ge", "ne", "eq"]:
         csv_df_1.replace({True: 1, False: 0}, inplace=True)
 
-    csv_df_1.to_csv(output_file, index=False)
+    write_dataframe(csv_df_1, output_file, output_format, index=False)
@@ -18,8 +18,8 @@ import textwrap
 import sys
 
 import re
-import statsmodels.tsa.api as tsa
-import pandas as pd
+from pathlib import Path
+sys.path.insert(0, format(Path(__file__).parent))
 
 VERSION = 1.0
 
@@ -83,6 +83,11 @@ example:
                             type=str,
                             metavar='FILE',
                             default=sys.stdout)
+    arg_parser.add_argument("--output_format",
+                            dest="OFORMAT",
+                            help="format of output, 'arrow_stream' is Arrow IPC stream for other csv_tools, default=csv",
+                            choices=["csv", "arrow_stream"],
+                            default="csv")
 
     arg_parser.add_argument('csv_file', metavar='CSV_FILE', help='files to read, if empty, stdin is used')
     arg_parser.add_argument('columns', metavar='COLUMN[,COLUMN...]', help='columns to do')
@@ -93,8 +98,14 @@ example:
 
 if __name__ == "__main__":
     args = init()
+    import statsmodels.tsa.api as tsa
+    import pandas as pd
+    from csv_schema import read_csv_with_schema
+    from csv_arrow import write_dataframe
+
     csv_file = args.csv_file
     output_file = args.OUTPUT
+    output_format = args.OFORMAT
 
     mode = args.MODE
     nlags = args.NLAGS
@@ -110,7 +121,7 @@ if __name__ == "__main__":
     if csv_file == "-":
         csv_file = sys.stdin
 
-    csv_df = pd.read_csv(csv_file)
+    csv_df = read_csv_with_schema(csv_file)
 
     csv_df[columns] = csv_df[columns].fillna(na_value)
 
@@ -145,4 +156,4 @@ if __name__ == "__main__":
                     output_df["cc_{}_{}".format(cn1, cn2)] = tsa.stattools.ccf(csv_df[cn1].iloc[in_s], csv_df[cn2].iloc[in_s])[:nlags]
 
     output_df.index.name = "index"
-    output_df.to_csv(output_file)
+    write_dataframe(output_df, output_file, output_format)
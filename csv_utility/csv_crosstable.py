@@ -18,8 +18,8 @@ import textwrap
 import sys
 
 import re
-import numpy as np
-import pandas as pd
+from pathlib import Path
+sys.path.insert(0, format(Path(__file__).parent))
 
 VERSION = 1.0
 
@@ -125,6 +125,11 @@ D,9.0,,,,,,,5.0
                             type=str,
                             metavar="FILE",
                             default=sys.stdout)
+    arg_parser.add_argument("--output_format",
+                            dest="OFORMAT",
+                            help="format of output, 'arrow_stream' is Arrow IPC stream for other csv_tools, default=csv",
+                            choices=["csv", "arrow_stream"],
+                            default="csv")
 
     arg_parser.add_argument('csv_file', metavar='CSV_FILE', help='files to read, if empty, stdin is used')
     arg_parser.add_argument('rows', metavar="ROW_COLUMN[,ROW_COLUMN...]", type=str)
@@ -136,6 +141,11 @@ D,9.0,,,,,,,5.0
 
 if __name__ == "__main__":
     args = init()
+    import numpy as np
+    import pandas as pd
+    from csv_schema import read_csv_with_schema
+    from csv_arrow import write_dataframe
+
     csv_file = args.csv_file
     rownames_s = args.rows
     rownames = re.split(r"\s*,\s*", rownames_s)
@@ -145,6 +155,7 @@ if __name__ == "__main__":
     if csv_file == "-":
         csv_file = sys.stdin
     output_file = args.OUTPUT
+    output_format = args.OFORMAT
 
     ct_params = {"dropna": args.SAZ}
     norms = args.NORM
@@ -183,7 +194,7 @@ if __name__ == "__main__":
     elif aggfunc_s == "count_nonzero":
         aggfunc = np.count_nonzero
 
-    csv_df = pd.read_csv(csv_file)
+    csv_df = read_csv_with_schema(csv_file)
     if values is not None:
         ct_params.update({"values": csv_df[values], "aggfunc": aggfunc})
 
@@ -196,4 +207,4 @@ if __name__ == "__main__":
     output_df = pd.crosstab(idxs, cols, **ct_params)
 
     # print(output_df)
-    output_df.to_csv(output_file)
+    write_dataframe(output_df, output_file, output_format)
@@ -0,0 +1,500 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ----------------------------------------------------------------------
+# Name:         csv_daemon.py
+# Description:
+#    resident worker of csv_tools, that serves python scripts of csv_tools through unix socket
+#    without startup of python and pandas for each call.
+#    Each request is processed by forked process from the worker, that has already imported libraries.
+#
+# Author:       m.akei
+# Copyright:    (c) 2021 by m.na.akei
+# Time-stamp:   <2021-05-16 10:02:44>
+# Licence:
+#  Copyright (c) 2021 Masaharu N. Akei
+#
+#  This software is released under the MIT License.
+#    http://opensource.org/licenses/mit-license.php
+# ----------------------------------------------------------------------
+import argparse
+import textwrap
+import sys
+
+import os
+import io
+import json
+import time
+import socket
+import struct
+import runpy
+import traceback
+import importlib
+from pathlib import Path
+
+VERSION = 1.0
+
+SOCKET_ENV = "CSV_TOOLS_DAEMON_SOCKET"
+SCRIPT_DIRS = [Path(__file__).resolve().parent, Path(__file__).resolve().parent.parent / "csv_plot"]
+DEFAULT_PRELOAD = "numpy,pandas,csv_schema,csv_cache"
+MESSAGE_MAX_SIZE = 16 * 1024 * 1024
+
+
+def default_socket_path():
+    """path of unix socket of the worker
+
+    :returns: path of socket, that is given by environment variable 'CSV_TOOLS_DAEMON_SOCKET'
+    :rtype: str
+
+    """
+    s_path = os.environ.get(SOCKET_ENV)
+    if s_path is None or len(s_path) == 0:
+        s_path = "/tmp/csv_tools_daemon_{}.sock".format(os.getuid())
+    return s_path
+
+
+def find_script(name):
+    """find python script of csv_tools by name
+
+    only scripts in csv_utility and csv_plot are available.
+
+    :param name: name of script, ex. 'csv_uty.py'
+    :returns: path of script or None
+    :rtype: Path
+
+    """
+    name = os.path.basename(name)
+    if not name.endswith(".py"):
+        name += ".py"
+    for sd in SCRIPT_DIRS:
+        sc = sd / name
+        if sc.is_file():
+            return sc
+    return None
+
+
+def send_message(conn, message, fds=None):
+    """send message, that is length-prefixed json, with file descriptors
+
+    :param conn: socket
+    :param message: dict
+    :param fds: list of file descriptors to pass
+
+    """
+    data = json.dumps(message).encode()
+    data = struct.pack("!I", len(data)) + data
+    if fds is not None and len(fds) > 0:
+        n_sent = socket.send_fds(conn, [data], fds)
+        data = data[n_sent:]
+    if len(data) > 0:
+        conn.sendall(data)
+
+
+def recv_exact(conn, size):
+    """receive data of given size
+
+    :param conn: socket
+    :param size: size of data
+    :returns: data or None, if connection was closed.
+    :rtype: bytes
+
+    """
+    buf = b""
+    while len(buf) < size:
+        data = conn.recv(size - len(buf))
+        if len(data) == 0:
+            return None
+        buf += data
+    return buf
+
+
+def recv_message(conn, max_fds=0):
+    """receive message, that was sent by send_message
+
+    :param conn: socket
+    :param max_fds: max number of file descriptors to receive
+    :returns: message and list of file descriptors. message is None, if connection was closed.
+    :rtype: tuple
+
+    """
+    fds = []
+    if max_fds > 0:
+        data, fds, _, _ = socket.recv_fds(conn, 4, max_fds)
+        if len(data) < 4:
+            rest = recv_exact(conn, 4 - len(data))
+            if rest is None:
+                return None, fds
+            data += rest
+    else:
+        data = recv_exact(conn, 4)
+        if data is None:
+            return None, fds
+    size = struct.unpack("!I", data)[0]
+    if size > MESSAGE_MAX_SIZE:
+        raise ValueError("too large message: {}".format(size))
+    data = recv_exact(conn, size)
+    if data is None:
+        return None, fds
+    return json.loads(data.decode()), fds
+
+
+def check_peer(conn):
+    """check that peer of connection is the same user
+
+    :param conn: socket
+    :returns: True if peer is the same user or it can not be checked.
+    :rtype: bool
+
+    """
+    if not hasattr(socket, "SO_PEERCRED"):
+        return True
+    cred = conn.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i"))
+    _, uid, _ = struct.unpack("3i", cred)
+    return uid == os.getuid()
+
+
+def preload_modules(modules):
+    """import modules and warm up pandas in the worker
+
+    :param modules: list of names of modules
+
+    """
+    for mn in modules:
+        try:
+            importlib.import_module(mn)
+        except ImportError as e:
+            print("#warn:csv_daemon:module was not preloaded:{}:{}".format(mn, e), file=sys.stderr)
+    if "pandas" in sys.modules:
+        # some parts of pandas are imported at first call.
+        pd = sys.modules["pandas"]
+        df = pd.read_csv(io.StringIO("A,B,C\n1,0.5,2021-01-01 00:00:00\n2,1.5,2021-01-01 00:01:00\n"))
+        df["C"] = pd.to_datetime(df["C"])
+        df.to_csv(io.StringIO(), index=False)
+        df.describe()
+
+
+def run_script(conn, fds, request):
+    """run script in forked process, as if it was called from shell
+
+    stdin, stdout and stderr are replaced with file descriptors of client. this function does not return.
+
+    :param conn: socket
+    :param fds: file descriptors of stdin, stdout and stderr of client
+    :param request: dict of 'script', 'argv', 'cwd' and 'env'
+
+    """
+    send_message(conn, {"pid": os.getpid()})
+    for i_fd, fd in enumerate(fds[:3]):
+        os.dup2(fd, i_fd)
+        os.close(fd)
+    sys.stdin = open(0, "r", closefd=False)
+    sys.stdout = open(1, "w", closefd=False)
+    sys.stderr = open(2, "w", buffering=1, closefd=False)
+
+    exit_code = 0
+    try:
+        os.chdir(request["cwd"])
+        os.environ.clear()
+        os.environ.update(request["env"])
+        script = find_script(request["script"])
+        if script is None:
+            print("??error:csv_daemon:script was not found:{}".format(request["script"]), file=sys.stderr)
+            exit_code = 1
+        else:
+            sys.argv = [str(script)] + request["argv"]
+            sys.path[0] = str(script.parent)
+            runpy.run_path(str(script), run_name="__main__")
+    except SystemExit as e:
+        if e.code is None:
+            exit_code = 0
+        elif isinstance(e.code, int):
+            exit_code = e.code
+        else:
+            print(e.code, file=sys.stderr)
+            exit_code = 1
+    except BaseException:
+        traceback.print_exc()
+        exit_code = 1
+
+    for fo in [sys.stdout, sys.stderr]:
+        try:
+            fo.flush()
+        except (OSError, ValueError):
+            pass
+    try:
+        send_message(conn, {"exit_code": exit_code})
+    except OSError:
+        pass
+    os._exit(0)
+
+
+def reap_children(children):
+    """reap finished processes
+
+    :param children: set of pids of running processes
+
+    """
+    for pid in list(children):
+        try:
+            r_pid, _ = os.waitpid(pid, os.WNOHANG)
+        except ChildProcessError:
+            r_pid = pid
+        if r_pid != 0:
+            children.discard(pid)
+
+
+def handle_connection(conn, status, children):
+    """handle request of client
+
+    :param conn: socket
+    :param status: dict of status of worker
+    :param children: set of pids of running processes
+    :returns: False if worker should stop
+    :rtype: bool
+
+    """
+    fds = []
+    try:
+        if not check_peer(conn):
+            print("#warn:csv_daemon:connection from other user was refused", file=sys.stderr)
+            return True
+        request, fds = recv_message(conn, max_fds=3)
+        if request is None:
+            return True
+        command = request.get("command", "run")
+        if command == "stop":
+            send_message(conn, {"stopped": True})
+            return False
+        if command == "status":
+            status["running"] = len(children)
+            status["uptime"] = time.time() - status["started"]
+            send_message(conn, status)
+            return True
+        if command != "run" or len(fds) != 3:
+            send_message(conn, {"error": "invalid request"})
+            return True
+
+        sys.stdout.flush()
+        sys.stderr.flush()
+        pid = os.fork()
+        if pid == 0:
+            try:
+                run_script(conn, fds, request)
+            finally:
+                os._exit(1)
+        children.add(pid)
+        status["served"] += 1
+    except (OSError, ValueError) as e:
+        print("#warn:csv_daemon:invalid request:{}".format(e), file=sys.stderr)
+    finally:
+        for fd in fds:
+            os.close(fd)
+        conn.close()
+    return True
+
+
+def connect_worker(socket_path, timeout=None):
+    """connect to the worker
+
+    :param socket_path: path of socket
+    :param timeout: timeout in seconds
+    :returns: socket or None
+    :rtype: socket
+
+    """
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    if timeout is not None:
+        sock.settimeout(timeout)
+    try:
+        sock.connect(socket_path)
+    except OSError:
+        sock.close()
+        return None
+    return sock
+
+
+def query_worker(socket_path, command):
+    """send command to the worker
+
+    :param socket_path: path of socket
+    :param command: 'status' or 'stop'
+    :returns: reply or None, if the worker is not running
+    :rtype: dict
+
+    """
+    sock = connect_worker(socket_path, timeout=10)
+    if sock is None:
+        return None
+    try:
+        send_message(sock, {"command": command})
+        reply, _ = recv_message(sock)
+    except OSError:
+        reply = None
+    finally:
+        sock.close()
+    return reply
+
+
+def serve(socket_path, preload, idle_timeout, ready_fd=None):
+    """run the worker
+
+    :param socket_path: path of socket
+    :param preload: list of names of modules to import in advance
+    :param idle_timeout: the worker stops after this seconds without requests, 0 means no timeout.
+    :param ready_fd: file descriptor to notify that the worker is ready
+
+    """
+    preload_modules(preload)
+
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    old_mask = os.umask(0o177)
+    try:
+        server.bind(socket_path)
+    finally:
+        os.umask(old_mask)
+    server.listen(64)
+    server.settimeout(1.0)
+    print("%inf:csv_daemon:ready:pid={}:{}".format(os.getpid(), socket_path), file=sys.stderr)
+    if ready_fd is not None:
+        os.write(ready_fd, b"1")
+        os.close(ready_fd)
+
+    status = {"pid": os.getpid(), "socket": socket_path, "started": time.time(), "served": 0}
+    children = set()
+    last_request = time.time()
+    try:
+        while True:
+            try:
+                conn, _ = server.accept()
+            except socket.timeout:
+                reap_children(children)
+                if idle_timeout > 0 and len(children) == 0 and time.time() - last_request > idle_timeout:
+                    print("%inf:csv_daemon:stopped by idle timeout", file=sys.stderr)
+                    break
+                continue
+            conn.settimeout(None)
+            last_request = time.time()
+            if not handle_connection(conn, status, children):
+                print("%inf:csv_daemon:stopped by request", file=sys.stderr)
+                break
+            reap_children(children)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        print("%inf:csv_daemon:served {} requests".format(status["served"]), file=sys.stderr)
+
+
+def detach(log_file):
+    """detach the worker from terminal
+
+    :param log_file: path of log file of the worker
+    :returns: file descriptor to notify that the worker is ready, in the worker. in parent process, this function does not return.
+    :rtype: int
+
+    """
+    r_fd, w_fd = os.pipe()
+    pid = os.fork()
+    if pid > 0:
+        os.close(w_fd)
+        ready = os.read(r_fd, 1)
+        if len(ready) == 0:
+            print("??error:csv_daemon:worker failed to start, see {}".format(log_file), file=sys.stderr)
+            sys.exit(1)
+        sys.exit(0)
+    os.close(r_fd)
+    os.setsid()
+    null_fd = os.open(os.devnull, os.O_RDONLY)
+    os.dup2(null_fd, 0)
+    log_fd = os.open(log_file, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600)
+    os.dup2(log_fd, 1)
+    os.dup2(log_fd, 2)
+    os.close(null_fd)
+    os.close(log_fd)
+    return w_fd
+
+
+def init():
+    arg_parser = argparse.ArgumentParser(description="resident worker to run python scripts of csv_tools without startup cost",
+                                         formatter_class=argparse.RawDescriptionHelpFormatter,
+                                         epilog=textwrap.dedent('''
+remark:
+  The worker imports libraries in advance and listens on unix socket.
+  csv_daemon_client.py sends command line, working directory, environment variables and stdin/stdout/stderr
+  to the worker, and the worker runs the script in forked process with them.
+  So each request runs in its own process: definitions by '--prologe' or changes of global state
+  in one request are not visible to other requests.
+
+  Only python scripts in csv_utility and csv_plot can be run.
+  Path of socket is given by '--socket' or environment variable 'CSV_TOOLS_DAEMON_SOCKET',
+  default is '/tmp/csv_tools_daemon_<uid>.sock'. The socket is accessible only by the owner.
+
+  Without '--detach', the worker runs in foreground until SIGINT or '--stop'.
+
+example:
+  csv_daemon.py --detach
+  csv_daemon.py --detach --preload=numpy,pandas,plotly.express --idle_timeout=3600
+  csv_daemon_client.py csv_uty.py --stack=Sample test.csv
+  csv_daemon.py --status
+  csv_daemon.py --stop
+
+'''))
+    arg_parser.add_argument('-v', '--version', action='version', version='%(prog)s {}'.format(VERSION))
+
+    arg_parser.add_argument("--socket", dest="SOCKET", help="path of unix socket", type=str, metavar="FILE", default=None)
+    arg_parser.add_argument("--preload",
+                            dest="PRELOAD",
+                            help="modules to import in advance, default={}".format(DEFAULT_PRELOAD),
+                            type=str,
+                            metavar="MODULE[,MODULE...]",
+                            default=DEFAULT_PRELOAD)
+    arg_parser.add_argument("--idle_timeout",
+                            dest="IDLE_TIMEOUT",
+                            help="stop after this seconds without requests, default=0(no timeout)",
+                            type=float,
+                            metavar="SECONDS",
+                            default=0)
+    arg_parser.add_argument("--detach", dest="DETACH", help="run the worker in background", action="store_true", default=False)
+    arg_parser.add_argument("--log",
+                            dest="LOG",
+                            help="log file of the worker with '--detach', default=<socket>.log",
+                            type=str,
+                            metavar="FILE",
+                            default=None)
+    arg_parser.add_argument("--status", dest="STATUS", help="print status of the worker", action="store_true", default=False)
+    arg_parser.add_argument("--stop", dest="STOP", help="stop the worker", action="store_true", default=False)
+
+    args = arg_parser.parse_args()
+    return args
+
+
+if __name__ == "__main__":
+    args = init()
+    socket_path = args.SOCKET if args.SOCKET is not None else default_socket_path()
+    preload = [v.strip() for v in args.PRELOAD.split(",") if len(v.strip()) > 0]
+    idle_timeout = args.IDLE_TIMEOUT
+    detach_mode = args.DETACH
+    log_file = args.LOG if args.LOG is not None else socket_path + ".log"
+
+    if args.STATUS or args.STOP:
+        reply = query_worker(socket_path, "stop" if args.STOP else "status")
+        if reply is None:
+            print("??error:csv_daemon:worker is not running:{}".format(socket_path), file=sys.stderr)
+            sys.exit(1)
+        if args.STOP:
+            print("%inf:csv_daemon:worker was stopped:{}".format(socket_path), file=sys.stderr)
+        else:
+            print(json.dumps(reply, indent=1))
+        sys.exit(0)
+
+    sock = connect_worker(socket_path, timeout=10)
+    if sock is not None:
+        sock.close()
+        print("??error:csv_daemon:worker is already running:{}".format(socket_path), file=sys.stderr)
+        sys.exit(1)
+
+    ready_fd = detach(log_file) if detach_mode else None
+    serve(socket_path, preload, idle_timeout, ready_fd=ready_fd)
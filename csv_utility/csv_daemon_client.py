@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ----------------------------------------------------------------------
+# Name:         csv_daemon_client.py
+# Description:
+#    thin client of csv_daemon.py: run python script of csv_tools by the resident worker.
+#    If the worker is not running, the script is run directly.
+#
+# Author:       m.akei
+# Copyright:    (c) 2021 by m.na.akei
+# Time-stamp:   <2021-05-16 10:05:13>
+# Licence:
+#  Copyright (c) 2021 Masaharu N. Akei
+#
+#  This software is released under the MIT License.
+#    http://opensource.org/licenses/mit-license.php
+# ----------------------------------------------------------------------
+# only modules of standard library, that are imported quickly, are used in this script.
+import sys
+
+import os
+import json
+import signal
+import socket
+import struct
+
+SOCKET_ENV = "CSV_TOOLS_DAEMON_SOCKET"
+SCRIPT_DIRS = [os.path.dirname(os.path.realpath(__file__)), os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), "csv_plot")]
+
+USAGE = """usage: csv_daemon_client.py SCRIPT [ARGS...]
+
+run python script of csv_tools by the resident worker, see 'csv_daemon.py --help'.
+If the worker is not running, the script is run directly.
+
+example:
+  csv_daemon_client.py csv_uty.py --stack=Sample test.csv
+  csv_daemon_client.py csv_status.py - < big_sample_arb.csv
+"""
+
+
+def default_socket_path():
+    s_path = os.environ.get(SOCKET_ENV)
+    if s_path is None or len(s_path) == 0:
+        s_path = "/tmp/csv_tools_daemon_{}.sock".format(os.getuid())
+    return s_path
+
+
+def run_directly(script, argv):
+    """run script without the worker, this function does not return.
+
+    :param script: name of script
+    :param argv: arguments of script
+
+    """
+    name = os.path.basename(script)
+    if not name.endswith(".py"):
+        name += ".py"
+    for sd in SCRIPT_DIRS:
+        sc = os.path.join(sd, name)
+        if os.path.isfile(sc):
+            os.execv(sys.executable, [sys.executable, sc] + argv)
+    print("??error:csv_daemon_client:script was not found:{}".format(script), file=sys.stderr)
+    sys.exit(1)
+
+
+def std_fds():
+    """file descriptors of stdin, stdout and stderr, closed one is replaced with /dev/null
+
+    :returns: list of file descriptors
+    :rtype: list[int]
+
+    """
+    fds = []
+    for i_fd in range(3):
+        try:
+            os.fstat(i_fd)
+            fds.append(i_fd)
+        except OSError:
+            fds.append(os.open(os.devnull, os.O_RDWR))
+    return fds
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] in ["-h", "--help"]:
+        print(USAGE, file=sys.stderr)
+        sys.exit(0 if len(sys.argv) >= 2 else 1)
+    script = sys.argv[1]
+    argv = sys.argv[2:]
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(default_socket_path())
+    except OSError:
+        sock.close()
+        run_directly(script, argv)
+
+    request = {"command": "run", "script": script, "argv": argv, "cwd": os.getcwd(), "env": dict(os.environ)}
+    data = json.dumps(request).encode()
+    data = struct.pack("!I", len(data)) + data
+    try:
+        n_sent = socket.send_fds(sock, [data], std_fds())
+        if n_sent < len(data):
+            sock.sendall(data[n_sent:])
+    except OSError:
+        sock.close()
+        run_directly(script, argv)
+
+    # messages from the worker: {"pid": ...} and {"exit_code": ...}
+    buf = b""
+    pid = None
+    exit_code = None
+    while exit_code is None:
+        try:
+            data = sock.recv(65536)
+        except KeyboardInterrupt:
+            if pid is not None:
+                os.kill(pid, signal.SIGINT)
+            continue
+        if len(data) == 0:
+            break
+        buf += data
+        while len(buf) >= 4:
+            size = struct.unpack("!I", buf[:4])[0]
+            if len(buf) < size + 4:
+                break
+            message = json.loads(buf[4:size + 4].decode())
+            buf = buf[size + 4:]
+            if "error" in message:
+                print("??error:csv_daemon_client:{}".format(message["error"]), file=sys.stderr)
+                exit_code = 1
+            pid = message.get("pid", pid)
+            exit_code = message.get("exit_code", exit_code)
+    sock.close()
+    if exit_code is None:
+        print("??error:csv_daemon_client:connection to the worker was lost", file=sys.stderr)
+        exit_code = 1
+    sys.exit(exit_code)
@@ -20,9 +20,7 @@ import re
 
 import json
 import datetime as dt
-import numpy as np
 import csv
-import pandas as pd
 
 VERSION = 1.0
 
@@ -83,6 +81,11 @@ ABC000,ABC001,ABC002,ABC003,ABC004,ABC005,ABC006,ABC007,ABC008,ABC009,ABC010
 
     arg_parser.add_argument('-v', '--version', action='version', version='%(prog)s {}'.format(VERSION))
     arg_parser.add_argument("--output", dest="OUTPUT", type=str, help="output file", metavar="FILE", default=None)
+    arg_parser.add_argument("--output_format",
+                            dest="OFORMAT",
+                            help="format of output, 'arrow_stream' is Arrow IPC stream for other csv_tools, default=csv",
+                            choices=["csv", "arrow_stream"],
+                            default="csv")
     arg_parser.add_argument("--quote", dest="QUOTE", help="quoteing value of each cell", action="store_true", default=False)
     arg_parser.add_argument("--mode",
                             dest="MODE",
@@ -256,10 +259,15 @@ def trim_datetime(df, col_names, header_definitions):
 
 if __name__ == "__main__":
     args = init()
+    import numpy as np
+    import pandas as pd
+    from csv_arrow import write_dataframe
+
     nrows = args.number_of_rows
     ncols = args.number_of_columns
     quote = args.QUOTE
     output = args.OUTPUT
+    output_format = args.OFORMAT
     mode = args.MODE
     hfile = args.HEADERS
 
@@ -330,5 +338,5 @@ if __name__ == "__main__":
     csv_df = pd.DataFrame(rows_data, columns=columns)
     if len(TS) > 1:
         csv_df = trim_datetime(csv_df, columns, TS)
-    csv_df.to_csv(output, index=False, quoting=csv.QUOTE_NONE)
+    write_dataframe(csv_df, output, output_format, index=False, quoting=csv.QUOTE_NONE)
     print("", file=sys.stderr)
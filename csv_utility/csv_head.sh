@@ -53,6 +53,7 @@ options:
   -t                 : tail mode
 remark:
   as assumption, there is only one header row in csv file.
+  number of rows and rows for tail mode are given by row-offset index, see csv_index.py.
 
 EOF
     exit 1
@@ -84,6 +85,7 @@ if [ "${INPUT}" = "-" ]; then
     TMPFILE="${TMPDIR}/${SNAME}_input.tmp"
     cat > ${TMPFILE}
     INPUT=${TMPFILE}
+    INDEX_OPT="--no_store"
 elif [ ! -e "${INPUT}" ]; then
     echo "??Error: file not found: ${INPUT}" 1>&2
     exit 1
@@ -105,7 +107,7 @@ fi
 
 #NR=$(cat ${INPUT}| wc -l)
 #NR=$((NR-1))
-NR=$(csvstat --count ${INPUT} | awk '{print $3}')
+NR=$(${DDIR}/csv_index.py ${INDEX_OPT} --count "${INPUT}")
 if (( NR < ROWS )); then
     ROWS=${NR}
 fi
@@ -119,7 +121,7 @@ EOF
 ROWS=$((${ROWS}+1))
 if [ "${MODE}" = "tail" ]; then
     head -1 ${INPUT} | csvcut -c ${COLUMNS}
-    tail --lines=${ROWS} ${INPUT} | csvcut -c ${COLUMNS}
+    ${DDIR}/csv_index.py ${INDEX_OPT} --rows=$((NR-ROWS+1)) "${INPUT}" | csvcut -c ${COLUMNS}
 else
     head -${ROWS} ${INPUT} | csvcut -c "${COLUMNS}"
 fi
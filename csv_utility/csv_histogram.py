@@ -21,9 +21,7 @@ import re
 from pathlib import Path
 import math
 
-import numpy as np
-import pandas as pd
-from scipy.stats import moment
+sys.path.insert(0, format(Path(__file__).parent))
 
 VERSION = 1.0
 
@@ -39,6 +37,9 @@ remark:
   about '--nbin_mode', see Histogram - Wikipedia https://en.wikipedia.org/wiki/Histogram .
   NOTE 's_and_s' means Shimazaki and Shinomoto's choice.
 
+  When environment variable 'CSV_TOOLS_CACHE_DIR' is defined, parsed data is stored into the cache and is used by later reading,
+  see 'csv_cache.py --help'. '--no_cache' disables the cache, '--refresh_cache' makes the cache again.
+
 example:
   csv_histogram.py --nbins=100 --output=- big_sample_arb.csv  COL_0008|less
   csv_histogram.py --nbins=100 --output=- --range=0.5,1.0 big_sample_arb.csv  COL_0008 COL_0033|less
@@ -59,7 +60,18 @@ example:
 
     arg_parser.add_argument("--facets", dest="FACETS", help="facets", type=str, metavar="COLUMN[,COLUMN...]")
 
+    arg_parser.add_argument("--no_cache", dest="NO_CACHE", help="not use cache of parsed data", action="store_true", default=False)
+    arg_parser.add_argument("--refresh_cache",
+                            dest="REFRESH_CACHE",
+                            help="make cache of parsed data again",
+                            action="store_true",
+                            default=False)
     arg_parser.add_argument("--output", dest="OUTPUT", help="path of output file", type=str, metavar="FILE")
+    arg_parser.add_argument("--output_format",
+                            dest="OFORMAT",
+                            help="format of output, 'arrow_stream' is Arrow IPC stream for other csv_tools, default=csv",
+                            choices=["csv", "arrow_stream"],
+                            default="csv")
 
     arg_parser.add_argument('csv_file', metavar='CSV_FILE', help='files to read, if empty, stdin is used')
     arg_parser.add_argument('column', metavar='COLUMN', help='name of column to make histogram')
@@ -177,11 +189,20 @@ def evaluate_number_of_bin_Freedman_Diaconis(ds):
 
 if __name__ == "__main__":
     args = init()
+    import numpy as np
+    import pandas as pd
+    from scipy.stats import moment
+    from csv_cache import read_csv_cached
+    from csv_arrow import write_dataframe
+
     csv_file = args.csv_file
     output_file = args.OUTPUT
+    output_format = args.OFORMAT
     column_name = args.column
     weight_column = args.weight_column
     facets_columns_s = args.FACETS
+    no_cache = args.NO_CACHE
+    refresh_cache = args.REFRESH_CACHE
 
     nbins = args.NBINS
     nbin_mode = args.NBIN_MODE
@@ -206,7 +227,10 @@ if __name__ == "__main__":
     if csv_file == "-":
         csv_file = sys.stdin
 
-    csv_df = pd.read_csv(csv_file)
+    cache_columns = [column_name] + facets_columns
+    if weight_column is not None:
+        cache_columns.append(weight_column)
+    csv_df = read_csv_cached(csv_file, columns=cache_columns, no_cache=no_cache, refresh=refresh_cache)
 
     if csv_df[column_name].dtype == object:
         print("-- un-numerical mode:", file=sys.stderr)
@@ -216,7 +240,7 @@ if __name__ == "__main__":
         h_df = pd.DataFrame(h_ds)
         if len(facets_columns) > 0:
             h_df = categs_hist_facets(h_df, csv_df, column_name, facets_columns)
-        h_df.to_csv(output_file)
+        write_dataframe(h_df, output_file, output_format)
     else:
         if weight_column is not None:
             df = csv_df[[column_name, weight_column]]
@@ -237,7 +261,7 @@ if __name__ == "__main__":
         if len(facets_columns) > 0:
             df_i = csv_df.loc[df.index]
             h_df = number_hist_facets(h_df, df_i, column_name, facets_columns, bins, weight_column)
-        h_df.to_csv(output_file, index=False)
+        write_dataframe(h_df, output_file, output_format, index=False)
         print("-- statistical status for numerical datas", file=sys.stderr)
         print(csv_df[column_name].describe(), file=sys.stderr)
 
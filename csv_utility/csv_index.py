@@ -0,0 +1,665 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ----------------------------------------------------------------------
+# Name:         csv_index.py
+# Description:
+#    row-offset index of csv file for csv_tools.
+#    Byte offsets of every N-th record, number of rows and fingerprint of header are stored
+#    into sidecar file('<csv file>.csvidx'). When csv file only grew, the index is updated incrementally.
+#    Time index of a column, datetime of records at the offsets, is stored into sidecar file('<csv file>.csvtidx').
+#
+# Author:       m.akei
+# Copyright:    (c) 2021 by m.na.akei
+# Time-stamp:   <2021-05-20 19:34:51>
+# Licence:
+#  Copyright (c) 2021 Masaharu N. Akei
+#
+#  This software is released under the MIT License.
+#    http://opensource.org/licenses/mit-license.php
+# ----------------------------------------------------------------------
+import argparse
+import textwrap
+import sys
+
+import os
+import re
+import json
+import hashlib
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+VERSION = 1.0
+
+INDEX_VERSION = 1
+INDEX_SUFFIX = ".csvidx"
+INDEX_DEFAULT_STEP = 1000
+SCAN_BLOCK_SIZE = 16 * 1024 * 1024
+# size of bytes before end of scanned records, to check that csv file only grew.
+TAIL_CHECK_SIZE = 4096
+COMPRESSED_SUFFIXES = [".gz", ".bz2", ".zip", ".xz", ".zst", ".tar"]
+
+TIME_INDEX_VERSION = 1
+TIME_INDEX_SUFFIX = ".csvtidx"
+# number of steps of index in a chunk of rows to parse datetime for time index.
+TIME_SCAN_STEPS = 100
+
+
+def index_path(csv_file):
+    """path of sidecar file of index
+
+    :param csv_file: path of csv file
+    :returns: path of sidecar file
+    :rtype: Path
+
+    """
+    return Path(str(csv_file) + INDEX_SUFFIX)
+
+
+def available_index(csv_file):
+    """check that index is available for csv file
+
+    :param csv_file: path of csv file or file object
+    :returns: True if index is available
+    :rtype: bool
+
+    """
+    if not isinstance(csv_file, (str, Path)) or str(csv_file) == "-":
+        return False
+    return os.path.isfile(csv_file) and Path(csv_file).suffix.lower() not in COMPRESSED_SUFFIXES
+
+
+def bytes_digest(csv_file, start, end):
+    """fingerprint of byte range of file
+
+    :param csv_file: path of csv file
+    :param start: start of range in bytes
+    :param end: end of range in bytes
+    :returns: sha1 of bytes
+    :rtype: str
+
+    """
+    with open(csv_file, "rb") as f:
+        f.seek(start)
+        return hashlib.sha1(f.read(end - start)).hexdigest()
+
+
+def scan_records(csv_file, index):
+    """scan records from end of scanned records in index to end of file, and update index
+
+    A newline after even number of quotes is end of record, blank lines are not counted as pandas.read_csv.
+    The first record is header.
+
+    :param csv_file: path of csv file
+    :param index: index to update
+    :returns: index
+    :rtype: dict
+
+    """
+    step = index["step"]
+    q_code = ord('"')
+    nl_code = ord("\n")
+    cr_code = ord("\r")
+    pos = index["scanned_to"]
+    rec_start = pos
+    n_records = index["n_records"]
+    header_end = index["header_end"]
+    offsets = index["offsets"]
+    parity = 0
+    prev_last = -1
+    with open(csv_file, "rb") as f:
+        f.seek(pos)
+        while True:
+            buf = np.frombuffer(f.read(SCAN_BLOCK_SIZE), dtype=np.uint8)
+            if len(buf) == 0:
+                break
+            q_pos = np.flatnonzero(buf == q_code)
+            nl_pos = np.flatnonzero(buf == nl_code)
+            ends = nl_pos[(np.searchsorted(q_pos, nl_pos) + parity) % 2 == 0]
+            if len(ends) > 0:
+                starts = np.concatenate([[rec_start - pos], ends[:-1] + 1])
+                last_bytes = np.where(ends > 0, buf[np.maximum(ends - 1, 0)], prev_last)
+                blank = (ends == starts) | ((ends - starts == 1) & (last_bytes == cr_code))
+                rec_starts = starts[~blank] + pos
+                if header_end is None and len(rec_starts) > 0:
+                    header_end = int(ends[~blank][0] + pos + 1)
+                rows = n_records - 1 + np.arange(len(rec_starts))
+                offsets.extend(rec_starts[(rows >= 0) & (rows % step == 0)].tolist())
+                n_records += len(rec_starts)
+                rec_start = int(ends[-1] + pos + 1)
+            parity = (parity + len(q_pos)) % 2
+            prev_last = buf[-1]
+            pos += len(buf)
+
+        f.seek(rec_start)
+        trailing = f.read(2)
+    has_trailing = n_records > 0 and trailing not in [b"", b"\r"]
+
+    st = os.stat(csv_file)
+    index.update({
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "scanned_to": rec_start,
+        "n_records": n_records,
+        "n_rows": max(n_records - 1, 0) + (1 if has_trailing else 0),
+        "header_end": header_end,
+        "offsets": offsets
+    })
+    if header_end is not None:
+        index["header_sha1"] = bytes_digest(csv_file, 0, header_end)
+        index["tail_sha1"] = bytes_digest(csv_file, max(rec_start - TAIL_CHECK_SIZE, 0), rec_start)
+    return index
+
+
+def new_index(step):
+    """empty index
+
+    :param step: interval of records to store offsets
+    :returns: index
+    :rtype: dict
+
+    """
+    return {"version": INDEX_VERSION, "step": step, "scanned_to": 0, "n_records": 0, "header_end": None, "offsets": []}
+
+
+def read_index_file(csv_file):
+    """read sidecar file of index without validation for current csv file
+
+    :param csv_file: path of csv file
+    :returns: index or None if sidecar file does not exist or is broken.
+    :rtype: dict
+
+    """
+    ix_path = index_path(csv_file)
+    if not ix_path.exists():
+        return None
+    try:
+        with open(ix_path) as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if index.get("version") != INDEX_VERSION:
+        return None
+    return index
+
+
+def load_index(csv_file):
+    """load index from sidecar file, if it is up to date
+
+    :param csv_file: path of csv file
+    :returns: index or None
+    :rtype: dict
+
+    """
+    if not available_index(csv_file):
+        return None
+    index = read_index_file(csv_file)
+    st = os.stat(csv_file)
+    if index is None or index.get("size") != st.st_size or index.get("mtime_ns") != st.st_mtime_ns:
+        return None
+    return index
+
+
+def save_index(csv_file, index):
+    """save index into sidecar file
+
+    :param csv_file: path of csv file
+    :param index: index
+
+    """
+    try:
+        with open(index_path(csv_file), "w") as f:
+            json.dump(index, f)
+    except OSError as e:
+        print("#warn:csv_index:index was not stored:{}".format(e), file=sys.stderr)
+
+
+def only_grew(csv_file, index):
+    """check that csv file only grew after index was made
+
+    :param csv_file: path of csv file
+    :param index: index in sidecar file
+    :returns: True if header and end of scanned records are not changed.
+    :rtype: bool
+
+    """
+    if index.get("header_end") is None or os.path.getsize(csv_file) <= index["size"]:
+        return False
+    scanned_to = index["scanned_to"]
+    return bytes_digest(csv_file, 0, index["header_end"]) == index["header_sha1"] and bytes_digest(
+        csv_file, max(scanned_to - TAIL_CHECK_SIZE, 0), scanned_to) == index["tail_sha1"]
+
+
+def get_index(csv_file, step=None, refresh=False, store=True):
+    """get index of csv file, from sidecar file, by incremental update or by scanning all records
+
+    :param csv_file: path of csv file
+    :param step: interval of records to store offsets, default=stored one or 1000
+    :param refresh: if True, index is made again.
+    :param store: if False, sidecar file is not written.
+    :returns: index
+    :rtype: dict
+
+    """
+    index = None if refresh else read_index_file(csv_file)
+    if index is not None and step is not None and index["step"] != step:
+        index = None
+    if index is not None:
+        st = os.stat(csv_file)
+        if index.get("size") == st.st_size and index.get("mtime_ns") == st.st_mtime_ns:
+            return index
+        if only_grew(csv_file, index):
+            n_rows = index["n_rows"]
+            index = scan_records(csv_file, index)
+            print("%inf:csv_index:index was updated incrementally: {} rows were added".format(index["n_rows"] - n_rows), file=sys.stderr)
+        else:
+            index = None
+    if index is None:
+        index = scan_records(csv_file, new_index(INDEX_DEFAULT_STEP if step is None else step))
+        print("%inf:csv_index:index was made: {} rows".format(index["n_rows"]), file=sys.stderr)
+    if store:
+        save_index(csv_file, index)
+    return index
+
+
+def row_offset(index, row):
+    """nearest stored offset before the row
+
+    :param index: index
+    :param row: index of data row, 0-based
+    :returns: byte offset and number of records to skip from the offset
+    :rtype: tuple
+
+    """
+    offsets = index["offsets"]
+    i_off = min(row // index["step"], len(offsets) - 1)
+    if i_off < 0:
+        return index["header_end"], row
+    return offsets[i_off], row - i_off * index["step"]
+
+
+def iter_raw_records(f):
+    """iterate records of csv as bytes, blank lines are skipped.
+
+    :param f: binary file object
+    :returns: iterator of records
+    :rtype: iterator
+
+    """
+    record = b""
+    parity = 0
+    for line in f:
+        record += line
+        parity = (parity + line.count(b'"')) % 2
+        if parity == 0:
+            if record not in [b"\n", b"\r\n"]:
+                yield record
+            record = b""
+    if record not in [b"", b"\r"]:
+        yield record
+
+
+def write_rows(csv_file, start, end, output, index=None):
+    """write records of data rows as they are
+
+    :param csv_file: path of csv file
+    :param start: index of the first data row, 0-based
+    :param end: index of the end of data rows, exclusive
+    :param output: binary file object
+    :param index: index, if None, it is given by get_index.
+
+    """
+    if index is None:
+        index = get_index(csv_file)
+    end = min(end, index["n_rows"])
+    if start >= end:
+        return
+    offset, n_skip = row_offset(index, start)
+    with open(csv_file, "rb") as f:
+        f.seek(offset)
+        for i_r, record in enumerate(iter_raw_records(f)):
+            if i_r >= n_skip + end - start:
+                break
+            if i_r >= n_skip:
+                output.write(record)
+    output.flush()
+
+
+def read_csv_rows(csv_file, start, n_rows, index=None, **kwargs):
+    """read data rows of csv file by seeking with index
+
+    :param csv_file: path of csv file
+    :param start: index of the first data row, 0-based
+    :param n_rows: number of rows to read
+    :param index: index, if None, it is given by get_index.
+    :param kwargs: other arguments for pandas.read_csv
+    :returns: pandas.DataFrame, that has index of rows in csv file.
+    :rtype: pandas.DataFrame
+
+    """
+    if index is None:
+        index = get_index(csv_file)
+    header_kwargs = {k: v for k, v in kwargs.items() if k in ["encoding", "sep", "quotechar"]}
+    names = list(pd.read_csv(csv_file, nrows=0, **header_kwargs).columns)
+    n_rows = max(min(n_rows, index["n_rows"] - start), 0)
+    if n_rows == 0:
+        df = pd.read_csv(csv_file, nrows=0, **kwargs)
+    else:
+        offset, n_skip = row_offset(index, start)
+        with open(csv_file, "rb") as f:
+            f.seek(offset)
+            df = pd.read_csv(f, header=None, names=names, nrows=n_skip + n_rows, **kwargs)
+        df = df.iloc[n_skip:]
+    df.index = pd.RangeIndex(start, start + len(df))
+    return df
+
+
+def time_index_path(csv_file):
+    """path of sidecar file of time index
+
+    :param csv_file: path of csv file
+    :returns: path of sidecar file
+    :rtype: Path
+
+    """
+    return Path(str(csv_file) + TIME_INDEX_SUFFIX)
+
+
+def read_time_index_file(csv_file):
+    """read sidecar file of time index without validation for current csv file
+
+    :param csv_file: path of csv file
+    :returns: time index or None if sidecar file does not exist or is broken.
+    :rtype: dict
+
+    """
+    tix_path = time_index_path(csv_file)
+    if not tix_path.exists():
+        return None
+    try:
+        with open(tix_path) as f:
+            t_index = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if t_index.get("version") != TIME_INDEX_VERSION:
+        return None
+    return t_index
+
+
+def save_time_index(csv_file, t_index):
+    """save time index into sidecar file
+
+    :param csv_file: path of csv file
+    :param t_index: time index
+
+    """
+    try:
+        with open(time_index_path(csv_file), "w") as f:
+            json.dump(t_index, f)
+    except OSError as e:
+        print("#warn:csv_index:time index was not stored:{}".format(e), file=sys.stderr)
+
+
+def new_time_entry(column, t_format):
+    """empty entry of time index for a column
+
+    :param column: name of column of datetime
+    :param t_format: format of datetime, if None, format is inferred.
+    :returns: entry of time index
+    :rtype: dict
+
+    """
+    return {"column": column, "format": t_format, "n_rows": 0, "times": [], "sorted": True, "tz": None, "min": None, "max": None, "n_na": 0}
+
+
+def scan_times(csv_file, index, entry):
+    """parse datetime of a column from the end of scanned rows in entry to the end of rows in index, and update entry
+
+    Only the column is read, by chunks of rows.
+
+    :param csv_file: path of csv file
+    :param index: row-offset index, that is up to date.
+    :param entry: entry of time index to update
+    :returns: entry or None if values of the column are not datetime.
+    :rtype: dict
+
+    """
+    step = index["step"]
+    chunk_rows = step * TIME_SCAN_STEPS
+    for start in range(entry["n_rows"], index["n_rows"], chunk_rows):
+        df = read_csv_rows(csv_file, start, chunk_rows, index=index, usecols=[entry["column"]], dtype=str)
+        try:
+            ts = pd.to_datetime(df[entry["column"]], format=entry["format"], cache=True)
+        except (ValueError, TypeError) as e:
+            print("#warn:csv_index:time index:invalid datetime:{}".format(e), file=sys.stderr)
+            return None
+        if not pd.api.types.is_datetime64_any_dtype(ts):
+            print("#warn:csv_index:time index:column has mixed time zones:{}".format(entry["column"]), file=sys.stderr)
+            return None
+        tz = None if ts.dt.tz is None else str(ts.dt.tz)
+        if entry["n_rows"] > 0 and tz != entry["tz"]:
+            print("#warn:csv_index:time index:time zone was changed:{}->{}".format(entry["tz"], tz), file=sys.stderr)
+            return None
+        entry["tz"] = tz
+        # nanoseconds of wall time for naive datetime, of UTC for datetime with time zone.
+        values = ts.to_numpy(dtype="datetime64[ns]").astype("int64")
+        is_na = ts.isna().to_numpy()
+        valid = values[~is_na]
+        entry["n_na"] += int(is_na.sum())
+        if entry["sorted"]:
+            entry["sorted"] = not is_na.any() and bool(np.all(valid[1:] >= valid[:-1]))
+            if entry["sorted"] and len(valid) > 0 and entry["max"] is not None:
+                entry["sorted"] = bool(valid[0] >= entry["max"])
+        if len(valid) > 0:
+            v_min = int(valid.min())
+            v_max = int(valid.max())
+            entry["min"] = v_min if entry["min"] is None else min(entry["min"], v_min)
+            entry["max"] = v_max if entry["max"] is None else max(entry["max"], v_max)
+        at_offsets = (df.index.to_numpy() % step) == 0
+        entry["times"].extend([None if na else int(v) for v, na in zip(values[at_offsets], is_na[at_offsets])])
+        entry["n_rows"] = start + len(df)
+    return entry
+
+
+def load_time_index(csv_file, column, t_format=None):
+    """load entry of time index for a column from sidecar file, if it is up to date
+
+    :param csv_file: path of csv file
+    :param column: name of column of datetime
+    :param t_format: format of datetime
+    :returns: entry of time index or None
+    :rtype: dict
+
+    """
+    if not available_index(csv_file):
+        return None
+    t_index = read_time_index_file(csv_file)
+    if t_index is None:
+        return None
+    entry = t_index["entries"].get("{}:{}".format(column, "" if t_format is None else t_format))
+    st = os.stat(csv_file)
+    if entry is None or entry.get("size") != st.st_size or entry.get("mtime_ns") != st.st_mtime_ns:
+        return None
+    return entry
+
+
+def get_time_index(csv_file, column, t_format=None, index=None, refresh=False, store=True):
+    """get entry of time index for a column of csv file, from sidecar file, by incremental update or by parsing the column
+
+    Datetime of records at offsets in row-offset index, min and max of datetime and whether datetime is sorted are stored
+    into sidecar file('<csv file>.csvtidx'), for each column and format.
+
+    :param csv_file: path of csv file
+    :param column: name of column of datetime
+    :param t_format: format of datetime, if None, format is inferred.
+    :param index: row-offset index, if None, it is given by get_index.
+    :param refresh: if True, entry is made again.
+    :param store: if False, sidecar file is not written.
+    :returns: entry of time index or None if values of the column are not datetime.
+    :rtype: dict
+
+    """
+    if index is None:
+        index = get_index(csv_file, store=store)
+    t_index = read_time_index_file(csv_file) or {"version": TIME_INDEX_VERSION, "entries": {}}
+    key = "{}:{}".format(column, "" if t_format is None else t_format)
+    entry = None if refresh else t_index["entries"].get(key)
+    if entry is not None:
+        if entry.get("step") != index["step"]:
+            entry = None
+        elif entry.get("size") == index["size"] and entry.get("mtime_ns") == index["mtime_ns"]:
+            return entry
+        elif not only_grew(csv_file, entry) or entry["n_rows"] != entry["n_records"] - 1:
+            # the last row without newline at the end of file may be changed.
+            entry = None
+    n_rows = 0
+    if entry is None:
+        entry = new_time_entry(column, t_format)
+    else:
+        n_rows = entry["n_rows"]
+    entry = scan_times(csv_file, index, entry)
+    if entry is None:
+        return None
+    entry.update({k: index[k] for k in ["step", "size", "mtime_ns", "scanned_to", "n_records", "header_end", "header_sha1", "tail_sha1"]})
+    if n_rows > 0:
+        print("%inf:csv_index:time index was updated incrementally:{}: {} rows were added".format(key, entry["n_rows"] - n_rows),
+              file=sys.stderr)
+    else:
+        print("%inf:csv_index:time index was made:{}: {} rows, sorted={}".format(key, entry["n_rows"], entry["sorted"]), file=sys.stderr)
+    t_index["entries"][key] = entry
+    if store:
+        save_time_index(csv_file, t_index)
+    return entry
+
+
+def time_value(entry, dt):
+    """value of datetime to compare with time index
+
+    :param entry: entry of time index
+    :param dt: datetime
+    :returns: nanoseconds or None if time zone of datetime does not match with the column.
+    :rtype: int
+
+    """
+    dt = pd.Timestamp(dt)
+    if (dt.tz is None) != (entry["tz"] is None):
+        return None
+    return dt.value
+
+
+def time_row_range(entry, t_start, t_end):
+    """range of rows that includes all rows in range of datetime, for sorted column
+
+    :param entry: entry of time index
+    :param t_start: start of range of datetime, inclusive
+    :param t_end: end of range of datetime, inclusive
+    :returns: (index of the first row, number of rows) or None if the column is not sorted.
+    :rtype: tuple
+
+    """
+    v_start = time_value(entry, t_start)
+    v_end = time_value(entry, t_end)
+    if not entry["sorted"] or v_start is None or v_end is None:
+        return None
+    step = entry["step"]
+    times = np.array(entry["times"], dtype="int64")
+    # rows before the row at (i_start * step) are earlier than t_start, rows from the row at (i_end * step) are later than t_end.
+    i_start = max(int(np.searchsorted(times, v_start, side="left")) - 1, 0)
+    i_end = int(np.searchsorted(times, v_end, side="right"))
+    start = i_start * step
+    end = min(i_end * step, entry["n_rows"])
+    return start, max(end - start, 0)
+
+
+def init():
+    arg_parser = argparse.ArgumentParser(description="make row-offset index of csv file, and count or print rows with it",
+                                         formatter_class=argparse.RawDescriptionHelpFormatter,
+                                         epilog=textwrap.dedent('''
+remark:
+  Byte offsets of every N-th record, number of rows and fingerprint of header are stored
+  into sidecar file('<csv file>.csvidx'). Newlines in quoted fields are not boundary of records.
+  When csv file only grew, the index is updated incrementally, otherwise it is made again.
+  csv_sample.py, csv_head.sh, csv_print.sh, csv_wc.sh and parallel reading of csv_tools use the index.
+
+  Without '--count' and '--rows', status of index is printed.
+  Index of rows for '--rows' is 0-based and does not include header, 'END' is exclusive.
+
+  With '--time_column', time index of the column is made and status of it is printed.
+  Datetime of records at the offsets, min and max of datetime and whether datetime is sorted are stored
+  into sidecar file('<csv file>.csvtidx'), for each column and format. ':' in format must be escaped by '\\'.
+  For sorted column, csv_trimtime.py reads only records in range of datetime with the time index, see '--time_index'.
+
+example:
+  csv_index.py big_sample_arb.csv
+  csv_index.py --count big_sample_arb.csv
+  csv_index.py --rows=100,110 big_sample_arb.csv
+  csv_index.py --time_column="date:%Y-%m-%d %H\\:%M\\:%S" big_sample_arb.csv
+
+'''))
+    arg_parser.add_argument('-v', '--version', action='version', version='%(prog)s {}'.format(VERSION))
+
+    arg_parser.add_argument("--count", dest="COUNT", help="print number of data rows", action="store_true", default=False)
+    arg_parser.add_argument("--rows", dest="ROWS", help="print records of data rows as they are", type=str, metavar="START[,END]", default=None)
+    arg_parser.add_argument("--step",
+                            dest="STEP",
+                            help="interval of records to store offsets, default={}".format(INDEX_DEFAULT_STEP),
+                            type=int,
+                            metavar="INT",
+                            default=None)
+    arg_parser.add_argument("--time_column",
+                            dest="TIME_COLUMN",
+                            help="make time index of column and print status of it",
+                            type=str,
+                            metavar="COLUMN[:time_format]",
+                            default=None)
+    arg_parser.add_argument("--refresh", dest="REFRESH", help="make index again", action="store_true", default=False)
+    arg_parser.add_argument("--no_store", dest="NO_STORE", help="sidecar file is not written", action="store_true", default=False)
+
+    arg_parser.add_argument('csv_file', metavar='CSV_FILE', help="file to read")
+
+    args = arg_parser.parse_args()
+    return args
+
+
+if __name__ == "__main__":
+    args = init()
+    csv_file = args.csv_file
+    count_mode = args.COUNT
+    rows_s = args.ROWS
+    step = args.STEP
+
+    if not available_index(csv_file):
+        print("??error:csv_index:index is not available for:{}".format(csv_file), file=sys.stderr)
+        sys.exit(1)
+    if step is not None and step < 1:
+        print("??error:csv_index:invalid step:{}".format(step), file=sys.stderr)
+        sys.exit(1)
+
+    index = get_index(csv_file, step=step, refresh=args.REFRESH, store=not args.NO_STORE)
+
+    if args.TIME_COLUMN is not None:
+        cvs = re.split(r"(?<!\\):", args.TIME_COLUMN, maxsplit=1)
+        t_format = re.sub(r"\\", "", cvs[1]) if len(cvs) > 1 else None
+        entry = get_time_index(csv_file, cvs[0], t_format, index=index, refresh=args.REFRESH, store=not args.NO_STORE)
+        if entry is None:
+            print("??error:csv_index:time index is not available for:{}".format(args.TIME_COLUMN), file=sys.stderr)
+            sys.exit(1)
+        t_min, t_max = [None if v is None else pd.Timestamp(v, tz=entry["tz"]) for v in [entry["min"], entry["max"]]]
+        print("file,column,format,rows,sorted,min,max,na,sidecar")
+        print("{},{},{},{},{},{},{},{},{}".format(csv_file, entry["column"], entry["format"], entry["n_rows"], entry["sorted"], t_min, t_max,
+                                                  entry["n_na"], time_index_path(csv_file)))
+    elif count_mode:
+        print(index["n_rows"])
+    elif rows_s is not None:
+        try:
+            cvs = [int(v) for v in rows_s.split(",")]
+        except ValueError:
+            print("??error:csv_index:invalid rows:{}".format(rows_s), file=sys.stderr)
+            sys.exit(1)
+        start = max(cvs[0], 0)
+        end = cvs[1] if len(cvs) > 1 else index["n_rows"]
+        write_rows(csv_file, start, end, sys.stdout.buffer, index=index)
+    else:
+        print("file,rows,step,offsets,size,sidecar")
+        print("{},{},{},{},{},{}".format(csv_file, index["n_rows"], index["step"], len(index["offsets"]), index["size"], index_path(csv_file)))
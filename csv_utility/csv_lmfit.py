@@ -27,6 +27,8 @@ import lmfit as lmf
 import lmfit.models as lmfm
 
 import pandas as pd
+sys.path.insert(0, format(Path(__file__).parent))
+from csv_schema import read_csv_with_schema
 
 VERSION = 1.0
 
@@ -346,7 +348,7 @@ if __name__ == "__main__":
         arg_parser.print_help(file=sys.stderr)
         sys.exit(0)
 
-    csv_df = pd.read_csv(csv_file)
+    csv_df = read_csv_with_schema(csv_file)
     if x_range_s is None:
         x_values = csv_df[x_column]
         y_values = csv_df[y_column]
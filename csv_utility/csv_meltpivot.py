@@ -17,18 +17,24 @@ import argparse
 import textwrap
 import sys
 
-from distutils.version import LooseVersion
-
 import re
-import numpy as np
-import pandas as pd
+from pathlib import Path
+sys.path.insert(0, format(Path(__file__).parent))
 
 VERSION = 1.0
 
 PANDAS_MIN_VERSION = "1.1.3"
-if LooseVersion(PANDAS_MIN_VERSION) > LooseVersion(pd.__version__):
-    print("??Error:csv_uty:padnas version must be newer than {}.".format(PANDAS_MIN_VERSION), file=sys.stderr)
-    sys.exit(1)
+
+
+def version_tuple(version):
+    """numbers in version string, to compare versions
+
+    :param version: version string, ex. '1.1.3'
+    :returns: tuple of numbers
+    :rtype: tuple
+
+    """
+    return tuple([int(v) for v in re.findall(r"\d+", version)[:3]])
 
 
 def init():
@@ -150,6 +156,11 @@ example:
                             default=False)
 
     arg_parser.add_argument("--output", dest="OUTPUT", help="path of output file", type=str, metavar='FILE', default=sys.stdout)
+    arg_parser.add_argument("--output_format",
+                            dest="OFORMAT",
+                            help="format of output, 'arrow_stream' is Arrow IPC stream for other csv_tools, default=csv",
+                            choices=["csv", "arrow_stream"],
+                            default="csv")
 
     arg_parser.add_argument('csv_file', metavar='CSV_FILE', help='files to read, if empty, stdin is used', default=None)
     arg_parser.add_argument('key_columns',
@@ -164,8 +175,17 @@ example:
 
 if __name__ == "__main__":
     args = init()
+    import numpy as np
+    import pandas as pd
+    from csv_schema import read_csv_with_schema
+    from csv_arrow import write_dataframe
+    if version_tuple(PANDAS_MIN_VERSION) > version_tuple(pd.__version__):
+        print("??Error:csv_uty:padnas version must be newer than {}.".format(PANDAS_MIN_VERSION), file=sys.stderr)
+        sys.exit(1)
+
     csv_file = args.csv_file
     output_file = args.OUTPUT
+    output_format = args.OFORMAT
 
     mode = args.MODE
     key_columns_s = args.key_columns
@@ -199,7 +219,7 @@ if __name__ == "__main__":
         if len(value_columns) == 0:
             print("%Inf:csv_meltpivot: pivoting without values", file=sys.stderr)
 
-    csv_df = pd.read_csv(in_file)
+    csv_df = read_csv_with_schema(in_file)
 
     params = {}
     if mode == "melt":
@@ -233,4 +253,4 @@ if __name__ == "__main__":
             output_df.columns = output_df.columns.get_level_values(cname)
             # output_df.columns = [v[1] for v in output_df.columns]
 
-    output_df.to_csv(output_file, index=csv_index)
+    write_dataframe(output_df, output_file, output_format, index=csv_index)
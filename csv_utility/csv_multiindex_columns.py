@@ -18,8 +18,6 @@ import textwrap
 import sys
 
 import re
-import numpy as np
-import pandas as pd
 
 VERSION = 1.0
 
@@ -72,6 +70,11 @@ csv_multiindex_columns.py --nrows=3 --to_single test_multiindex_columns.csv |csv
     arg_parser.add_argument("--nrows", dest="NROWS", help="number of rows as header,default=2", type=int, metavar='INT', default=2)
 
     arg_parser.add_argument("--output", dest="OUTPUT", help="path of output file, default=stdout", metavar="FILE", default=sys.stdout)
+    arg_parser.add_argument("--output_format",
+                            dest="OFORMAT",
+                            help="format of output, 'arrow_stream' is Arrow IPC stream for other csv_tools, default=csv",
+                            choices=["csv", "arrow_stream"],
+                            default="csv")
 
     arg_parser.add_argument("--to_single", dest="SINGLE", help="convert single header for columns", action="store_true", default=False)
     arg_parser.add_argument("--only_header", dest="ONLYHEADER", help="parse only header rows", action="store_true", default=False)
@@ -126,8 +129,13 @@ def multiindex_column_to_flat(df):
 
 if __name__ == "__main__":
     args = init()
+    import numpy as np
+    import pandas as pd
+    from csv_arrow import write_dataframe
+
     csv_file = args.csv_file
     output_file = args.OUTPUT
+    output_format = args.OFORMAT
 
     nrows_headers = args.NROWS
     to_single = args.SINGLE
@@ -147,4 +155,4 @@ if __name__ == "__main__":
     if to_single:
         csv_df = multiindex_column_to_flat(csv_df)
 
-    csv_df.to_csv(output_file, index=False)
+    write_dataframe(csv_df, output_file, output_format, index=False)
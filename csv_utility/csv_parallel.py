@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ----------------------------------------------------------------------
+# Name:         csv_parallel.py
+# Description:
+#    parallel reader of big csv file for csv_tools.
+#    csv file is split into byte ranges at record boundaries, that are found with parity of quotes,
+#    then ranges are parsed in process pool and results are concatenated in order.
+#
+# Author:       m.akei
+# Copyright:    (c) 2021 by m.na.akei
+# Time-stamp:   <2021-05-19 21:02:44>
+# Licence:
+#  Copyright (c) 2021 Masaharu N. Akei
+#
+#  This software is released under the MIT License.
+#    http://opensource.org/licenses/mit-license.php
+# ----------------------------------------------------------------------
+import argparse
+import textwrap
+import sys
+
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from csv_index import load_index
+
+VERSION = 1.0
+
+READ_WORKERS_ENV = "CSV_TOOLS_READ_WORKERS"
+READ_MIN_SIZE_ENV = "CSV_TOOLS_READ_MIN_SIZE"
+READ_DEFAULT_MIN_SIZE = 64
+RANGES_PER_WORKER = 2
+SCAN_BLOCK_SIZE = 16 * 1024 * 1024
+# options of pandas.read_csv, that are available with parallel reading.
+PARALLEL_KWARGS = ["dtype", "usecols", "encoding", "sep", "quotechar", "na_values", "keep_default_na"]
+COMPRESSED_SUFFIXES = [".gz", ".bz2", ".zip", ".xz", ".zst", ".tar"]
+
+
+def get_read_config():
+    """configuration of parallel reading from environment variables
+
+    :returns: number of processes and min size of file in bytes
+    :rtype: tuple
+
+    """
+    try:
+        n_workers = int(os.environ.get(READ_WORKERS_ENV, os.cpu_count() or 1))
+    except ValueError:
+        print("#warn:csv_parallel:invalid {}, parallel reading is disabled".format(READ_WORKERS_ENV), file=sys.stderr)
+        n_workers = 1
+    try:
+        min_size = int(os.environ.get(READ_MIN_SIZE_ENV, READ_DEFAULT_MIN_SIZE)) * 1024 * 1024
+    except ValueError:
+        print("#warn:csv_parallel:invalid {}, {}MB is used".format(READ_MIN_SIZE_ENV, READ_DEFAULT_MIN_SIZE), file=sys.stderr)
+        min_size = READ_DEFAULT_MIN_SIZE * 1024 * 1024
+    return n_workers, min_size
+
+
+def available_parallel(csv_file, kwargs, n_workers, min_size):
+    """check that csv file may be read in parallel
+
+    :param csv_file: path of csv file or file object
+    :param kwargs: options for pandas.read_csv
+    :param n_workers: number of processes
+    :param min_size: min size of file in bytes
+    :returns: True if parallel reading is available
+    :rtype: bool
+
+    """
+    if n_workers < 2 or not isinstance(csv_file, (str, Path)) or str(csv_file) == "-":
+        return False
+    if Path(csv_file).suffix.lower() in COMPRESSED_SUFFIXES or not os.path.isfile(csv_file):
+        return False
+    if any([k not in PARALLEL_KWARGS for k in kwargs]):
+        return False
+    encoding = str(kwargs.get("encoding", "utf-8")).lower().replace("_", "-")
+    if "16" in encoding or "32" in encoding:
+        return False
+    if len(kwargs.get("quotechar", '"')) != 1 or len(kwargs.get("sep", ",")) != 1:
+        return False
+    return os.path.getsize(csv_file) >= min_size
+
+
+def scan_range(csv_file, start, end, quotechar):
+    """count quotes in byte range and find the first newlines for each parity of quotes
+
+    :param csv_file: path of csv file
+    :param start: start of range in bytes
+    :param end: end of range in bytes
+    :param quotechar: quote character
+    :returns: number of quotes, offsets of the first newline after even and odd number of quotes in range
+    :rtype: tuple
+
+    """
+    q_code = ord(quotechar)
+    nl_code = ord("\n")
+    n_quotes = 0
+    first_nl = [None, None]
+    with open(csv_file, "rb") as f:
+        f.seek(start)
+        pos = start
+        while pos < end:
+            buf = np.frombuffer(f.read(min(SCAN_BLOCK_SIZE, end - pos)), dtype=np.uint8)
+            if len(buf) == 0:
+                break
+            if first_nl[0] is None or first_nl[1] is None:
+                q_pos = np.flatnonzero(buf == q_code)
+                nl_pos = np.flatnonzero(buf == nl_code)
+                parity = (np.searchsorted(q_pos, nl_pos) + n_quotes) % 2
+                for p in [0, 1]:
+                    if first_nl[p] is None:
+                        idx = np.flatnonzero(parity == p)
+                        if len(idx) > 0:
+                            first_nl[p] = pos + int(nl_pos[idx[0]])
+                n_quotes += len(q_pos)
+            else:
+                n_quotes += int(np.count_nonzero(buf == q_code))
+            pos += len(buf)
+    return n_quotes, first_nl[0], first_nl[1]
+
+
+def find_record_ranges(csv_file, n_ranges, executor, quotechar='"'):
+    """split csv file into byte ranges at boundaries of records
+
+    A newline after even number of quotes from the start of file is boundary of records,
+    then newlines in quoted fields are not used as boundary. Each range is scanned in parallel,
+    and parities at starts of ranges are derived from number of quotes in preceding ranges.
+
+    :param csv_file: path of csv file
+    :param n_ranges: number of ranges to scan
+    :param executor: concurrent.futures.Executor
+    :param quotechar: quote character
+    :returns: end of header and list of (start, end) of ranges of records, or None if quotes are not balanced.
+    :rtype: tuple
+
+    """
+    f_size = os.path.getsize(csv_file)
+    bounds = [f_size * i // n_ranges for i in range(n_ranges + 1)]
+    results = list(executor.map(scan_range, [csv_file] * n_ranges, bounds[:-1], bounds[1:], [quotechar] * n_ranges))
+    if sum([v[0] for v in results]) % 2 != 0:
+        return None
+
+    boundaries = []
+    parity = 0
+    for n_quotes, nl_even, nl_odd in results:
+        nl = nl_even if parity == 0 else nl_odd
+        if nl is not None:
+            boundaries.append(nl + 1)
+        parity = (parity + n_quotes) % 2
+    if len(boundaries) == 0:
+        return None
+    boundaries.append(f_size)
+    ranges = [(s, e) for s, e in zip(boundaries[:-1], boundaries[1:]) if e > s]
+    return boundaries[0], ranges
+
+
+def ranges_from_index(index, n_ranges):
+    """split csv file into byte ranges with row-offset index, see csv_index.py
+
+    :param index: index or None
+    :param n_ranges: number of ranges
+    :returns: end of header and list of (start, end) of ranges of records, or None if index is not available.
+    :rtype: tuple
+
+    """
+    if index is None or index["header_end"] is None or len(index["offsets"]) < 2:
+        return None
+    offsets = index["offsets"]
+    n_ranges = min(n_ranges, len(offsets))
+    boundaries = [index["header_end"]] + [offsets[len(offsets) * i // n_ranges] for i in range(1, n_ranges)] + [index["size"]]
+    ranges = [(s, e) for s, e in zip(boundaries[:-1], boundaries[1:]) if e > s]
+    return index["header_end"], ranges
+
+
+def parse_range(csv_file, start, end, names, kwargs):
+    """parse byte range of csv file
+
+    :param csv_file: path of csv file
+    :param start: start of range in bytes
+    :param end: end of range in bytes
+    :param names: names of columns
+    :param kwargs: options for pandas.read_csv
+    :returns: pandas.DataFrame
+    :rtype: pandas.DataFrame
+
+    """
+    with open(csv_file, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    return pd.read_csv(io.BytesIO(data), header=None, names=names, **kwargs)
+
+
+def mixed_columns(frames):
+    """columns whose dtypes are not consistent between ranges
+
+    Integer and float are consistent, as pandas.read_csv makes float column from them.
+    Columns of only NaN are ignored.
+
+    :param frames: list of pandas.DataFrame
+    :returns: names of columns
+    :rtype: list[str]
+
+    """
+    mixed = []
+    for cname in frames[0].columns:
+        kinds = set()
+        for df in frames:
+            ps = df[cname]
+            if ps.dtype.kind == "f" and ps.isna().all():
+                continue
+            kinds.add(ps.dtype.kind)
+        if len(kinds) > 1 and not kinds <= set("iuf"):
+            mixed.append(cname)
+    return mixed
+
+
+def read_csv_parallel(csv_file, n_workers=None, min_size=None, **kwargs):
+    """read csv file in parallel, the result is the same as pandas.read_csv
+
+    If parallel reading is not available for the file or the options, pandas.read_csv is used.
+    Quoted fields are assumed to be as RFC 4180, that is, quotes appear only at the start of field or as doubled quote.
+
+    :param csv_file: path of csv file or file object
+    :param n_workers: number of processes, default is given by 'CSV_TOOLS_READ_WORKERS' or number of cpus.
+    :param min_size: min size of file in bytes to read in parallel, default is given by 'CSV_TOOLS_READ_MIN_SIZE'(MB).
+    :returns: pandas.DataFrame
+    :rtype: pandas.DataFrame
+
+    """
+    env_workers, env_min_size = get_read_config()
+    n_workers = env_workers if n_workers is None else n_workers
+    min_size = env_min_size if min_size is None else min_size
+    if not available_parallel(csv_file, kwargs, n_workers, min_size):
+        return pd.read_csv(csv_file, **kwargs)
+
+    t0 = time.perf_counter()
+    header_kwargs = {k: v for k, v in kwargs.items() if k in ["encoding", "sep", "quotechar"]}
+    names = list(pd.read_csv(csv_file, nrows=0, **header_kwargs).columns)
+    quotechar = kwargs.get("quotechar", '"')
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        result = None
+        if quotechar == '"':
+            result = ranges_from_index(load_index(csv_file), n_workers * RANGES_PER_WORKER)
+        if result is None:
+            result = find_record_ranges(csv_file, n_workers * RANGES_PER_WORKER, executor, quotechar=quotechar)
+        if result is None:
+            print("#warn:csv_parallel:boundaries of records were not found, file is read sequentially:{}".format(csv_file),
+                  file=sys.stderr)
+            return pd.read_csv(csv_file, **kwargs)
+        _, ranges = result
+        if len(ranges) == 0:
+            return pd.read_csv(csv_file, **kwargs)
+
+        def parse_all(p_kwargs):
+            n_ranges = len(ranges)
+            return list(
+                executor.map(parse_range, [csv_file] * n_ranges, [v[0] for v in ranges], [v[1] for v in ranges], [names] * n_ranges,
+                             [p_kwargs] * n_ranges))
+
+        try:
+            frames = parse_all(kwargs)
+            mixed = mixed_columns(frames)
+            dtype = kwargs.get("dtype")
+            if len(mixed) > 0 and (dtype is None or isinstance(dtype, dict)):
+                # as pandas.read_csv, column that has numbers and strings is read as strings.
+                p_kwargs = dict(kwargs)
+                p_kwargs["dtype"] = {**{v: object for v in mixed}, **(dtype or {})}
+                frames = parse_all(p_kwargs)
+        except pd.errors.ParserError as e:
+            print("#warn:csv_parallel:parallel reading failed, file is read sequentially:{}".format(e), file=sys.stderr)
+            return pd.read_csv(csv_file, **kwargs)
+
+    df = pd.concat(frames, ignore_index=True)
+    print("%inf:csv_parallel:read {} with {} processes, {} ranges: {:.3f} sec".format(csv_file, n_workers, len(ranges),
+                                                                                    time.perf_counter() - t0),
+          file=sys.stderr)
+    return df
+
+
+def init():
+    arg_parser = argparse.ArgumentParser(description="split csv file into byte ranges at boundaries of records for parallel reading",
+                                         formatter_class=argparse.RawDescriptionHelpFormatter,
+                                         epilog=textwrap.dedent('''
+remark:
+  Tools that read csv file with shared reader(csv_uty.py, csv_status.py, csv_query.py, csv_plot_*.py and so on)
+  parse big csv file in process pool. csv file is split into byte ranges at newlines that are not in quoted fields,
+  and results of ranges are concatenated in order.
+  Quoted fields are assumed to be as RFC 4180, if quotes are not balanced, the file is read sequentially.
+  If row-offset index of the file is up to date(see csv_index.py), ranges are given by the index without scanning.
+  Compressed file, stdin and some options of pandas.read_csv are read sequentially.
+
+  'CSV_TOOLS_READ_WORKERS': number of processes, default=number of cpus. 0 or 1 disables parallel reading.
+  'CSV_TOOLS_READ_MIN_SIZE': min size of file in MB to read in parallel, default=64.
+
+  This command prints ranges of records as csv.
+
+example:
+  csv_parallel.py --workers=8 big_sample_arb.csv
+  CSV_TOOLS_READ_WORKERS=16 csv_status.py big_sample_arb.csv
+
+'''))
+    arg_parser.add_argument('-v', '--version', action='version', version='%(prog)s {}'.format(VERSION))
+
+    arg_parser.add_argument("--workers", dest="WORKERS", help="number of processes, default=number of cpus", type=int, metavar="INT", default=None)
+    arg_parser.add_argument("--quotechar", dest="QUOTECHAR", help="quote character, default='\"'", type=str, metavar="CHAR", default='"')
+
+    arg_parser.add_argument('csv_file', metavar='CSV_FILE', help="file to read")
+
+    args = arg_parser.parse_args()
+    return args
+
+
+if __name__ == "__main__":
+    args = init()
+    csv_file = args.csv_file
+    n_workers = args.WORKERS
+    quotechar = args.QUOTECHAR
+
+    if n_workers is None:
+        n_workers, _ = get_read_config()
+    n_workers = max(n_workers, 1)
+
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        result = find_record_ranges(csv_file, n_workers * RANGES_PER_WORKER, executor, quotechar=quotechar)
+    if result is None:
+        print("??error:csv_parallel:boundaries of records were not found:{}".format(csv_file), file=sys.stderr)
+        sys.exit(1)
+    header_end, ranges = result
+    print("%inf:csv_parallel:end of header={}".format(header_end), file=sys.stderr)
+    print("range,start,end,size")
+    for i_r, (s, e) in enumerate(ranges):
+        print("{},{},{},{}".format(i_r, s, e, e - s))
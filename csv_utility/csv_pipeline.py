@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ----------------------------------------------------------------------
+# Name:         csv_pipeline.py
+# Description:
+#    run stages of csv_tools in one process, DataFrame is passed directly between stages
+#    without writing and reading csv text.
+#
+# Author:       m.akei
+# Copyright:    (c) 2021 by m.na.akei
+# Time-stamp:   <2021-05-17 09:31:50>
+# Licence:
+#  Copyright (c) 2021 Masaharu N. Akei
+#
+#  This software is released under the MIT License.
+#    http://opensource.org/licenses/mit-license.php
+# ----------------------------------------------------------------------
+import argparse
+import textwrap
+import sys
+
+import time
+import shlex
+import importlib
+from pathlib import Path
+
+sys.path.insert(0, format(Path(__file__).parent))
+
+VERSION = 1.0
+
+PIPE_SEPARATOR = "|"
+
+# name of script -> (module, available as source or filter, dtype of input)
+#   dtype of input: 'string' means that all columns are read as string, 'infer' means inference of pandas.read_csv.
+PIPELINE_STAGES = {
+    "csv_uty.py": ("csv_uty", True, "string"),
+    "csv_trimtime.py": ("csv_trimtime", True, "infer"),
+    "csv_query.py": ("csv_query", True, "infer"),
+    "csv_status.py": ("csv_status", False, "infer"),
+}
+
+
+def split_stages(stage_args):
+    """split arguments into stages by '|'
+
+    :param stage_args: list of arguments, or one string of pipeline.
+    :returns: list of stages, each stage is list of script and its arguments.
+    :rtype: list[list[str]]
+
+    """
+    if len(stage_args) == 1:
+        stage_args = shlex.split(stage_args[0])
+    stages = [[]]
+    for v in stage_args:
+        if v == PIPE_SEPARATOR:
+            stages.append([])
+        else:
+            stages[-1].append(v)
+    return stages
+
+
+def prepare_stage(stage, i_stage, n_stages):
+    """parse arguments of stage
+
+    :param stage: list of script and its arguments
+    :param i_stage: index of stage
+    :param n_stages: number of stages
+    :returns: name of script, module, parsed arguments and dtype of input
+    :rtype: tuple
+
+    """
+    if len(stage) == 0:
+        print("??error:csv_pipeline:empty stage:{}".format(i_stage + 1), file=sys.stderr)
+        sys.exit(1)
+    sc_name = Path(stage[0]).name
+    if not sc_name.endswith(".py"):
+        sc_name += ".py"
+    if sc_name not in PIPELINE_STAGES:
+        print("??error:csv_pipeline:not available in pipeline:{}, available: {}".format(sc_name, ",".join(PIPELINE_STAGES.keys())),
+              file=sys.stderr)
+        sys.exit(1)
+    mod_name, as_filter, in_dtype = PIPELINE_STAGES[sc_name]
+    if i_stage < n_stages - 1 and not as_filter:
+        print("??error:csv_pipeline:{} must be the last stage".format(sc_name), file=sys.stderr)
+        sys.exit(1)
+
+    module = importlib.import_module(mod_name)
+    args = module.init(stage[1:])
+    if i_stage > 0 and args.csv_file != "-":
+        print("??error:csv_pipeline:stage {}:{}: input must be '-':{}".format(i_stage + 1, sc_name, args.csv_file), file=sys.stderr)
+        sys.exit(1)
+    if i_stage < n_stages - 1:
+        if getattr(args, "OUTPUT", None) not in [None, sys.stdout]:
+            print("??error:csv_pipeline:stage {}:{}: output is available only for the last stage".format(i_stage + 1, sc_name),
+                  file=sys.stderr)
+            sys.exit(1)
+        if getattr(args, "OFORMAT", "csv") != "csv":
+            print("??error:csv_pipeline:stage {}:{}: '--output_format' is available only for the last stage".format(i_stage + 1, sc_name),
+                  file=sys.stderr)
+            sys.exit(1)
+    return sc_name, module, args, in_dtype
+
+
+def init():
+    arg_parser = argparse.ArgumentParser(description="run stages of csv_tools in one process without csv text between stages",
+                                         formatter_class=argparse.RawDescriptionHelpFormatter,
+                                         epilog=textwrap.dedent('''
+remark:
+  Stages are separated by '|', that must be quoted in shell, or whole pipeline may be given as one string.
+  Each stage is script and its options, the same as command line of the script.
+  Input of stages except the first one must be '-'. Only the last stage writes its result,
+  '--output' and '--output_format' are available only for the last stage.
+
+  DataFrame is passed directly to the next stage. For the stage that reads all columns as string (csv_uty.py),
+  columns are converted into string. For other stages, columns of datetime are converted into strings
+  as csv text, and columns of strings are converted as inference of pandas.read_csv,
+  so that each stage reads the same data as in pipeline of shell. Columns of numbers are passed with their dtypes.
+
+  available scripts: csv_uty.py, csv_trimtime.py, csv_query.py, csv_status.py(only as the last stage)
+  '--chunksize' of csv_uty.py is not available.
+
+example:
+  csv_pipeline.py csv_uty.py --sort=A test_trimtime.csv '|' csv_trimtime.py --resample='A:%Y-%m-%d %H\:%M\:%S:1D:B,C' - '|' csv_status.py -
+  csv_pipeline.py "csv_query.py test_trimtime.csv 'B>0' | csv_trimtime.py --calculate_elapsed_time='E=A:%Y-%m-%d %H\:%M\:%S' - | csv_status.py -"
+
+'''))
+    arg_parser.add_argument('-v', '--version', action='version', version='%(prog)s {}'.format(VERSION))
+
+    arg_parser.add_argument("--timing", dest="TIMING", help="print elapsed time of each stage to stderr", action="store_true", default=False)
+    arg_parser.add_argument('stages', metavar='STAGE', nargs=argparse.REMAINDER, help="stages separated by '|'")
+
+    args = arg_parser.parse_args()
+    return args
+
+
+if __name__ == "__main__":
+    args = init()
+    from csv_arrow import to_string_columns, datetime_to_string_columns, infer_string_columns
+
+    timing = args.TIMING
+    stages = split_stages(args.stages)
+    if len(stages) == 0 or len(stages[0]) == 0:
+        print("??error:csv_pipeline:no stage was given", file=sys.stderr)
+        sys.exit(1)
+
+    stage_defs = [prepare_stage(v, i_stage, len(stages)) for i_stage, v in enumerate(stages)]
+
+    csv_df = None
+    for i_stage, (sc_name, module, stage_args, in_dtype) in enumerate(stage_defs):
+        t0 = time.perf_counter()
+        last_stage = i_stage == len(stage_defs) - 1
+        if csv_df is not None:
+            if in_dtype == "string":
+                csv_df = to_string_columns(csv_df)
+            else:
+                csv_df = infer_string_columns(datetime_to_string_columns(csv_df))
+        if last_stage:
+            module.main(stage_args, in_df=csv_df)
+        else:
+            result = module.main(stage_args, in_df=csv_df, to_pipe=True)
+            if result is None:
+                print("??error:csv_pipeline:stage {}:{}: no result".format(i_stage + 1, sc_name), file=sys.stderr)
+                sys.exit(1)
+            csv_df, with_index = result
+            if with_index:
+                csv_df = csv_df.reset_index()
+        if timing:
+            print("%inf:csv_pipeline:stage {}:{}:{:.3f} sec".format(i_stage + 1, sc_name,
+                                                                    time.perf_counter() - t0),
+                  file=sys.stderr)
@@ -55,6 +55,7 @@ options:
 
 remark:
   as assumption, there is only one header row in csv file.
+  rows are read by seeking with row-offset index, see csv_index.py.
 
 EOF
     exit 1
@@ -89,6 +90,7 @@ if [ "${INPUT}" = "-" ]; then
     TMPFILE="${TMPDIR}/${SNAME}_input.tmp"
     cat > ${TMPFILE}
     INPUT=${TMPFILE}
+    INDEX_OPT="--no_store"
 elif [ ! -e "${INPUT}" ]; then
     echo "??Error: file not found: ${INPUT}" 1>&2
     exit 1
@@ -108,7 +110,7 @@ IFS=${OIFS}
 #NR=($(wc -l ${INPUT}))
 #NR=${NR[0]}
 #NR=$((NR-1))
-NR=$(csvstat --count ${INPUT} | awk '{print $3}')
+NR=$(${DDIR}/csv_index.py ${INDEX_OPT} --count "${INPUT}")
 NC=${#HEADERS[@]}
 R0=$((ROW-HWR < 1 ? 1: ROW-HWR))
 R1=$((ROW+HWR > NR ? NR: ROW+HWR))
@@ -128,22 +130,18 @@ else
     echo "${R}"
 fi
 
-# print rows
-IR=0
+# print rows, those are read by seeking with row-offset index
+IR=${R0}
 while read LINE; do
     COLS=($(echo ${LINE} | tr "," " "| sed "s/\r//g"))
-    if (( IR >= R0 && IR <= R1 )); then
-	R=$(IFS=,;echo "${COLS[*]:${C0}:${WC}}")
-	if [ "${NRMODE}" = "1" ]; then
-	    echo "${IR},${R}"
-	else
-	    echo "${R}"
-	fi
-    elif (( IR > R1 )); then
-	break
+    R=$(IFS=,;echo "${COLS[*]:${C0}:${WC}}")
+    if [ "${NRMODE}" = "1" ]; then
+	echo "${IR},${R}"
+    else
+	echo "${R}"
     fi
     IR=$((IR+1))
-done < ${INPUT}
+done < <(${DDIR}/csv_index.py ${INDEX_OPT} --rows=$((R0-1)),${R1} "${INPUT}")
 
 if [ "${TMPFILE}" != "" -a -e "${TMPFILE}" ]; then
     rm -f ${TMPFILE}
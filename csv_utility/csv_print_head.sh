@@ -120,7 +120,7 @@ INPUT=$(check_and_get_stdin "${INPUT}")
 
 if (( ${NROWS} > 1 )); then
     CM_TMPFILE=$(make_tmpfile)
-    ${DDIR}/csv_multiindex_columns.py --only_header --nrows=${NROWS} --to_single ${INPUT} > ${CM_TMPFILE}
+    ${DDIR}/csv_daemon_client.py csv_multiindex_columns.py --only_header --nrows=${NROWS} --to_single ${INPUT} > ${CM_TMPFILE}
     INPUT=${CM_TMPFILE}
 fi
 
@@ -23,14 +23,8 @@ import zipfile
 
 import re
 import html
-from lxml import etree
 from io import StringIO
 
-import minify_html
-
-import seaborn as sns
-import pandas as pd
-
 VERSION = 1.0
 
 
@@ -245,6 +239,7 @@ def gradient_style(dsty, axis=None, cmap="green", vmin=None, vmax=None, df_slice
     :rtype: 
 
     """
+    import seaborn as sns
     cm = sns.light_palette(cmap, as_cmap=True)
 
     bg_params = {"subset": df_slice}
@@ -740,6 +735,9 @@ def set_rid_in_html(html_str):
 
 if __name__ == "__main__":
     args = init()
+    from lxml import etree
+    import pandas as pd
+
     csv_file = args.csv_file
     output_file = args.OUTPUT
     datatable_mode = args.DATATBL
@@ -890,6 +888,7 @@ if __name__ == "__main__":
     html_str = set_rid_in_html(html_str)
 
     if html_minify:
+        import minify_html
         try:
             html_str = minify_html.minify(html_str, minify_js=True, minify_css=True)
         except SyntaxError as e:
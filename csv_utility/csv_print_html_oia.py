@@ -18,11 +18,8 @@ from pathlib import Path
 import re
 import html
 
-import minify_html
 import json
 
-import pandas as pd
-
 VERSION = 1.0
 
 OIA_HANDLER_JS = "oia_handler.js"
@@ -539,6 +536,8 @@ if __name__ == "__main__":
     output_js = OIA_HANDLER_JS
 
     args = init()
+    import pandas as pd
+
     csv_file = args.csv_file
     output_file = args.OUTPUT
     oia_columns = args.oia_columns
@@ -583,6 +582,7 @@ if __name__ == "__main__":
     html_str += html_epiloge()
 
     if html_minify:
+        import minify_html
         try:
             html_str = minify_html.minify(html_str, minify_js=True, minify_css=True)
         except SyntaxError as e:
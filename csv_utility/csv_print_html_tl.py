@@ -26,10 +26,6 @@ from pathlib import Path
 # import xml.etree.ElementTree as ET
 from lxml import etree
 
-import numpy as np
-import pandas as pd
-import minify_html
-
 PIL_PKG = True
 try:
     from PIL import Image
@@ -760,6 +756,9 @@ if __name__ == "__main__":
     output_js = TL_HANDLER_JS
 
     args = init()
+    import numpy as np
+    import pandas as pd
+
     csv_file = args.csv_file
     title = args.TITLE
     output_file_html = args.OUTPUT
@@ -865,6 +864,7 @@ if __name__ == "__main__":
     html_str = make_html(json_str, pcolors_s, timeline_local=timeline_local)
 
     if html_minify:
+        import minify_html
         try:
             html_str = minify_html.minify(html_str, minify_js=True, minify_css=True)
         except SyntaxError as e:
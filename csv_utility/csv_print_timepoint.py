@@ -21,12 +21,7 @@ import tempfile
 import subprocess
 from io import StringIO, BytesIO
 
-from lxml import etree
-import pandas as pd
-
 sys.path.insert(0, format(Path(__file__).parent))
-from csv_print_html_tl import make_gantt
-from csv_print_timeline_trim_svg import add_style, add_script, trim_svg_string
 
 VERSION = 1.0
 
@@ -150,6 +145,12 @@ def do_only_pu_mode(pu_file, output_svg, plantuml_cmd):
 
 if __name__ == "__main__":
     args = init()
+    from lxml import etree
+    import pandas as pd
+    from csv_print_html_tl import make_gantt
+    from csv_print_timeline_trim_svg import add_style, add_script, trim_svg_string
+    from csv_schema import read_csv_with_schema
+
     csv_file = args.csv_file
     datetime_column = args.datetime_column
 
@@ -198,7 +199,7 @@ if __name__ == "__main__":
         print("??error:csv_print_timepoint:DATETIME_COLUMN is required.", file=sys.stderr)
         sys.exit(1)
 
-    csv_df = pd.read_csv(csv_file)
+    csv_df = read_csv_with_schema(csv_file)
     csv_df[datetime_column] = pd.to_datetime(csv_df[datetime_column], format=datetime_format)
 
     if group_column is not None:
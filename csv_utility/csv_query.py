@@ -18,12 +18,13 @@ import textwrap
 import sys
 import re
 
-import pandas as pd
+from pathlib import Path
+sys.path.insert(0, format(Path(__file__).parent))
 
 VERSION = 1.0
 
 
-def init():
+def init(argv=None):
     arg_parser = argparse.ArgumentParser(description="do query for CSV data",
                                          formatter_class=argparse.RawDescriptionHelpFormatter,
                                          epilog=textwrap.dedent('''
@@ -34,6 +35,9 @@ remark:
  When '--query_file' was used, those lines were used as query string as joining with 'or'.
  In query file, lines those starts with '#' are ignored as comment lines.
 
+ When environment variable 'CSV_TOOLS_CACHE_DIR' is defined, parsed data is stored into the cache and is used by later reading,
+ see 'csv_cache.py --help'. '--no_cache' disables the cache, '--refresh_cache' makes the cache again.
+
 example:
  csv_query.py big_sample_arb.csv 'COL_0002=="001001" and COL_0006=="PAT001"'
  csv_query.py big_sample_arb.csv 'COL_0002=="001001" and COL_0006.str.contains("PAT001")'
@@ -55,16 +59,40 @@ example:
                             type=str,
                             metavar='COLUMNS[,COLUMNS,[COLUMNS,...]]',
                             default="all")
+    arg_parser.add_argument("--no_cache", dest="NO_CACHE", help="not use cache of parsed data", action="store_true", default=False)
+    arg_parser.add_argument("--refresh_cache",
+                            dest="REFRESH_CACHE",
+                            help="make cache of parsed data again",
+                            action="store_true",
+                            default=False)
     arg_parser.add_argument("--output", dest="OUTPUT", help="path of output, default is stdout", type=str, metavar='STR', default=None)
+    arg_parser.add_argument("--output_format",
+                            dest="OFORMAT",
+                            help="format of output, 'arrow_stream' is Arrow IPC stream for other csv_tools, default=csv",
+                            choices=["csv", "arrow_stream"],
+                            default="csv")
 
     arg_parser.add_argument('csv_file', metavar='CSV_FILE', help='path of csv file')
     arg_parser.add_argument('query', metavar='STR', help='query string', nargs='?')
-    args = arg_parser.parse_args()
+    args = arg_parser.parse_args(argv)
     return args
 
 
-if __name__ == "__main__":
-    args = init()
+
+def main(args, in_df=None, to_pipe=False):
+    """run csv_query.py with parsed arguments
+
+    :param args: result of init()
+    :param in_df: pandas.DataFrame as input instead of csv file, given by csv_pipeline.py
+    :param to_pipe: if True, result is returned instead of output, for csv_pipeline.py
+    :returns: result and flag whether index is a part of result, only if 'to_pipe' is True.
+    :rtype: tuple
+
+    """
+    import pandas as pd
+    from csv_cache import read_csv_cached
+    from csv_arrow import write_dataframe
+
     csv_file = args.csv_file
     query_file = args.QFILE
     query = args.query
@@ -81,6 +109,9 @@ if __name__ == "__main__":
 
     encode = args.ENCODE
     columns = args.COLUMNS
+    output_format = args.OFORMAT
+    no_cache = args.NO_CACHE
+    refresh_cache = args.REFRESH_CACHE
 
     if query_file is not None:
         with open(query_file, 'r') as f:
@@ -88,7 +119,10 @@ if __name__ == "__main__":
             query = " or ".join(["({})".format(v) for v in qs if len(v) != 0])
             print("%inf:csv_query:query was read from '{}':{}".format(query_file, query), file=sys.stderr)
 
-    csv_df = pd.read_csv(csv_file, encoding=encode)
+    if in_df is not None:
+        csv_df = in_df
+    else:
+        csv_df = read_csv_cached(csv_file, no_cache=no_cache, refresh=refresh_cache, encoding=encode)
 
     try:
         res_df = csv_df.query(query, engine="python")
@@ -103,4 +137,11 @@ if __name__ == "__main__":
     else:
         columns = re.split(r"\s*,\s*", columns)
 
-    res_df[columns].to_csv(csv_output, encoding=encode, index=False)
+    if to_pipe:
+        return res_df[columns], False
+    write_dataframe(res_df[columns], csv_output, output_format, encoding=encode, index=False)
+
+
+if __name__ == "__main__":
+    args = init()
+    main(args)
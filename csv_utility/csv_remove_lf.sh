@@ -58,7 +58,7 @@ example:
 EOF
     exit 1
 }
-check_commands csv_uty.py
+check_commands csv_uty.py csv_daemon_client.py
 
 while getopts r:h OPT
 do
@@ -104,7 +104,8 @@ for v in ${ADD_OPTS[@]}; do
 done
 AOPTS=${AOPTS#,}
 #echo $AOPTS
-csv_uty.py --add_columns="${AOPTS}" "${INPUT}"
+# csv_daemon_client.py runs csv_uty.py by csv_daemon.py, if it is running.
+csv_daemon_client.py csv_uty.py --add_columns="${AOPTS}" "${INPUT}"
 
 #----
 # remove_tmpdir
@@ -19,7 +19,8 @@ import sys
 
 import re
 import random
-import pandas as pd
+from pathlib import Path
+sys.path.insert(0, format(Path(__file__).parent))
 
 VERSION = 1.0
 
@@ -28,6 +29,10 @@ def init():
     arg_parser = argparse.ArgumentParser(description="derive sample records from big csv file",
                                          formatter_class=argparse.RawDescriptionHelpFormatter,
                                          epilog=textwrap.dedent('''
+remark:
+  For csv file, number of rows is given by row-offset index('<csv file>.csvidx', see csv_index.py),
+  and only rows in range of sampling are read.
+
 example:
   csv_sample.py --random --range=0.25,0.75 --output=test.csv big_sample_arb.csv 300
 
@@ -39,6 +44,11 @@ example:
     arg_parser.add_argument("--skip", dest="RSKIP", help="skip sampling", type=int, metavar='INT', default=1)
 
     arg_parser.add_argument("--output", dest="OUTPUT", help="path of output file: default=stdout", type=str, metavar='FILE', default=None)
+    arg_parser.add_argument("--output_format",
+                            dest="OFORMAT",
+                            help="format of output, 'arrow_stream' is Arrow IPC stream for other csv_tools, default=csv",
+                            choices=["csv", "arrow_stream"],
+                            default="csv")
 
     arg_parser.add_argument('csv_file', metavar='CSV_FILE', help='files to read, if empty, stdin is used')
     arg_parser.add_argument('sample_size', metavar='SAMPLE_SIZE', help='size of sample: ex 100 50%% 0.5', type=str)
@@ -50,6 +60,11 @@ example:
 
 if __name__ == "__main__":
     args = init()
+    import pandas as pd
+    from csv_schema import read_csv_with_schema
+    from csv_arrow import write_dataframe
+    from csv_index import available_index, get_index
+
     csv_file = args.csv_file
     d_range_s = args.RANGE
     r_mode = args.RANDOM
@@ -57,6 +72,7 @@ if __name__ == "__main__":
     s_size_s = args.sample_size
 
     output_file = args.OUTPUT
+    output_format = args.OFORMAT
 
     if output_file is None:
         output_file = sys.stdout
@@ -70,10 +86,14 @@ if __name__ == "__main__":
     else:
         d_range = [0, 1.0]
 
-    print("%Inf:csv_sample:read csv file: {}".format(csv_file), file=sys.stderr)
-    csv_df = pd.read_csv(csv_file)
-
-    nrows = len(csv_df)
+    if available_index(csv_file):
+        # number of rows is given by row-offset index, and only rows in range of sampling are read.
+        nrows = get_index(csv_file)["n_rows"]
+        csv_df = None
+    else:
+        print("%Inf:csv_sample:read csv file: {}".format(csv_file), file=sys.stderr)
+        csv_df = read_csv_with_schema(csv_file, compact=True)
+        nrows = len(csv_df)
     if s_size_s.endswith("%"):
         s_size = int(float(s_size_s[:-1]) / 100 * nrows)
     elif float(s_size_s) < 1.0:
@@ -101,7 +121,17 @@ if __name__ == "__main__":
     if r_skip > 1:
         i_rows = [i_rows[i] for i in range(0, len(i_rows), r_skip)]
 
-    print("%Inf:csv_sample:do sampling {} records from {} records".format(len(i_rows), len(csv_df)), file=sys.stderr)
+    if csv_df is None:
+        r0 = min(i_rows, default=0)
+        r1 = max(i_rows, default=-1)
+        print("%Inf:csv_sample:read csv file: {}, rows {}-{}".format(csv_file, r0, r1), file=sys.stderr)
+        if r0 == 0 and r1 >= nrows - 1:
+            csv_df = read_csv_with_schema(csv_file, compact=True)
+        else:
+            csv_df = read_csv_with_schema(csv_file, compact=True, row_range=(r0, r1 - r0 + 1))
+            i_rows = [v - r0 for v in i_rows]
+
+    print("%Inf:csv_sample:do sampling {} records from {} records".format(len(i_rows), nrows), file=sys.stderr)
     o_df = csv_df.iloc[i_rows]
 
-    o_df.to_csv(output_file)
+    write_dataframe(o_df, output_file, output_format)
@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ----------------------------------------------------------------------
+# Name:         csv_schema.py
+# Description:
+#    shared schema inference for csv_tools.
+#    Schema of csv file is inferred from sample records and stored into sidecar file('<csv file>.schema.json'),
+#    that is keyed by size and mtime of csv file. Later reading of the same file uses the stored schema.
+#
+# Author:       m.akei
+# Copyright:    (c) 2021 by m.na.akei
+# Time-stamp:   <2021-05-08 10:12:31>
+# Licence:
+#  Copyright (c) 2021 Masaharu N. Akei
+#
+#  This software is released under the MIT License.
+#    http://opensource.org/licenses/mit-license.php
+# ----------------------------------------------------------------------
+import argparse
+import textwrap
+import sys
+
+import os
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from csv_arrow import is_arrow_stream, read_arrow_stream
+from csv_parallel import read_csv_parallel
+from csv_index import available_index, read_csv_rows
+
+VERSION = 1.0
+
+SCHEMA_VERSION = 1
+SCHEMA_SUFFIX = ".schema.json"
+SCHEMA_SAMPLE_SIZE = 10000
+CATEGORY_MAX_RATIO = 0.5
+CATEGORY_MAX_NUNIQUE = 1000
+DATETIME_FORMATS = [
+    "%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d %H:%M:%S.%f", "%Y-%m-%dT%H:%M:%S.%f", "%Y-%m-%d %H:%M", "%Y-%m-%d",
+    "%Y/%m/%d %H:%M:%S", "%Y/%m/%d %H:%M", "%Y/%m/%d"
+]
+
+
+def schema_path(csv_file):
+    """path of sidecar file of schema
+
+    :param csv_file: path of csv file
+    :returns: path of sidecar file
+    :rtype: Path
+
+    """
+    return Path(str(csv_file) + SCHEMA_SUFFIX)
+
+
+def file_key(csv_file):
+    """key of csv file to validate sidecar file
+
+    :param csv_file: path of csv file
+    :returns: size and mtime of file
+    :rtype: dict
+
+    """
+    st = os.stat(csv_file)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def detect_datetime_format(ps):
+    """detect format of datetime strings
+
+    :param ps: pandas.Series of strings without NA
+    :returns: format or None
+    :rtype: str
+
+    """
+    if len(ps) == 0:
+        return None
+    for fmt in DATETIME_FORMATS:
+        try:
+            pd.to_datetime(ps, format=fmt, errors="raise")
+        except (ValueError, TypeError):
+            continue
+        return fmt
+    return None
+
+
+def infer_column_schema(ps):
+    """infer schema of column from sample
+
+    'dtype' is dtype to read the column, 'compact' is dtype that may be used after reading.
+
+    :param ps: pandas.Series of sample, that was read by pandas.read_csv with default inference
+    :returns: schema of column
+    :rtype: dict
+
+    """
+    kind = ps.dtype.kind
+    result = {"dtype": str(ps.dtype), "compact": str(ps.dtype), "format": None}
+    if kind in "iu":
+        v_min = ps.min() if len(ps) > 0 else 0
+        v_max = ps.max() if len(ps) > 0 else 0
+        result["compact"] = str(np.result_type(np.min_scalar_type(v_min), np.min_scalar_type(v_max)))
+    elif kind == "f":
+        ps_v = ps.dropna()
+        if (ps_v.astype(np.float32).astype(np.float64) == ps_v).all():
+            result["compact"] = "float32"
+    elif kind == "O":
+        ps_v = ps.dropna().astype(str)
+        fmt = detect_datetime_format(ps_v)
+        if fmt is not None:
+            result["compact"] = "datetime64[ns]"
+            result["format"] = fmt
+        else:
+            n_unique = ps_v.nunique()
+            if len(ps_v) > 0 and n_unique <= CATEGORY_MAX_NUNIQUE and n_unique <= len(ps_v) * CATEGORY_MAX_RATIO:
+                result["compact"] = "category"
+    return result
+
+
+def infer_schema(csv_file, n_sample=SCHEMA_SAMPLE_SIZE, **kwargs):
+    """infer schema of csv file from sample records
+
+    :param csv_file: path of csv file
+    :param n_sample: number of records to sample
+    :returns: schema
+    :rtype: dict
+
+    """
+    sample_df = pd.read_csv(csv_file, nrows=n_sample, **kwargs)
+    schema = {"version": SCHEMA_VERSION, "n_sample": len(sample_df), "columns": {}}
+    for cname in sample_df.columns:
+        schema["columns"][cname] = infer_column_schema(sample_df[cname])
+    return schema
+
+
+def load_schema(csv_file):
+    """load schema from sidecar file
+
+    :param csv_file: path of csv file
+    :returns: schema or None if sidecar file does not exist or is out of date.
+    :rtype: dict
+
+    """
+    sc_path = schema_path(csv_file)
+    if not sc_path.exists():
+        return None
+    try:
+        with open(sc_path) as f:
+            schema = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if schema.get("version") != SCHEMA_VERSION or schema.get("key") != file_key(csv_file):
+        return None
+    return schema
+
+
+def save_schema(csv_file, schema):
+    """save schema into sidecar file
+
+    :param csv_file: path of csv file
+    :param schema: schema
+
+    """
+    schema["key"] = file_key(csv_file)
+    try:
+        with open(schema_path(csv_file), "w") as f:
+            json.dump(schema, f, indent=1, ensure_ascii=False)
+    except OSError as e:
+        print("#warn:csv_schema:schema was not stored:{}".format(e), file=sys.stderr)
+
+
+def get_schema(csv_file, refresh=False, **kwargs):
+    """get schema of csv file, from sidecar file or by inference
+
+    :param csv_file: path of csv file
+    :param refresh: if True, schema is inferred again.
+    :returns: schema
+    :rtype: dict
+
+    """
+    schema = None if refresh else load_schema(csv_file)
+    if schema is None:
+        schema = infer_schema(csv_file, **kwargs)
+        save_schema(csv_file, schema)
+        print("%inf:csv_schema:schema was inferred from {} records:{}".format(schema["n_sample"], schema_path(csv_file)), file=sys.stderr)
+    return schema
+
+
+def compact_dataframe(df, schema, parse_dates=False):
+    """convert columns of dataframe into compact dtypes by schema
+
+    each conversion is verified with all values in the column.
+
+    :param df: pandas.DataFrame that was read with schema
+    :param schema: schema
+    :param parse_dates: if True, columns of datetime are converted.
+    :returns: pandas.DataFrame
+    :rtype: pandas.DataFrame
+
+    """
+    for cname, c_schema in schema["columns"].items():
+        if cname not in df.columns or c_schema["compact"] == c_schema["dtype"]:
+            continue
+        ps = df[cname]
+        compact = c_schema["compact"]
+        if ps.dtype.kind in "iu" and np.dtype(compact).kind in "iu":
+            df[cname] = pd.to_numeric(ps, downcast="integer")
+        elif ps.dtype.kind == "f" and compact == "float32":
+            ps_32 = ps.astype(np.float32)
+            if (ps_32.astype(np.float64) == ps)[ps.notna()].all():
+                df[cname] = ps_32
+        elif ps.dtype.kind == "O" and compact == "category":
+            n_unique = ps.nunique()
+            if n_unique <= CATEGORY_MAX_NUNIQUE and n_unique <= len(ps) * CATEGORY_MAX_RATIO:
+                df[cname] = ps.astype("category")
+        elif ps.dtype.kind == "O" and compact.startswith("datetime64") and parse_dates:
+            try:
+                df[cname] = pd.to_datetime(ps, format=c_schema["format"], errors="raise")
+            except (ValueError, TypeError):
+                pass
+    return df
+
+
+def read_csv_with_schema(csv_file, compact=False, parse_dates=False, refresh=False, row_range=None, **kwargs):
+    """read csv file with schema, that was stored in sidecar file or inferred from sample records
+
+    Without 'compact', dtypes of result are the same as ones of pandas.read_csv with default inference.
+    If schema does not fit with all records, schema is inferred by all records.
+    Big csv file is read in parallel, see csv_parallel.py.
+
+    :param csv_file: path of csv file, or file object. for file object, schema is not used and Arrow IPC stream is detected.
+    :param compact: if True, columns are converted into compact dtypes, downcasted integer, float32, category.
+    :param parse_dates: if True with 'compact', columns of datetime are parsed with detected format.
+    :param refresh: if True, schema is inferred again.
+    :param row_range: (index of the first row, number of rows) to read only those rows by seeking with row-offset index, see csv_index.py.
+    :returns: pandas.DataFrame
+    :rtype: pandas.DataFrame
+
+    """
+    if str(csv_file) == "-":
+        csv_file = sys.stdin
+    if row_range is not None and not available_index(csv_file):
+        df = read_csv_with_schema(csv_file, compact=compact, parse_dates=parse_dates, refresh=refresh, **kwargs)
+        return df.iloc[row_range[0]:row_range[0] + row_range[1]]
+    if row_range is not None:
+
+        def read_func(f, **r_kwargs):
+            return read_csv_rows(f, row_range[0], row_range[1], **r_kwargs)
+    else:
+        read_func = read_csv_parallel
+    if is_arrow_stream(csv_file):
+        return read_arrow_stream(csv_file, **kwargs)
+    if not isinstance(csv_file, (str, Path)) or "dtype" in kwargs:
+        return read_func(csv_file, **kwargs)
+
+    schema = get_schema(csv_file, refresh=refresh, **kwargs)
+    dtypes = {k: v["dtype"] for k, v in schema["columns"].items()}
+    try:
+        df = read_func(csv_file, dtype=dtypes, **kwargs)
+    except (ValueError, TypeError, OverflowError) as e:
+        print("#warn:csv_schema:schema does not fit, all records are used to infer:{}".format(e), file=sys.stderr)
+        df = read_func(csv_file, **kwargs)
+        if row_range is None:
+            schema = {"version": SCHEMA_VERSION, "n_sample": len(df), "columns": {}}
+            for cname in df.columns:
+                schema["columns"][cname] = infer_column_schema(df[cname])
+            save_schema(csv_file, schema)
+
+    if compact:
+        df = compact_dataframe(df, schema, parse_dates=parse_dates)
+    return df
+
+
+def init():
+    arg_parser = argparse.ArgumentParser(description="infer schema of csv file and store it into sidecar file",
+                                         formatter_class=argparse.RawDescriptionHelpFormatter,
+                                         epilog=textwrap.dedent('''
+remark:
+  Schema is inferred from sample records and is stored into '<csv file>.schema.json'.
+  The sidecar file is keyed by size and mtime of csv file, so it is used while csv file is not modified.
+  csv_tools, that read csv file with inference of dtypes, use this schema and skip inference.
+
+  'dtype' in schema is dtype to read, that is the same as result of default inference of pandas.read_csv.
+  'compact' is dtype to reduce memory: downcasted integer, float32 where lossless,
+  category for low-cardinality strings and datetime with detected format.
+
+example:
+  csv_schema.py big_sample_arb.csv
+  csv_schema.py --refresh --sample=1000 big_sample_arb.csv
+
+'''))
+    arg_parser.add_argument('-v', '--version', action='version', version='%(prog)s {}'.format(VERSION))
+
+    arg_parser.add_argument("--sample",
+                            dest="NSAMPLE",
+                            help="number of records to sample, default={}".format(SCHEMA_SAMPLE_SIZE),
+                            type=int,
+                            metavar="ROWS",
+                            default=SCHEMA_SAMPLE_SIZE)
+    arg_parser.add_argument("--refresh", dest="REFRESH", help="infer schema again", action="store_true", default=False)
+
+    arg_parser.add_argument('csv_file', metavar='CSV_FILE', help='files to read')
+
+    args = arg_parser.parse_args()
+    return args
+
+
+if __name__ == "__main__":
+    args = init()
+    csv_file = args.csv_file
+    n_sample = args.NSAMPLE
+    refresh = args.REFRESH
+
+    if csv_file == "-":
+        print("??Error:csv_schema:schema of stdin is not available", file=sys.stderr)
+        sys.exit(1)
+
+    schema = get_schema(csv_file, refresh=refresh, n_sample=n_sample)
+    json.dump(schema, sys.stdout, indent=1, ensure_ascii=False)
+    print("")
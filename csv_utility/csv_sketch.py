@@ -0,0 +1,629 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ----------------------------------------------------------------------
+# Name:         csv_sketch.py
+# Description:
+#    mergeable accumulators of statistics of columns for streaming reading of csv_tools.
+#    Mean and variance by Welford's method, min and max with positions, NA count, quantiles by KLL sketch,
+#    number of distinct values by HyperLogLog and counts of frequent values are kept with bounded memory.
+#
+# Author:       m.akei
+# Copyright:    (c) 2021 by m.na.akei
+# Time-stamp:   <2021-05-23 10:12:37>
+# Licence:
+#  Copyright (c) 2021 Masaharu N. Akei
+#
+#  This software is released under the MIT License.
+#    http://opensource.org/licenses/mit-license.php
+# ----------------------------------------------------------------------
+import argparse
+import textwrap
+import sys
+
+import numpy as np
+import pandas as pd
+
+VERSION = 1.0
+
+# parameter of KLL sketch, rank error of quantiles is about 1.7/KLL_K
+KLL_K = 2048
+# ratio of capacities of adjacent levels of KLL sketch
+KLL_C = 2 / 3
+# quantiles are exact until number of values exceeds this
+QUANTILE_EXACT_MAX = 100000
+# number of bits of hash for index of registers of HyperLogLog, relative error is about 1.04/sqrt(2**HLL_P)
+HLL_P = 14
+# number of distinct values is exact until it exceeds this
+DISTINCT_EXACT_MAX = 100000
+# duplicated rows are counted exactly until number of distinct rows exceeds this
+ROWS_EXACT_MAX = 10000000
+# max number of values to keep counts for top and mode
+COUNTS_MAX = 10000
+# multiplier to combine hashes of columns into hash of row
+ROW_HASH_PRIME = np.uint64(1099511628211)
+
+
+def new_quantile_sketch(k=KLL_K):
+    """empty sketch of quantiles
+
+    All values are kept in the first level until number of values exceeds QUANTILE_EXACT_MAX, then levels are compacted as KLL sketch.
+
+    :param k: capacity of the top level
+    :returns: sketch
+    :rtype: dict
+
+    """
+    return {"k": k, "n": 0, "exact": True, "levels": [np.empty(0)]}
+
+
+def level_capacity(sketch, level):
+    """capacity of level of KLL sketch
+
+    :param sketch: sketch of quantiles
+    :param level: level, 0 is the lowest level, whose values have weight 1.
+    :returns: capacity
+    :rtype: int
+
+    """
+    depth = len(sketch["levels"]) - 1 - level
+    return max(int(np.ceil(sketch["k"] * KLL_C**depth)), 2)
+
+
+def compact_levels(sketch):
+    """compact levels that exceed capacities, every other value of sorted level is moved into the next level with double weight
+
+    :param sketch: sketch of quantiles
+    :returns: sketch
+    :rtype: dict
+
+    """
+    levels = sketch["levels"]
+    rng = np.random.default_rng(sketch["n"])
+    while True:
+        over = [h for h in range(len(levels)) if len(levels[h]) > level_capacity(sketch, h)]
+        if len(over) == 0:
+            break
+        h = over[0]
+        # values that were moved are sorted, then stable sort is merge of sorted runs.
+        lv = np.sort(levels[h], kind="stable")
+        n_pair = len(lv) // 2 * 2
+        if h + 1 == len(levels):
+            levels.append(np.empty(0))
+        levels[h + 1] = np.concatenate([levels[h + 1], lv[rng.integers(2):n_pair:2]])
+        levels[h] = lv[n_pair:]
+    return sketch
+
+
+def update_quantile_sketch(sketch, values):
+    """add values into sketch of quantiles
+
+    :param sketch: sketch of quantiles
+    :param values: numpy.ndarray of float without NaN
+    :returns: sketch
+    :rtype: dict
+
+    """
+    if len(values) == 0:
+        return sketch
+    sketch["levels"][0] = np.concatenate([sketch["levels"][0], values])
+    sketch["n"] += len(values)
+    if sketch["exact"] and len(sketch["levels"][0]) <= QUANTILE_EXACT_MAX:
+        return sketch
+    sketch["exact"] = False
+    return compact_levels(sketch)
+
+
+def merge_quantile_sketch(sketch, other):
+    """merge sketch of quantiles into another
+
+    :param sketch: sketch of quantiles to update
+    :param other: sketch of quantiles
+    :returns: sketch
+    :rtype: dict
+
+    """
+    levels = sketch["levels"]
+    for h, lv in enumerate(other["levels"]):
+        if h == len(levels):
+            levels.append(np.empty(0))
+        levels[h] = np.concatenate([levels[h], lv])
+    sketch["n"] += other["n"]
+    sketch["exact"] = sketch["exact"] and other["exact"] and len(levels) == 1 and len(levels[0]) <= QUANTILE_EXACT_MAX
+    if not sketch["exact"]:
+        compact_levels(sketch)
+    return sketch
+
+
+def sketch_quantile(sketch, q):
+    """quantile by linear interpolation, as pandas.Series.quantile
+
+    :param sketch: sketch of quantiles
+    :param q: quantile, 0 <= q <= 1
+    :returns: value and flag whether value is approximate
+    :rtype: tuple
+
+    """
+    if sketch["n"] == 0:
+        return np.nan, False
+    if sketch["exact"]:
+        return float(np.quantile(sketch["levels"][0], q)), False
+    values = np.concatenate(sketch["levels"])
+    weights = np.concatenate([np.full(len(lv), 2.0**h) for h, lv in enumerate(sketch["levels"])])
+    order = np.argsort(values, kind="stable")
+    values = values[order]
+    weights = weights[order]
+    # each value stands for 'weight' values, its rank is the center of those.
+    ranks = np.cumsum(weights) - (weights + 1) / 2
+    return float(np.interp(q * (weights.sum() - 1), ranks, values)), True
+
+
+def new_distinct(exact_max=DISTINCT_EXACT_MAX):
+    """empty counter of distinct values
+
+    Hashes of values are kept until number of them exceeds 'exact_max', registers of HyperLogLog are always updated.
+
+    :param exact_max: max number of hashes to keep
+    :returns: counter
+    :rtype: dict
+
+    """
+    return {"exact_max": exact_max, "registers": np.zeros(2**HLL_P, dtype=np.uint8), "hashes": np.empty(0, dtype=np.uint64)}
+
+
+def update_distinct(distinct, hashes):
+    """add hashes of values into counter of distinct values
+
+    :param distinct: counter of distinct values
+    :param hashes: numpy.ndarray of uint64, hashes of values without NA
+    :returns: counter
+    :rtype: dict
+
+    """
+    if len(hashes) == 0:
+        return distinct
+    n_rest = 64 - HLL_P
+    idx = (hashes >> np.uint64(n_rest)).astype(np.intp)
+    rest = hashes & np.uint64((1 << n_rest) - 1)
+    # position of the first 1-bit in the rest bits, bit length by exponent is exact for values less than 2**53.
+    rank = n_rest + 1 - np.frexp(rest.astype(np.float64))[1]
+    np.maximum.at(distinct["registers"], idx, rank.astype(np.uint8))
+    if distinct["hashes"] is not None:
+        distinct["hashes"] = union_hashes(distinct["hashes"], np.unique(hashes), distinct["exact_max"])
+    return distinct
+
+
+def union_hashes(hashes, other, exact_max):
+    """union of sorted unique hashes
+
+    :param hashes: sorted unique hashes
+    :param other: sorted unique hashes
+    :param exact_max: max number of hashes to keep
+    :returns: sorted unique hashes or None if number of those exceeds 'exact_max'
+    :rtype: numpy.ndarray
+
+    """
+    merged = np.sort(np.concatenate([hashes, other]), kind="stable")
+    merged = merged[np.concatenate([[True], merged[1:] != merged[:-1]])]
+    return merged if len(merged) <= exact_max else None
+
+
+def merge_distinct(distinct, other):
+    """merge counter of distinct values into another
+
+    :param distinct: counter to update
+    :param other: counter
+    :returns: counter
+    :rtype: dict
+
+    """
+    np.maximum(distinct["registers"], other["registers"], out=distinct["registers"])
+    if distinct["hashes"] is not None and other["hashes"] is not None:
+        distinct["hashes"] = union_hashes(distinct["hashes"], other["hashes"], distinct["exact_max"])
+    else:
+        distinct["hashes"] = None
+    return distinct
+
+
+def distinct_count(distinct):
+    """number of distinct values
+
+    :param distinct: counter of distinct values
+    :returns: number and flag whether number is approximate
+    :rtype: tuple
+
+    """
+    if distinct["hashes"] is not None:
+        return len(distinct["hashes"]), False
+    registers = distinct["registers"]
+    m = len(registers)
+    alpha = 0.7213 / (1 + 1.079 / m)
+    estimate = alpha * m * m / np.sum(2.0**-registers.astype(np.float64))
+    n_zero = int(np.sum(registers == 0))
+    if estimate <= 2.5 * m and n_zero > 0:
+        # linear counting for small cardinality
+        estimate = m * np.log(m / n_zero)
+    return int(round(estimate)), True
+
+
+def new_counts():
+    """empty counts of values, keyed by hashes of values
+
+    :returns: counts
+    :rtype: dict
+
+    """
+    return {"keys": np.empty(0, dtype=np.uint64), "counts": np.empty(0, dtype=np.int64), "values": {}, "exact": True}
+
+
+def add_counts(counts, keys, n_values, values):
+    """add counts of hashes, only COUNTS_MAX values that have largest counts are kept
+
+    When counts were truncated, counts are lower bounds and flag of exact is cleared.
+
+    :param counts: counts of values
+    :param keys: numpy.ndarray of uint64, unique hashes
+    :param n_values: numpy.ndarray of counts of hashes
+    :param values: dict of hash and value, that has values of new hashes
+    :returns: counts
+    :rtype: dict
+
+    """
+    codes, keys = pd.factorize(np.concatenate([counts["keys"], keys]))
+    n_values = np.bincount(codes, weights=np.concatenate([counts["counts"], n_values]), minlength=len(keys)).astype(np.int64)
+    # ties are kept in order of appearance
+    order = np.argsort(-n_values, kind="stable")
+    if len(order) > COUNTS_MAX:
+        order = order[:COUNTS_MAX]
+        counts["exact"] = False
+    counts["keys"] = keys[order]
+    counts["counts"] = n_values[order]
+    old_values = counts["values"]
+    counts["values"] = {k: old_values[k] if k in old_values else values[k] for k in counts["keys"].tolist()}
+    return counts
+
+
+def update_counts(counts, hashes, values):
+    """add values into counts of values
+
+    :param counts: counts of values
+    :param hashes: numpy.ndarray of uint64, hashes of values without NA
+    :param values: numpy.ndarray of values without NA
+    :returns: counts
+    :rtype: dict
+
+    """
+    if len(hashes) == 0:
+        return counts
+    codes, keys = pd.factorize(hashes)
+    n_values = np.bincount(codes, minlength=len(keys))
+    if len(keys) > COUNTS_MAX:
+        top = np.argsort(-n_values, kind="stable")[:COUNTS_MAX]
+        keys = keys[top]
+        n_values = n_values[top]
+        counts["exact"] = False
+        codes_top = pd.Index(keys).get_indexer(hashes)
+    else:
+        codes_top = codes
+    # position of the first appearance of each hash
+    first = np.empty(len(keys), dtype=np.intp)
+    pos = np.flatnonzero(codes_top >= 0)
+    first[codes_top[pos[::-1]]] = pos[::-1]
+    return add_counts(counts, keys, n_values, dict(zip(keys.tolist(), values[first].tolist())))
+
+
+def merge_counts(counts, other):
+    """merge counts of values into another
+
+    :param counts: counts to update
+    :param other: counts
+    :returns: counts
+    :rtype: dict
+
+    """
+    add_counts(counts, other["keys"], other["counts"], other["values"])
+    counts["exact"] = counts["exact"] and other["exact"]
+    return counts
+
+
+def column_kind(ps):
+    """kind of accumulator for column
+
+    :param ps: pandas.Series
+    :returns: 'numeric' or 'object', boolean is 'object' as pandas.Series.describe
+    :rtype: str
+
+    """
+    if pd.api.types.is_numeric_dtype(ps) and not pd.api.types.is_bool_dtype(ps):
+        return "numeric"
+    return "object"
+
+
+def new_column_stats(kind):
+    """empty accumulator of statistics of column
+
+    :param kind: 'numeric' or 'object'
+    :returns: accumulator
+    :rtype: dict
+
+    """
+    return {
+        "kind": kind,
+        "dtype": None,
+        "n": 0,
+        "n_na": 0,
+        "n_coerced": 0,
+        "mean": 0.0,
+        "m2": 0.0,
+        "sum": 0,
+        "min": None,
+        "max": None,
+        "pos_min": None,
+        "pos_max": None,
+        "quantiles": new_quantile_sketch(),
+        "distinct": new_distinct(),
+        "counts": new_counts()
+    }
+
+
+def merge_moments(stats, n, mean, m2):
+    """merge count, mean and sum of squared deviations into accumulator, by Chan's formula of Welford's method
+
+    :param stats: accumulator
+    :param n: number of values
+    :param mean: mean of values
+    :param m2: sum of squared deviations from mean
+    :returns: accumulator
+    :rtype: dict
+
+    """
+    if n == 0:
+        return stats
+    n_a = stats["n"]
+    n_t = n_a + n
+    delta = mean - stats["mean"]
+    stats["mean"] += delta * n / n_t
+    stats["m2"] += m2 + delta * delta * n_a * n / n_t
+    stats["n"] = n_t
+    return stats
+
+
+def update_column_stats(stats, ps):
+    """add values of column in a chunk into accumulator
+
+    For numeric accumulator, values that are not numeric in later chunk are counted as NA.
+
+    :param stats: accumulator
+    :param ps: pandas.Series, index is position of row in file.
+    :returns: hashes of all values in chunk, to count duplicated rows.
+    :rtype: numpy.ndarray
+
+    """
+    if stats["dtype"] is None:
+        stats["dtype"] = str(ps.dtype)
+    if stats["kind"] == "numeric":
+        if column_kind(ps) != "numeric":
+            n_na = int(ps.isna().sum())
+            ps = pd.to_numeric(ps.astype(object).where(ps.notna(), np.nan), errors="coerce")
+            stats["n_coerced"] += int(ps.isna().sum()) - n_na
+        if pd.api.types.is_float_dtype(ps) and not stats["dtype"].startswith("float"):
+            stats["dtype"] = "float64"
+        values = ps.to_numpy(dtype=np.float64, na_value=np.nan)
+        is_na = np.isnan(values)
+        valid = values[~is_na]
+        if len(valid) > 0:
+            mean = valid.mean()
+            merge_moments(stats, len(valid), mean, float(np.sum((valid - mean)**2)))
+            stats["sum"] += ps.sum(skipna=True)
+            pos = np.flatnonzero(~is_na)
+            i_min = pos[np.argmin(valid)]
+            i_max = pos[np.argmax(valid)]
+            if stats["min"] is None or ps.iloc[i_min] < stats["min"]:
+                stats["min"] = ps.iloc[i_min]
+                stats["pos_min"] = ps.index[i_min]
+            if stats["max"] is None or ps.iloc[i_max] > stats["max"]:
+                stats["max"] = ps.iloc[i_max]
+                stats["pos_max"] = ps.index[i_max]
+            update_quantile_sketch(stats["quantiles"], valid)
+        # integer and float of the same value have the same hash.
+        hashes = pd.util.hash_array(values)
+    else:
+        values = ps.to_numpy(dtype=object)
+        is_na = ps.isna().to_numpy()
+        stats["n"] += int(len(values) - is_na.sum())
+        hashes = pd.util.hash_array(values)
+    stats["n_na"] += int(is_na.sum())
+    update_distinct(stats["distinct"], hashes[~is_na])
+    update_counts(stats["counts"], hashes[~is_na], ps.to_numpy()[~is_na])
+    return hashes
+
+
+def merge_column_stats(stats, other):
+    """merge accumulator of column into another, for example results of chunks in parallel
+
+    :param stats: accumulator to update
+    :param other: accumulator
+    :returns: accumulator
+    :rtype: dict
+
+    """
+    if stats["dtype"] is None:
+        stats["dtype"] = other["dtype"]
+    for key in ["n_na", "n_coerced"]:
+        stats[key] += other[key]
+    if stats["kind"] == "numeric":
+        merge_moments(stats, other["n"], other["mean"], other["m2"])
+        stats["sum"] += other["sum"]
+        if other["min"] is not None and (stats["min"] is None or other["min"] < stats["min"]):
+            stats["min"] = other["min"]
+            stats["pos_min"] = other["pos_min"]
+        if other["max"] is not None and (stats["max"] is None or other["max"] > stats["max"]):
+            stats["max"] = other["max"]
+            stats["pos_max"] = other["pos_max"]
+        merge_quantile_sketch(stats["quantiles"], other["quantiles"])
+    else:
+        stats["n"] += other["n"]
+    merge_distinct(stats["distinct"], other["distinct"])
+    merge_counts(stats["counts"], other["counts"])
+    return stats
+
+
+def column_summary(stats):
+    """summary of accumulator of column
+
+    :param stats: accumulator
+    :returns: values and set of names of values that are approximate.
+              count, nunique, top, freq, mode, NA for all columns,
+              mean, std, min, 25%, 50%, 75%, max, sum, pos_min, pos_max for numeric columns.
+    :rtype: tuple
+
+    """
+    approx = set()
+    result = {"count": stats["n"], "NA": stats["n_na"]}
+    result["nunique"], is_approx = distinct_count(stats["distinct"])
+    if is_approx:
+        approx.add("nunique")
+
+    counts = stats["counts"]
+    if not counts["exact"]:
+        approx.update(["top", "freq", "mode"])
+    if len(counts["keys"]) > 0:
+        result["top"] = counts["values"][int(counts["keys"][0])]
+        result["freq"] = int(counts["counts"][0])
+        result["mode"] = sorted([counts["values"][k] for k in counts["keys"][counts["counts"] == counts["counts"][0]].tolist()])
+    else:
+        result["top"] = np.nan
+        result["freq"] = np.nan
+        result["mode"] = []
+
+    if stats["kind"] == "numeric":
+        n = stats["n"]
+        result["mean"] = stats["mean"] if n > 0 else np.nan
+        result["std"] = np.sqrt(stats["m2"] / (n - 1)) if n > 1 else np.nan
+        result["min"] = stats["min"] if n > 0 else np.nan
+        for q in [0.25, 0.5, 0.75]:
+            q_name = "{:g}%".format(q * 100)
+            result[q_name], is_approx = sketch_quantile(stats["quantiles"], q)
+            if is_approx:
+                approx.add(q_name)
+        result["max"] = stats["max"] if n > 0 else np.nan
+        result["sum"] = stats["sum"]
+        result["pos_min"] = stats["pos_min"]
+        result["pos_max"] = stats["pos_max"]
+    return result, approx
+
+
+def new_frame_stats():
+    """empty accumulator of statistics of data frame
+
+    :returns: accumulator
+    :rtype: dict
+
+    """
+    return {"n_rows": 0, "columns": {}, "rows": new_distinct(exact_max=ROWS_EXACT_MAX)}
+
+
+def update_frame_stats(f_stats, df):
+    """add chunk of data frame into accumulator
+
+    Kind of accumulator of each column is decided by the first chunk.
+
+    :param f_stats: accumulator of data frame
+    :param df: pandas.DataFrame, chunk
+    :returns: accumulator
+    :rtype: dict
+
+    """
+    row_hashes = np.zeros(len(df), dtype=np.uint64)
+    for cname in df.columns:
+        if cname not in f_stats["columns"]:
+            f_stats["columns"][cname] = new_column_stats(column_kind(df[cname]))
+        hashes = update_column_stats(f_stats["columns"][cname], df[cname])
+        row_hashes = row_hashes * ROW_HASH_PRIME ^ hashes
+    update_distinct(f_stats["rows"], row_hashes)
+    f_stats["n_rows"] += len(df)
+    return f_stats
+
+
+def merge_frame_stats(f_stats, other):
+    """merge accumulator of data frame into another
+
+    :param f_stats: accumulator to update
+    :param other: accumulator
+    :returns: accumulator
+    :rtype: dict
+
+    """
+    for cname, stats in other["columns"].items():
+        if cname not in f_stats["columns"]:
+            f_stats["columns"][cname] = new_column_stats(stats["kind"])
+        merge_column_stats(f_stats["columns"][cname], stats)
+    merge_distinct(f_stats["rows"], other["rows"])
+    f_stats["n_rows"] += other["n_rows"]
+    return f_stats
+
+
+def duplicated_rows(f_stats):
+    """number of duplicated rows, as len(df[df.duplicated()])
+
+    :param f_stats: accumulator of data frame
+    :returns: number and flag whether number is approximate
+    :rtype: tuple
+
+    """
+    n_distinct, is_approx = distinct_count(f_stats["rows"])
+    return max(f_stats["n_rows"] - n_distinct, 0), is_approx
+
+
+def init():
+    arg_parser = argparse.ArgumentParser(description="statistics of columns of csv file by streaming accumulators",
+                                         formatter_class=argparse.RawDescriptionHelpFormatter,
+                                         epilog=textwrap.dedent('''
+remark:
+  csv file is read once by chunks, and accumulators of each column are updated with chunk, then memory does not depend on size of file.
+  Mean and standard deviation are computed by Welford's method, min and max are kept with positions of rows.
+  Quantiles are exact until number of values exceeds {}, then KLL sketch is used, its rank error is about {:.2%}.
+  Number of distinct values is exact until it exceeds {}, then HyperLogLog is used, its relative error is about {:.2%}.
+  Top values and their counts are exact until number of distinct values exceeds {}.
+  Column 'approximate' has names of values that are approximate.
+  csv_status.py uses those accumulators with '--chunksize'.
+
+example:
+  csv_sketch.py big_sample_arb.csv
+  csv_sketch.py --chunksize=100000 --columns=ABC001,ABC002 big_sample_arb.csv
+
+'''.format(QUANTILE_EXACT_MAX, 1.7 / KLL_K, DISTINCT_EXACT_MAX, 1.04 / np.sqrt(2**HLL_P), COUNTS_MAX)))
+    arg_parser.add_argument('-v', '--version', action='version', version='%(prog)s {}'.format(VERSION))
+
+    arg_parser.add_argument("--chunksize",
+                            dest="CHUNKSIZE",
+                            help="number of rows in each chunk, default=1000000",
+                            type=int,
+                            metavar="ROWS",
+                            default=1000000)
+    arg_parser.add_argument("--columns", dest="COLUMNS", help="names of columns as csv format", type=str, metavar="COLUMNS", default=None)
+
+    arg_parser.add_argument('csv_file', metavar='CSV_FILE', help="file to read, if '-', stdin is used")
+
+    args = arg_parser.parse_args()
+    return args
+
+
+if __name__ == "__main__":
+    args = init()
+    csv_file = sys.stdin if args.csv_file == "-" else args.csv_file
+    usecols = None if args.COLUMNS is None else args.COLUMNS.split(",")
+
+    if args.CHUNKSIZE < 1:
+        print("??error:csv_sketch:invalid chunksize:{}".format(args.CHUNKSIZE), file=sys.stderr)
+        sys.exit(1)
+
+    f_stats = new_frame_stats()
+    for df in pd.read_csv(csv_file, chunksize=args.CHUNKSIZE, usecols=usecols):
+        update_frame_stats(f_stats, df)
+
+    keys = ["count", "NA", "nunique", "top", "freq", "mean", "std", "min", "25%", "50%", "75%", "max"]
+    records = []
+    for cname, stats in f_stats["columns"].items():
+        summary, approx = column_summary(stats)
+        records.append([cname, stats["kind"]] + [summary.get(k) for k in keys] + ["|".join(sorted(approx))])
+    pd.DataFrame(records, columns=["column", "kind"] + keys + ["approximate"]).to_csv(sys.stdout, index=False)
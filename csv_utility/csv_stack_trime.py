@@ -20,7 +20,7 @@ import re
 
 from pathlib import Path
 
-import pandas as pd
+sys.path.insert(0, format(Path(__file__).parent))
 
 VERSION = 1.0
 
@@ -124,6 +124,11 @@ example2:
                             default=None)
 
     arg_parser.add_argument("--output", dest="OUTPUT", help="path of output file", type=str, metavar="FILE", default=None)
+    arg_parser.add_argument("--output_format",
+                            dest="OFORMAT",
+                            help="format of output, 'arrow_stream' is Arrow IPC stream for other csv_tools, default=csv",
+                            choices=["csv", "arrow_stream"],
+                            default="csv")
 
     arg_parser.add_argument('csv_file', metavar='CSV_FILE', help='files to read, if empty, stdin is used')
     args = arg_parser.parse_args()
@@ -179,8 +184,13 @@ def read_defs_from_file(path_of_defs):
 
 if __name__ == "__main__":
     args = init()
+    import pandas as pd
+    from csv_schema import read_csv_with_schema
+    from csv_arrow import write_dataframe
+
     csv_file = args.csv_file
     output_file = args.OUTPUT
+    output_format = args.OFORMAT
     col_definitions = args.DEFN
     inc_cols_s = args.INC_COLS
     output_cols_s = args.OUTPUT_COLS
@@ -211,7 +221,7 @@ if __name__ == "__main__":
 
     new_cs, trans_tables = parse_columns(col_defs)
 
-    csv_df = pd.read_csv(csv_file)
+    csv_df = read_csv_with_schema(csv_file)
 
     # check names of columns
     for col in list(trans_tables.keys()) + inc_cols:
@@ -243,6 +253,6 @@ if __name__ == "__main__":
         cols = output_cols
     else:
         cols = sorted(res_df.columns)
-    res_df.to_csv(output_file, index=False, columns=cols)
+    write_dataframe(res_df[cols], output_file, output_format, index=False)
     if output_file != sys.stdout:
         print("-- {} was created.".format(output_file), file=sys.stderr)
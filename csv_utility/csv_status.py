@@ -18,13 +18,13 @@ import textwrap
 import sys
 # import pprint
 
-import pandas as pd
-from distutils.version import LooseVersion
+import re
+import itertools
+
+from pathlib import Path
+sys.path.insert(0, format(Path(__file__).parent))
 
 PANDAS_MIN_VERSION = "1.1.3"
-if LooseVersion(PANDAS_MIN_VERSION) > LooseVersion(pd.__version__):
-    print("??Error:csv_uty:padnas version must be newer than {}.".format(PANDAS_MIN_VERSION), file=sys.stderr)
-    sys.exit(1)
 
 VERSION = 1.0
 
@@ -58,9 +58,26 @@ MODE_TABLE_DESC = {
     "negative": "Coount elements over index, that have less than 0",
 }
 MODE_TABLE = list(MODE_TABLE_DESC.keys())
+# modes those results do not have one value for each column.
+MODE_ONLY_ALONE = ["mode", "rank", "cumsum", "cumprod"]
+MODE_QUANTILE = {"quantile25": 0.25, "quantile50": 0.50, "quantile75": 0.75}
+# method of pandas.DataFrame to make mask for each threshold mode.
+MODE_THRESHOLD = {"morethan": "gt", "lessthan": "lt", "positive": "gt", "negative": "lt", "notzero": "ne", "zero": "eq"}
+NUMERIC_DTYPES = ['int16', 'int32', 'int64', 'float16', 'float32', 'float64']
+
 
+def version_tuple(version):
+    """numbers in version string, to compare versions
 
-def init():
+    :param version: version string, ex. '1.1.3'
+    :returns: tuple of numbers
+    :rtype: tuple
+
+    """
+    return tuple([int(v) for v in re.findall(r"\d+", version)[:3]])
+
+
+def init(argv=None):
 
     mode_help = ""
     for k, v in MODE_TABLE_DESC.items():
@@ -75,15 +92,36 @@ remark:
 
   With '--group', each histogram is made of value grouped by given group column.  
 
+  '--mode' accepts some modes as csv format, and all of them are computed from the same data and the same group.
+  Quantiles are computed by one call, and threshold modes(notzero, zero, morethan, lessthan, positive, negative) are
+  counted by vectorized masks at once. 'mode', 'rank', 'cumsum' and 'cumprod' must be given alone.
+  For 'morethan' and 'lessthan', '--arguments' gives thresholds in order of these modes, one value is used for both.
+  With '--mode_layout=wide', result has columns of modes without '--group',
+  and has columns 'COLUMN_MODE' with '--group'.
+  With '--mode_layout=long', result has rows of 'column,mode,value' for each column(and each group with '--group').
+
   description of mode:
 {}
 
+  With '--chunksize', csv file is read once by chunks of the given number of rows, and statistics are computed by
+  mergeable accumulators of each column(see csv_sketch.py), then memory does not depend on size of file.
+  The report has the same layout as one without '--chunksize', and approximate values are marked with '~'.
+  Quantiles, number of unique values, top, freq, mode and duplicated rows are approximate for large data,
+  those are exact until limits that are printed by 'csv_sketch.py --help'. '--chunksize' is available only without '--mode'.
+  Kind of each column is decided by the first chunk, values that are not numeric in later chunks of numeric column are counted as NA.
+
+  When environment variable 'CSV_TOOLS_CACHE_DIR' is defined, parsed data is stored into the cache and is used by later reading,
+  see 'csv_cache.py --help'. '--no_cache' disables the cache, '--refresh_cache' makes the cache again.
+
 example:
   csv_status.py --mode morethan --arguments=3740 bit-pattern-headers.csv
   csv_uty.py --change_timefreq='D=ABC002:%Y-%m-%d %H\:%M\:%S:floor:10s' bit-pattern-headers.csv|\\
      csv_status.py --mode sum --group D -|csv_uty.py --drop_columns=ABC000,ABC001 - |\\
      csv_trimtime.py --stack=D - |csv_plot_bar.py --output=test.html --animation_column=D - category stacked_result
 
+  csv_status.py --mode count,avg,std,min,max,quantile25,quantile50,quantile75,nunique --group ABC004 big_sample_headers.csv
+  csv_status.py --mode morethan,lessthan --arguments=3740,100 --mode_layout=long bit-pattern-headers.csv
+  csv_status.py --chunksize=1000000 big_sample_arb.csv
   csv_status.py --columns=2,5 big_sample_headers.csv
   == information for columns: ABC001
   count    1116.000000
@@ -116,7 +154,17 @@ example:
                             metavar='COLUMNS',
                             default=None)
 
-    arg_parser.add_argument("--mode", dest="MODE", help="name of columns to make group", choices=MODE_TABLE, default=None)
+    arg_parser.add_argument("--mode",
+                            dest="MODE",
+                            help="modes of statistics as csv format, see remark",
+                            type=str,
+                            metavar="MODE[,MODE...]",
+                            default=None)
+    arg_parser.add_argument("--mode_layout",
+                            dest="MODE_LAYOUT",
+                            help="layout of result for '--mode' with modes more than one, default=wide",
+                            choices=["wide", "long"],
+                            default="wide")
     arg_parser.add_argument("--group",
                             dest="GCOLUMN",
                             help="name of columns to make group with '--mode'",
@@ -125,15 +173,32 @@ example:
                             default=None)
     arg_parser.add_argument("--arguments", dest="OPTARGS", help="arguments for some mode", type=str, metavar="ARG[,ARG...]", default=None)
 
+    arg_parser.add_argument("--chunksize",
+                            dest="CHUNKSIZE",
+                            help="number of rows in each chunk to compute statistics by streaming accumulators, see remark",
+                            type=int,
+                            metavar="ROWS",
+                            default=0)
+    arg_parser.add_argument("--no_cache", dest="NO_CACHE", help="not use cache of parsed data", action="store_true", default=False)
+    arg_parser.add_argument("--refresh_cache",
+                            dest="REFRESH_CACHE",
+                            help="make cache of parsed data again",
+                            action="store_true",
+                            default=False)
     arg_parser.add_argument("--output",
                             dest="OUTPUT",
                             help="path of output csv file, default=stdout",
                             type=str,
                             metavar='FILE',
                             default=sys.stdout)
+    arg_parser.add_argument("--output_format",
+                            dest="OFORMAT",
+                            help="format of output with '--mode', 'arrow_stream' is Arrow IPC stream for other csv_tools, default=csv",
+                            choices=["csv", "arrow_stream"],
+                            default="csv")
 
     arg_parser.add_argument('csv_file', metavar='CSV_FILE', help='files to read, if empty, stdin is used')
-    args = arg_parser.parse_args()
+    args = arg_parser.parse_args(argv)
     return args
 
 
@@ -179,7 +244,8 @@ def series_statistics(ps):
     print("")
 
 
-def entire_status(csv_df, output, col_list):
+def entire_status(csv_df, output, col_list, csv_file):
+    import pandas as pd
     # for each columns
     if len(col_list) > 0:
         cnames = csv_df.columns
@@ -207,113 +273,385 @@ def entire_status(csv_df, output, col_list):
         print(csv_df.isnull().sum(), file=output)
 
 
-def status_by_mode(df, output, mode, group_col, opt_args):
+def approximate_value(value, is_approx):
+    """value with mark of approximation
+
+    :param value: value
+    :param is_approx: True if value is approximate
+    :returns: value or string that has '~' before value
+    :rtype: object
+
+    """
+    if not is_approx:
+        return value
+    if isinstance(value, float):
+        return "~{:.6g}".format(value)
+    return "~{}".format(value)
+
+
+def sketch_describe(f_stats, cnames):
+    """result of describe(include='all') by accumulators of columns
+
+    :param f_stats: accumulator of data frame, see csv_sketch.py
+    :param cnames: names of columns
+    :returns: pandas.DataFrame, approximate values are strings with '~'.
+    :rtype: pandas.DataFrame
+
+    """
+    import pandas as pd
+    from csv_sketch import column_summary
+    kinds = [f_stats["columns"][cn]["kind"] for cn in cnames]
+    rows = ["count"]
+    if "object" in kinds:
+        rows.extend(["unique", "top", "freq"])
+    if "numeric" in kinds:
+        rows.extend(["mean", "std", "min", "25%", "50%", "75%", "max"])
+    table = {}
+    for cn in cnames:
+        summary, approx = column_summary(f_stats["columns"][cn])
+        summary["unique"] = summary["nunique"]
+        if "nunique" in approx:
+            approx.add("unique")
+        if f_stats["columns"][cn]["kind"] == "numeric":
+            keys = ["count", "mean", "std", "min", "25%", "50%", "75%", "max"]
+        else:
+            keys = ["count", "unique", "top", "freq"]
+        table[cn] = {k: approximate_value(summary[k], k in approx) for k in keys}
+    return pd.DataFrame(table, index=rows, columns=cnames)
+
+
+def sketch_statistics(stats, cname, output):
+    """print statistics by accumulator of column, as series_statistics
+
+    :param stats: accumulator of column, see csv_sketch.py
+    :param cname: name of column
+    :param output: file object to print
+
+    """
+    import pandas as pd
+    from csv_sketch import column_summary
+    summary, approx = column_summary(stats)
+    if stats["kind"] == "object":
+        summary["unique"] = summary["nunique"]
+        keys = ["count", "unique", "top", "freq"]
+        approx.update(["unique"] if "nunique" in approx else [])
+    else:
+        keys = ["count", "mean", "std", "min", "25%", "50%", "75%", "max"]
+    print(pd.Series({k: approximate_value(summary[k], k in approx) for k in keys}, name=cname), file=output)
+
+    if stats["kind"] == "object":
+        print("-- unique values:", file=output)
+        counts = stats["counts"]
+        vcs = [(counts["values"][k], int(v)) for k, v in zip(counts["keys"].tolist(), counts["counts"])]
+        if not counts["exact"]:
+            print("#warn:csv_status:counts of values are approximate, only {} values are kept".format(len(vcs)), file=sys.stderr)
+        if len(vcs) > 10:
+            print("#Warning:csv_status:too many uniqe values:{}".format(approximate_value(summary["nunique"], "nunique" in approx)),
+                  file=sys.stderr)
+            max_print = 10
+            print("\n".join([str(v) for v in vcs[:max_print]]), file=output)
+            if len(vcs) - max_print > max_print:
+                print(":\n:", file=output)
+                print("\n".join([str(v) for v in vcs[-max_print:]]), file=output)
+            else:
+                print(vcs[max_print:], file=output)
+        else:
+            print("\n".join([str(v) for v in vcs]), file=output)
+
+    else:
+        print("maximum value: pos={}, value={}".format(summary["pos_max"], summary["max"]), file=output)
+        print("minimum value: pos={}, value={}".format(summary["pos_min"], summary["min"]), file=output)
+        print("summarize    : value={}".format(summary["sum"]), file=output)
+        print("median       : value={}".format(approximate_value(summary["50%"], "50%" in approx)), file=output)
+        if len(summary["mode"]) > 10:
+            print("mode         : too many", file=output)
+        else:
+            print("mode         : value={}".format(approximate_value(summary["mode"], "mode" in approx)), file=output)
+
+    print("NA count     : {}".format(summary["NA"]), file=output)
+    if stats["n_coerced"] > 0:
+        print("#warn:csv_status:{}:{} values that are not numeric were counted as NA".format(cname, stats["n_coerced"]), file=sys.stderr)
+    print("", file=output)
+
+
+def sketch_status(csv_reader, output, col_list, csv_file):
+    """print statistics of csv file read by chunks, with streaming accumulators of csv_sketch.py, as entire_status
+
+    :param csv_reader: iterator of chunks of pandas.DataFrame
+    :param output: file object to print
+    :param col_list: names of columns, if empty, status of all columns is printed.
+    :param csv_file: name of csv file
+
+    """
+    import pandas as pd
+    from csv_sketch import new_frame_stats, update_frame_stats, duplicated_rows
+    f_stats = new_frame_stats()
+    n_chunks = 0
+    for df in csv_reader:
+        update_frame_stats(f_stats, df[col_list] if len(col_list) > 0 else df)
+        n_chunks += 1
+    print("%inf:csv_status:streaming mode:number of chunks={}:number of rows={}".format(n_chunks, f_stats["n_rows"]), file=sys.stderr)
+
+    if len(col_list) > 0:
+        for cn in col_list:
+            stats = f_stats["columns"][cn]
+            print("== information for columns:{} of {}".format(cn, csv_file), file=output)
+            print("dtype   {}".format(stats["dtype"]), file=output)
+            sketch_statistics(stats, cn, output)
+    else:
+        cnames = list(f_stats["columns"].keys())
+        n_dup, dup_approx = duplicated_rows(f_stats)
+        pd.set_option('display.max_rows', 500)
+        pd.set_option('display.max_columns', 500)
+        pd.set_option('display.width', 1000)
+        print("==== csv file: {}".format(csv_file), file=output)
+        print("-- number of rows   : {}".format(f_stats["n_rows"]), file=output)
+        print("-- number of columsn: {}".format(len(cnames)), file=output)
+        print("-- duplicated rows  : {}".format(approximate_value(n_dup, dup_approx)), file=output)
+        print("-- statistical information for each column", file=output)
+        print(sketch_describe(f_stats, cnames), file=output)
+        print("-- NA count", file=output)
+        print(pd.Series({cn: f_stats["columns"][cn]["n_na"] for cn in cnames}, dtype="int64"), file=output)
+        for cn in cnames:
+            if f_stats["columns"][cn]["n_coerced"] > 0:
+                print("#warn:csv_status:{}:{} values that are not numeric were counted as NA".format(cn, f_stats["columns"][cn]["n_coerced"]),
+                      file=sys.stderr)
+
+
+def threshold_counts(df, modes, group_col, thresholds):
+    """count elements of numeric columns by vectorized masks for threshold modes
+
+    :param df: pandas.DataFrame
+    :param modes: list of threshold modes, see MODE_THRESHOLD
+    :param group_col: name of column to make group or None
+    :param thresholds: dict of threshold for each mode
+    :returns: dict of result for each mode, pandas.Series without group, pandas.DataFrame with group
+    :rtype: dict
+
+    """
+    import pandas as pd
+    n_df = df.select_dtypes(include=NUMERIC_DTYPES)
+    if group_col is not None and group_col in n_df.columns:
+        n_df = n_df.drop(columns=group_col)
+    print("%inf:csv_status:if mode={}, only columns that have numeric values were selected:{}".format(",".join(modes), list(n_df.columns)),
+          file=sys.stderr)
+
+    # masks of all modes are stacked in one data frame and are counted at once.
+    masks = {md: getattr(n_df, MODE_THRESHOLD[md])(thresholds[md]) for md in modes}
+    if "notzero" in masks:
+        masks["notzero"] &= n_df.notna()
+    m_df = pd.concat(masks, axis=1)
+    if group_col is None:
+        c_df = m_df.sum()
+        return {md: c_df[md] if md in c_df.index else pd.Series(dtype="int64") for md in modes}
+    c_df = m_df.groupby(df[group_col]).sum()
+    return {md: c_df[md] if md in c_df.columns else pd.DataFrame(index=c_df.index) for md in modes}
+
+
+def threshold_values(modes, opt_args):
+    """thresholds for threshold modes
+
+    :param modes: list of modes
+    :param opt_args: list of arguments given by '--arguments', those are used by 'morethan' and 'lessthan' in order of modes.
+    :returns: dict of threshold for each threshold mode
+    :rtype: dict
+
+    """
+    thresholds = {"positive": 0, "negative": 0, "notzero": 0, "zero": 0}
+    a_modes = [md for md in modes if md in ["morethan", "lessthan"]]
+    if len(a_modes) > 0 and len(opt_args) == 0:
+        print("??error:csv_status:for {}, '--arguments' is required.".format(",".join(a_modes)), file=sys.stderr)
+        sys.exit(1)
+    for ii, md in enumerate(a_modes):
+        thresholds[md] = float(opt_args[min(ii, len(opt_args) - 1)])
+    return thresholds
+
+
+def mode_table(results, modes, cnames, group_col, layout):
+    """table of results of modes more than one
+
+    :param results: dict of result for each mode
+    :param modes: list of modes
+    :param cnames: names of columns of input to keep order of columns
+    :param group_col: name of column to make group or None
+    :param layout: 'wide' or 'long'
+    :returns: table of results
+    :rtype: pandas.DataFrame
+
+    """
+    import numpy as np
+    import pandas as pd
+    if group_col is None:
+        # values are kept as they are, counts are not converted into float by missing values of other columns.
+        w_df = pd.concat([results[md].rename(md).astype(object) for md in modes], axis=1)
+        w_df = w_df.reindex([cn for cn in cnames if cn in w_df.index])
+        w_df.index.name = "column"
+        if layout == "wide":
+            return w_df
+        pairs = [(cn, md) for cn in w_df.index for md in modes if cn in results[md].index]
+        return pd.DataFrame({
+            "mode": [md for _, md in pairs],
+            "value": np.array([w_df.at[cn, md] for cn, md in pairs], dtype=object)
+        },
+                            index=pd.Index([cn for cn, _ in pairs], name="column"))
+
+    w_df = pd.concat(results, axis=1)
+    pairs = [(md, cn) for cn in cnames for md in modes if (md, cn) in w_df.columns]
+    w_df = w_df[pairs]
+    if layout == "wide":
+        w_df.columns = ["{}_{}".format(cn, md) for md, cn in pairs]
+        return w_df
+    n_rows = len(w_df)
+    return pd.DataFrame(
+        {
+            "column": np.tile([cn for _, cn in pairs], n_rows),
+            "mode": np.tile([md for md, _ in pairs], n_rows),
+            "value": w_df.to_numpy(dtype=object).ravel()
+        },
+        index=pd.Index(np.repeat(w_df.index.to_numpy(), len(pairs)), name=group_col))
+
+
+def status_by_mode(df, output, modes, group_col, opt_args, layout="wide", output_format="csv"):
+    """statistics by modes, all modes are computed from one groupby
+
+    :param df: pandas.DataFrame
+    :param output: output stream
+    :param modes: list of modes, see MODE_TABLE
+    :param group_col: name of column to make group or None
+    :param opt_args: list of arguments for some modes
+    :param layout: 'wide' or 'long', layout of result for modes more than one
+    :param output_format: 'csv' or 'arrow_stream'
+
+    """
+    if len(modes) > 1:
+        a_modes = [md for md in modes if md in MODE_ONLY_ALONE]
+        if len(a_modes) > 0:
+            print("??error:csv_status:mode must be given alone:{}".format(",".join(a_modes)), file=sys.stderr)
+            sys.exit(1)
 
     if group_col is not None:
         w_df = df.groupby(group_col)
     else:
         w_df = df
 
-    if mode == "positive" or mode == "negative":
-        opt_args = [0]
-
-    if mode == "count":
-        r_df = w_df.count()
-    elif mode == "sum":
-        r_df = w_df.sum(numeric_only=True)
-    elif mode == "avg":
-        r_df = w_df.mean(numeric_only=True)
-    elif mode == "std":
-        r_df = w_df.std()
-    elif mode == "min":
-        r_df = w_df.min(numeric_only=True)
-    elif mode == "max":
-        r_df = w_df.max(numeric_only=True)
-    elif group_col is None and mode == "mode":
-        r_df = w_df.mode(numeric_only=True)
-    elif group_col is not None and mode == "mode":
-        r_df = w_df.apply(lambda x: x.mode())
-    elif mode == "median":
-        r_df = w_df.median(numeric_only=True)
-    elif mode == "rank":
-        r_df = w_df.rank()
-    elif mode == "sem":
-        r_df = w_df.sem()
-    elif mode == "skew":
-        r_df = w_df.skew(numeric_only=True)
-    elif mode == "var":
-        r_df = w_df.var()
-    elif group_col is None and mode == "mad":
-        r_df = w_df.mad(axis=0, skipna=True)
-    elif group_col is None and mode == "kurt":
-        r_df = w_df.kurt(axis=0, skipna=True, numeric_only=True)
-    elif mode == "quantile25":
-        r_df = w_df.quantile(q=0.25)
-    elif mode == "quantile50":
-        r_df = w_df.quantile(q=0.50)
-    elif mode == "quantile75":
-        r_df = w_df.quantile(q=0.75)
-    elif mode == "nunique":
-        r_df = w_df.nunique()
-    elif mode == "cumsum":
-        r_df = w_df.cumsum(axis=0, skipna=True)
-    elif mode == "cumprod":
-        r_df = w_df.cumsum(axis=0, skipna=True)
-    elif mode == "vrange":
-        r_df = w_df.max(numeric_only=True) - w_df.min(numeric_only=True)
-    elif mode == "notzero":
-        w_df = w_df.select_dtypes(include=['int16', 'int32', 'int64', 'float16', 'float32', 'float64'])
-        # w_df = w_df.where(w_df == 0, 1)
-        w_df = w_df.mask(w_df > 0, 1)
-        r_df = w_df.sum()
-    elif mode == "zero":
-        w_df = w_df.select_dtypes(include=['int16', 'int32', 'int64', 'float16', 'float32', 'float64'])
-        # w_df = w_df.where(w_df == 0, 1)
-        w_df = w_df.mask(w_df > 0, 1).apply(lambda x: 1 - x)
-        r_df = w_df.sum()
-    elif mode == "morethan" or mode == "positive":
-        if len(opt_args) == 0:
-            print("??error:csv_status:for {}, '--arguments' is required.".format(mode), file=sys.stderr)
-            sys.exit(1)
-        w_df = w_df.select_dtypes(include=['int16', 'int32', 'int64', 'float16', 'float32', 'float64'])
-        print("%inf:csv_status:if mode={}, only columns that have numeric values were selected:{}".format(mode, list(w_df.columns)),
-              file=sys.stderr)
-        # w_df = w_df.where(w_df == 0, 1)
-        v_limit = float(opt_args[0])
-        w_df = w_df.mask(w_df <= v_limit, 0)
-        w_df = w_df.mask(w_df > v_limit, 1)
-        r_df = w_df.sum()
-    elif mode == "lessthan" or mode == "negative":
-        if len(opt_args) == 0:
-            print("??error:csv_status:for {}, '--arguments' is required.".format(mode), file=sys.stderr)
+    results = {}
+
+    q_modes = [md for md in modes if md in MODE_QUANTILE]
+    if len(q_modes) > 0:
+        q_df = w_df.quantile(q=[MODE_QUANTILE[md] for md in q_modes])
+        for md in q_modes:
+            if group_col is None:
+                results[md] = q_df.loc[MODE_QUANTILE[md]]
+            else:
+                results[md] = q_df.xs(MODE_QUANTILE[md], level=-1)
+
+    t_modes = [md for md in modes if md in MODE_THRESHOLD]
+    if len(t_modes) > 0:
+        results.update(threshold_counts(df, t_modes, group_col, threshold_values(t_modes, opt_args)))
+
+    for mode in modes:
+        if mode in results:
+            continue
+        if mode == "count":
+            r_df = w_df.count()
+        elif mode == "sum":
+            r_df = w_df.sum(numeric_only=True)
+        elif mode == "avg":
+            r_df = w_df.mean(numeric_only=True)
+        elif mode == "std":
+            r_df = w_df.std()
+        elif mode == "min":
+            r_df = w_df.min(numeric_only=True)
+        elif mode == "max":
+            r_df = w_df.max(numeric_only=True)
+        elif group_col is None and mode == "mode":
+            r_df = w_df.mode(numeric_only=True)
+        elif group_col is not None and mode == "mode":
+            r_df = w_df.apply(lambda x: x.mode())
+        elif mode == "median":
+            r_df = w_df.median(numeric_only=True)
+        elif mode == "rank":
+            r_df = w_df.rank()
+        elif mode == "sem":
+            r_df = w_df.sem()
+        elif mode == "skew":
+            r_df = w_df.skew(numeric_only=True)
+        elif mode == "var":
+            r_df = w_df.var()
+        elif group_col is None and mode == "mad":
+            r_df = w_df.mad(axis=0, skipna=True)
+        elif group_col is None and mode == "kurt":
+            r_df = w_df.kurt(axis=0, skipna=True, numeric_only=True)
+        elif mode == "nunique":
+            r_df = w_df.nunique()
+        elif mode == "cumsum":
+            r_df = w_df.cumsum(axis=0, skipna=True)
+        elif mode == "cumprod":
+            r_df = w_df.cumsum(axis=0, skipna=True)
+        elif mode == "vrange":
+            r_df = w_df.max(numeric_only=True) - w_df.min(numeric_only=True)
+        else:
+            print("??erro:csv_status:invalid mode:{}".format(mode), file=sys.stderr)
             sys.exit(1)
-        w_df = w_df.select_dtypes(include=['int16', 'int32', 'int64', 'float16', 'float32', 'float64'])
-        print("%inf:csv_status:if mode={}, only columns that have numeric values were selected:{}".format(mode, list(w_df.columns)),
-              file=sys.stderr)
-        # w_df = w_df.where(w_df == 0, 1)
-        v_limit = float(opt_args[0])
-        w_df = w_df.mask(w_df < v_limit, 1)
-        w_df = w_df.mask(w_df >= v_limit, 0)
-        r_df = w_df.sum()
+        results[mode] = r_df
+
+    if len(modes) > 1:
+        r_df = mode_table(results, modes, list(df.columns), group_col, layout)
     else:
-        print("??erro:csv_status:invalid mode:{}".format(mode), file=sys.stderr)
-        sys.exit(1)
+        r_df = results[modes[0]]
+        if group_col is None:
+            r_df.index.name = "column"
+            r_df.name = modes[0]
+    if output_format == "arrow_stream":
+        from csv_arrow import write_arrow_stream
+        write_arrow_stream(r_df, output, index=True)
+    else:
+        r_df.to_csv(output)
 
-    if group_col is None:
-        r_df.index.name = "column"
-        r_df.name = mode
-    r_df.to_csv(output)
 
+def main(args, in_df=None):
+    """run csv_status.py with parsed arguments
+
+    :param args: result of init()
+    :param in_df: pandas.DataFrame as input instead of csv file, given by csv_pipeline.py
+
+    """
+    import pandas as pd
+    from csv_cache import read_csv_cached
+    if version_tuple(PANDAS_MIN_VERSION) > version_tuple(pd.__version__):
+        print("??Error:csv_uty:padnas version must be newer than {}.".format(PANDAS_MIN_VERSION), file=sys.stderr)
+        sys.exit(1)
 
-if __name__ == "__main__":
-    import re
-    args = init()
     csv_file = args.csv_file
     output_file = args.OUTPUT
+    output_format = args.OFORMAT
     col_list_a = args.COLUMNS
     group_column = args.GCOLUMN
     mode = args.MODE
+    mode_layout = args.MODE_LAYOUT
     opt_args_s = args.OPTARGS
+    no_cache = args.NO_CACHE
+    refresh_cache = args.REFRESH_CACHE
+    chunk_size = args.CHUNKSIZE
+
+    modes = None
+    if mode is not None:
+        modes = re.split(r"\s*,\s*", mode)
+        invalid_modes = [md for md in modes if md not in MODE_TABLE]
+        if len(invalid_modes) > 0:
+            print("??error:csv_status:invalid mode:{}".format(",".join(invalid_modes)), file=sys.stderr)
+            sys.exit(1)
+
+    if chunk_size < 0:
+        print("??error:csv_status:'--chunksize' must be positive:{}".format(chunk_size), file=sys.stderr)
+        sys.exit(1)
+    if chunk_size > 0 and (mode is not None or in_df is not None):
+        print("??error:csv_status:'--chunksize' is available only without '--mode' and not in pipeline", file=sys.stderr)
+        sys.exit(1)
+
+    if output_format != "csv" and mode is None:
+        print("??error:csv_status:'--output_format' is available only with '--mode'", file=sys.stderr)
+        sys.exit(1)
 
     if csv_file == "-":
         csv_file = sys.stdin
@@ -326,7 +664,30 @@ if __name__ == "__main__":
     if opt_args_s is not None:
         opt_args = re.split(r"(?<!\\)\s*,\s*", opt_args_s)
 
-    csv_df = pd.read_csv(csv_file)
+    cache_columns = None
+    if col_list_a is not None:
+        cache_columns = re.split(r"\s*,\s*", col_list_a)
+        if any([re.match(r'^\d+$', v) is not None for v in cache_columns]):
+            cache_columns = None
+        elif group_column is not None:
+            cache_columns.append(group_column)
+    if in_df is not None:
+        csv_df = in_df
+    elif chunk_size > 0:
+        from csv_arrow import is_arrow_stream, iter_arrow_stream
+        if is_arrow_stream(csv_file):
+            csv_reader = iter_arrow_stream(csv_file, chunk_size)
+        else:
+            csv_reader = pd.read_csv(csv_file, chunksize=chunk_size)
+        # the first chunk gives names of columns.
+        csv_df = next(csv_reader, None)
+        if csv_df is None:
+            print("??error:csv_status:no data:{}".format(csv_file), file=sys.stderr)
+            sys.exit(1)
+        csv_reader = itertools.chain([csv_df], csv_reader)
+        print("%inf:csv_status:streaming mode:chunk size={}".format(chunk_size), file=sys.stderr)
+    else:
+        csv_df = read_csv_cached(csv_file, columns=cache_columns, no_cache=no_cache, refresh=refresh_cache)
 
     if col_list_a is not None:
         cnames = csv_df.columns
@@ -346,10 +707,19 @@ if __name__ == "__main__":
         print("??error:csv_status:invalid columns:{}".format(rest_cols), file=sys.stderr)
         sys.exit(1)
 
-    if mode is None:
-        entire_status(csv_df, output_file, col_list)
+    if chunk_size > 0:
+        sketch_status(csv_reader, output_file, col_list, csv_file)
+    elif mode is None:
+        entire_status(csv_df, output_file, col_list, csv_file)
     else:
         print("%inf:csv_status:mode={},group={}".format(mode, group_column), file=sys.stderr)
         if len(col_list) > 0:
+            if group_column is not None and group_column not in col_list:
+                col_list.append(group_column)
             csv_df = csv_df[col_list]
-        status_by_mode(csv_df, output_file, mode, group_column, opt_args)
+        status_by_mode(csv_df, output_file, modes, group_column, opt_args, layout=mode_layout, output_format=output_format)
+
+
+if __name__ == "__main__":
+    args = init()
+    main(args)
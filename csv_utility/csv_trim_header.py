@@ -19,7 +19,6 @@ import textwrap
 import io
 import csv
 import sys
-import numpy as np
 
 VERSION = 1.0
 
@@ -98,6 +97,8 @@ def read_headers(csv_file, nrows):
 if __name__ == "__main__":
     print("#warn:csv_trim_header: this is depricated. use 'csv_multiindex_columns'.", file=sys.stderr)
     args = init()
+    import numpy as np
+
     csv_file = args.file
     nrows = args.NROWS
     addindex = args.ADDINDEX
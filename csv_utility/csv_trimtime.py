@@ -19,11 +19,12 @@ import sys
 
 from datetime import timedelta
 from datetime import datetime as dtt
-from dateutil.relativedelta import relativedelta
 
+import os
 import re
-import numpy as np
-import pandas as pd
+import time
+from pathlib import Path
+sys.path.insert(0, format(Path(__file__).parent))
 
 VERSION = 1.0
 
@@ -34,8 +35,15 @@ RESAMPLE_METHOD_INTERPOLATE = [
 
 RESAMPLE_METHOD = ["nearest", "count", "sum", "min", "max", "mean", "std"] + RESAMPLE_METHOD_INTERPOLATE
 
+# step of evaluation of offset of local time zone, in nanoseconds
+LOCAL_OFFSET_STEP = 15 * 60 * 10**9
+# number of gap values to print in summary of '--gap' and '--time_gap'
+GAP_SUMMARY_MAX = 10
+# number of rows in each chunk to read column for '--get_range_of_time'
+RANGE_CHUNK_ROWS = 1000000
 
-def init():
+
+def init(argv=None):
     arg_parser = argparse.ArgumentParser(description="triming columns that have time data",
                                          formatter_class=argparse.RawDescriptionHelpFormatter,
                                          epilog=textwrap.dedent('''
@@ -44,6 +52,9 @@ remark:
   # Time series analysis with pandas https://ourcodingclub.github.io/tutorials/pandas-time-series/
 
   When '--get_range_of_time' was given, only range of time is printed to stdout without other processings.
+  For '--get_range_of_time', only the column is read by chunks, and min and max are kept through chunks.
+  If time index of the column is up to date(see '--time_index'), min and max are given by it without reading the column.
+  With '--assume_sorted', the column is treated as sorted, and only the first and the last records are read.
   Available 'unit' to print is one of 'H'our, 'M'inuts, 'S'econds. See example.
 
   For '--change_timefreq', available methods are floor, ceil,round. About format string, you may find answer in folowing:
@@ -58,12 +69,38 @@ remark:
   For '--time_gap', about time format string , see above about '--change_timefreq'
   using '--gap', numeric others than date time data are treated.
   For '--gap' and '--time_gap', given gap should be positive.
+  Number of detected gaps, min/max of those and only the first 10 gap values are printed to stderr.
+
+  For '--resample_function', several functions may be given, and functions only for some columns may be given as 'COLUMN=FUNC:FUNC'.
+  Functions without column are used for other columns. All aggregations are computed in one pass, and interpolations may be used with those.
+  If only one function is used for each column, names of columns are kept, otherwise names of columns in result are 'COLUMN_FUNC'.
 
   If you want to use commas and colon in expression of '--change_timefreq' and others, those must be escaped by back-slash. see examples.
 
   processing order:
     sort datetime, convert into timestamp, add time column, reformat, gap, time gap, time diff, change timrefreq, resample, 
     select datetime range, select hours range
+  Column of datetime is parsed only once for each format through those processings,
+  time of parsing and number of reuses are printed to stderr.
+  For '--timestamp', datetime without time zone is treated as local time, as datetime.timestamp() of python.
+
+  If '--chunksize' was given, input is read and processed with chunk of the given number of rows, and result of each chunk is written
+  into output as soon as it is done, so memory usage depends on the size of chunk, not on the size of file.
+  For '--gap' and '--time_gap', the last value and id of group are carried over chunks, then ids of groups are the same as
+  those without '--chunksize'. '--sort_datetime', '--add_time_column', '--calculate_elapsed_time' and
+  '--calculate_time_diff' are not available with '--chunksize', those require entire data.
+  With '--chunksize', '--resample' is available for input sorted by datetime, with fixed frequency, ex. '10min', '1D',
+  and with aggregations, sum, min, max, mean, std and count. Bins are resampled and written as soon as those are completed,
+  rows in the last bin of chunk are carried into the next chunk, then results are the same as those without '--chunksize',
+  and memory does not depend on span of time.
+
+  For '--select_datetime', when column is sorted, range of rows is found by binary search instead of comparing all rows.
+  With '--time_index', time index of the column is made into sidecar file('<csv file>.csvtidx', see csv_index.py),
+  and if the column is sorted, only records in range of datetime are read by seeking with the index, then selecting
+  one hour from data of a year does not need to read the entire file. The index is updated incrementally when csv file only grew.
+  '--time_index' is available only for csv file, without '--chunksize' and without processings that need rows out of the range,
+  '--sort_datetime', '--add_time_column', '--calculate_elapsed_time', '--gap', '--time_gap', '--calculate_time_diff',
+  '--change_timefreq', '--reformat' and '--resample'.
 
 example:
 
@@ -90,6 +127,9 @@ A,B,C,GA
 2020-11-13 10:01:00,2,18,1
 2020-11-13 10:02:00,3,7,1
 
+  csv_trimtime.py --chunksize=100000 --time_gap="GA=A::61" --gap="GC=C:10" sensor_log.csv
+  csv_trimtime.py --chunksize=100000 --resample="A:%Y-%m-%d %H\:%M\:%S:10min:B,C" --resample_func=mean,max,count sorted_sensor_log.csv
+
   csv_trimtime.py --change_timefreq='D=ABC002:%Y-%m-%d %H\:%M\:%S\:floor\:30s' big_sample_headers.csv |\\
                                                               csv_plot_histogram.py --animation_column=D --output=test.html - ABC005
 
@@ -100,10 +140,16 @@ A,B,C,GA
      csv_uty.py --stack=D - |csv_plot_bar.py --output=bit-pattern-headers_10sec_sum.html --animation_column=D --yrange=0,1 - category stacked_result
 
   csv_trimtime.py --resample="A:%Y-%m-%d %H\:%M\:%S:2min:B,C" --resample_func=mean test_trimtime.csv
+  csv_trimtime.py --resample="A:%Y-%m-%d %H\:%M\:%S:1D:B,C" --resample_func=mean,min,max,count test_trimtime.csv
+  csv_trimtime.py --resample="A:%Y-%m-%d %H\:%M\:%S:1D:B,C" --resample_func="mean,C=sum:linear" test_trimtime.csv
+A,B_mean,C_sum,C_linear
+2020-11-13,4.0,56,0.0
+2020-11-14,1.0,19,0.0
 
   csv_trimtime.py --select_hours="A:10\:00\:00,11\:00\:00" test_trimtime.csv
   csv_trimtime.py --select_hours="A:10\:00\:00,1\:00\:00pm" test_trimtime.csv
   csv_trimtime.py --select_datetime="date:%Y-%m-%d:2007-01-01,2007-12-01" a10.csv
+  csv_trimtime.py --time_index --select_datetime="A:%Y-%m-%d %H\:%M\:%S:2021-06-01 10\:00\:00,2021-06-01 11\:00\:00" sorted_sensor_log.csv
 
   csv_trimtime.py --calculate_time_diff="TD=A:%Y-%m-%d %H\:%M\:%S:1" test_trimtime.csv
 A,B,C,TD
@@ -140,6 +186,11 @@ A,B,C,A_year,A_day_of_week
                             type=str,
                             metavar='COLUMN[:datetime_format]:unit',
                             default=None)
+    arg_parser.add_argument("--assume_sorted",
+                            dest="ASSUME_SORTED",
+                            help="column for '--get_range_of_time' is sorted, then only the first and the last records are read",
+                            action="store_true",
+                            default=False)
 
     arg_parser.add_argument("--sort_datetime",
                             dest="TSORT",
@@ -232,8 +283,9 @@ A,B,C,A_year,A_day_of_week
         default=None)
     arg_parser.add_argument("--resample_function",
                             dest="RESAMPLE_FUNC",
-                            help="aggregation function for '--resample', default=mean",
-                            choices=RESAMPLE_METHOD,
+                            help="aggregation functions for '--resample', default=mean, available: " + ",".join(RESAMPLE_METHOD),
+                            type=str,
+                            metavar="FUNC[,FUNC...][,COLUMN=FUNC[:FUNC...]]",
                             default="mean")
     arg_parser.add_argument(
         "--select_hours",
@@ -250,19 +302,205 @@ A,B,C,A_year,A_day_of_week
                             metavar='COLUMN[:time_format]:start_time,end_time',
                             default=None)
 
+    arg_parser.add_argument("--time_index",
+                            dest="TIME_INDEX",
+                            help="read only rows in range of '--select_datetime' by time index of sorted column," +
+                            " or get range of time for '--get_range_of_time' by it, see remark",
+                            action="store_true",
+                            default=False)
+
     arg_parser.add_argument("--output",
                             dest="OUTPUT",
                             help="path of output csv file, default=stdout",
                             type=str,
                             metavar='FILE',
                             default=sys.stdout)
+    arg_parser.add_argument("--chunksize",
+                            dest="CHUNKSIZE",
+                            help="number of rows in each chunk for streaming mode, see remark",
+                            type=int,
+                            metavar='ROWS',
+                            default=0)
+    arg_parser.add_argument("--output_format",
+                            dest="OFORMAT",
+                            help="format of output, 'arrow_stream' is Arrow IPC stream for other csv_tools, default=csv",
+                            choices=["csv", "arrow_stream"],
+                            default="csv")
 
     arg_parser.add_argument('csv_file', metavar='CSV_FILE', help='files to read, if empty, stdin is used')
 
-    args = arg_parser.parse_args()
+    args = arg_parser.parse_args(argv)
     return args
 
 
+# parsed datetime columns in a run, shared between operations: (column, format) -> entry
+parsed_datetime_memo = {}
+
+
+def parse_datetime(df, cname, t_format):
+    """parse column as datetime, only once in a run for each column and format
+
+    column that is already datetime is returned as it is.
+    the result is kept in memo, and is reused while values and index of column in df are the same,
+    comparing strings is much faster than parsing them.
+
+    :param df: pandas.DataFrame
+    :param cname: name of column
+    :param t_format: format of datetime, if None, format is inferred.
+    :returns: pandas.Series of datetime
+    :rtype: pandas.Series
+
+    """
+    import pandas as pd
+    ps = df[cname]
+    if ps.dtype.kind == "M" or isinstance(ps.dtype, pd.DatetimeTZDtype):
+        return ps
+    key = (cname, t_format)
+    entry = parsed_datetime_memo.get(key)
+    if entry is not None and entry["source"].equals(ps):
+        entry["hits"] += 1
+        return entry["result"].copy()
+
+    t0 = time.perf_counter()
+    result = pd.to_datetime(ps, format=t_format, cache=True)
+    p_time = time.perf_counter() - t0
+    if entry is None:
+        print("%inf:csv_trimtime:parse datetime:column={},format={}:{:.3f} sec".format(cname, t_format, p_time), file=sys.stderr)
+        entry = {"parses": 0, "hits": 0, "time": 0}
+        parsed_datetime_memo[key] = entry
+    entry.update({"source": ps.copy(), "result": result})
+    entry["parses"] += 1
+    entry["time"] += p_time
+    return result.copy()
+
+
+def print_parsed_datetime_memo():
+    """print summary of parsing datetime in a run to stderr"""
+    for (cname, t_format), entry in parsed_datetime_memo.items():
+        print("%inf:csv_trimtime:parsed datetime:column={},format={}:parses={},hits={},{:.3f} sec".format(
+            cname, t_format, entry["parses"], entry["hits"], entry["time"]),
+              file=sys.stderr)
+
+
+def local_timezone():
+    """time zone of local time, that is used by datetime.timestamp() for naive datetime
+
+    :returns: None for UTC, name of time zone, or dateutil.tz.tzlocal() if name of time zone is unknown.
+    :rtype: str or tzinfo
+
+    """
+    import pandas as pd
+    if time.timezone == 0 and time.altzone == 0:
+        return None
+    tz_name = os.environ.get("TZ", "").lstrip(":")
+    if len(tz_name) == 0:
+        tz_path = str(Path("/etc/localtime").resolve())
+        if "zoneinfo/" in tz_path:
+            tz_name = tz_path.split("zoneinfo/", 1)[1]
+    if len(tz_name) > 0:
+        try:
+            pd.Timestamp(0).tz_localize(tz_name)
+            return tz_name
+        except Exception:
+            pass
+    from dateutil.tz import tzlocal
+    return tzlocal()
+
+
+def local_to_utc(ts, tz):
+    """convert naive datetime as local time into naive datetime of UTC, with int64 arithmetic
+
+    offset of time zone is evaluated only for each 15 minutes in range of ts, that is much smaller than ts,
+    because offset changes only at transitions of daylight saving time, those are on 15 minutes boundaries.
+    for ambiguous time, offset before end of daylight saving time is used, and for nonexistent time,
+    offset before the transition is used, those are the same as datetime.timestamp() with fold=0.
+
+    :param ts: pandas.Series of naive datetime
+    :param tz: time zone
+    :returns: pandas.Series of naive datetime
+    :rtype: pandas.Series
+
+    """
+    import numpy as np
+    import pandas as pd
+    ns = ts.to_numpy(dtype="datetime64[ns]").view("int64")
+    valid = ts.notna().to_numpy()
+    if not valid.any():
+        return ts
+    step = LOCAL_OFFSET_STEP
+    bucket = ns // step
+    # one more step before the range, for offset before the transition
+    b_min = bucket[valid].min() - 1
+    b_max = bucket[valid].max()
+    starts = pd.Series(pd.to_datetime(np.arange(b_min, b_max + 1) * step))
+    starts_utc = starts.dt.tz_localize(tz, ambiguous=np.ones(len(starts), dtype=bool), nonexistent="NaT").dt.tz_convert(None)
+    offsets = (starts_utc - starts).ffill().bfill().to_numpy().view("int64")
+    utc_ns = np.where(valid, ns + offsets[np.where(valid, bucket - b_min, 0)], ns)
+    return pd.Series(utc_ns.view("datetime64[ns]"), index=ts.index)
+
+
+def epoch_seconds(ts):
+    """seconds from epoch of datetime, as datetime.timestamp() without python objects for each row
+
+    naive datetime is assumed to be local time, as datetime.timestamp().
+
+    :param ts: pandas.Series of datetime
+    :returns: pandas.Series of float, NaN for NaT
+    :rtype: pandas.Series
+
+    """
+    if ts.dt.tz is not None:
+        ts = ts.dt.tz_convert(None)
+    else:
+        tz = local_timezone()
+        if tz is not None:
+            ts = local_to_utc(ts, tz)
+    # in microseconds as datetime
+    return (ts.astype("int64") // 1000 / 1e6).where(ts.notna())
+
+
+def calendar_bucket(ts, t_method, t_freq):
+    """floor, ceil or round datetime into week or month, with datetime64 arithmetic
+
+    week starts on monday, 'ceil' gives the next monday also for monday.
+    'round' gives the next monday for saturday and sunday, the first day of the next month for day after 15th.
+    fraction of second in datetime is kept.
+
+    :param ts: pandas.Series of datetime
+    :param t_method: 'floor', 'ceil' or 'round'
+    :param t_freq: 'W' or 'M'
+    :returns: pandas.Series of datetime
+    :rtype: pandas.Series
+
+    """
+    import numpy as np
+    import pandas as pd
+    tz = ts.dt.tz
+    if tz is not None:
+        ts = ts.dt.tz_localize(None)
+    frac = ts - ts.dt.floor("S")
+    if t_freq == "W":
+        # NaT is kept by normalize()
+        weekday = ts.dt.weekday.fillna(0).to_numpy(dtype=int)
+        if t_method == "floor":
+            n_days = -weekday
+        elif t_method == "ceil":
+            n_days = 7 - weekday
+        else:
+            n_days = np.where(weekday > 4, 7 - weekday, -weekday)
+        res = ts.dt.normalize() + pd.to_timedelta(n_days, unit="D") + frac
+    else:
+        month = ts.to_numpy(dtype="datetime64[ns]").astype("datetime64[M]")
+        if t_method == "ceil":
+            month = month + 1
+        elif t_method == "round":
+            month = month + (ts.dt.day > 15).to_numpy().astype(int)
+        res = pd.Series(month.astype("datetime64[ns]"), index=ts.index) + frac
+    if tz is not None:
+        res = res.dt.tz_localize(tz)
+    return res
+
+
 def change_time_frequency(df, ch_definitions):
     """FIXME! briefly describe function
 
@@ -294,40 +532,18 @@ def change_time_frequency(df, ch_definitions):
                 t_format = re.sub(r"\\=", "=", t_format)
             else:
                 t_format = "%Y-%m-%d %H:%M:%S"
-            df[cname] = pd.to_datetime(df[t_col], format=t_format)
-            if t_method == "floor":
-                if t_freq == "W":
-                    df[cname] = df[cname].apply(
-                        lambda x: x - timedelta(days=x.weekday(), hours=x.hour, minutes=x.minute, seconds=x.second)).dt.strftime(
-                            t_format)  # monday
-                elif t_freq == "M":
-                    df[cname] = df[cname].apply(lambda x: x - timedelta(days=x.day - 1) - timedelta(
-                        hours=x.hour, minutes=x.minute, seconds=x.second)).dt.strftime(t_format)
-                else:
-                    df[cname] = df[cname].dt.floor(t_freq).dt.strftime(t_format)
-            elif t_method == "ceil":
-                if t_freq == "W":
-                    df[cname] = df[cname].apply(
-                        lambda x: x - timedelta(days=x.weekday() - 7, hours=x.hour, minutes=x.minute, seconds=x.second)).dt.strftime(
-                            t_format)  # monday
-                elif t_freq == "M":
-                    df[cname] = df[cname].apply(lambda x: x + relativedelta(days=-x.day + 1, months=1) - timedelta(
-                        hours=x.hour, minutes=x.minute, seconds=x.second)).dt.strftime(t_format)
-                else:
-                    df[cname] = df[cname].dt.ceil(t_freq).dt.strftime(t_format)
-            elif t_method == "round":
-                if t_freq == "W":
-                    df[cname] = df[cname].apply(lambda x: x - timedelta(
-                        days=x.weekday() - (7 if x.weekday() > 4 else 0), hours=x.hour, minutes=x.minute, seconds=x.second)).dt.strftime(
-                            t_format)  # monday
-                elif t_freq == "M":
-                    df[cname] = df[cname].apply(lambda x: x + relativedelta(days=-x.day + 1, months=1 if x.day > 15 else 0) - timedelta(
-                        hours=x.hour, minutes=x.minute, seconds=x.second)).dt.strftime(t_format)
-                else:
-                    df[cname] = df[cname].dt.round(t_freq).dt.strftime(t_format)
-            else:
+            df[cname] = parse_datetime(df, t_col, t_format)
+            if t_method not in ["floor", "ceil", "round"]:
                 print("#warn:csv_trimtime:invalid method for '--change_timefreq':{} in {}".format(t_method, cdf), file=sys.stderr)
                 continue
+            if t_freq in ["W", "M"]:
+                df[cname] = calendar_bucket(df[cname], t_method, t_freq).dt.strftime(t_format)
+            elif t_method == "floor":
+                df[cname] = df[cname].dt.floor(t_freq).dt.strftime(t_format)
+            elif t_method == "ceil":
+                df[cname] = df[cname].dt.ceil(t_freq).dt.strftime(t_format)
+            else:
+                df[cname] = df[cname].dt.round(t_freq).dt.strftime(t_format)
             vcs = df[cname].value_counts()
             print("%inf:csv_trimtime:change_timefreq:column={}:number of uniq periods={}:max count in each period={}".format(
                 cname, len(vcs), max(vcs)),
@@ -356,7 +572,7 @@ def decomp_datetime(df, decomp_parts):
         else:
             t_format = "%Y-%m-%d %H:%M:%S"
         cname_dt = t_col + "_datetime{}".format(dtt.now().timestamp())
-        df[cname_dt] = pd.to_datetime(df[t_col], format=t_format)
+        df[cname_dt] = parse_datetime(df, t_col, t_format)
         if "all" in t_parts:
             t_parts = d_parts
         r_parts = list(set(t_parts) - set(d_parts))
@@ -394,16 +610,18 @@ def decomp_datetime(df, decomp_parts):
     return df
 
 
-def groupby_time_gap(df, time_gap_definitions):
+def groupby_time_gap(df, time_gap_definitions, carry=None):
     """FIXME! briefly describe function
 
     :param df: 
     :param time_gap_definitions: [new_column_name=old_column:format:gap,...]
+    :param carry: dict to carry states of groups over chunks, in streaming mode. if None, summary of groups is printed.
     :returns: 
     :rtype: 
 
     """
-    print("%inf:csv_trimtime:groupby_time_gap:{}".format(time_gap_definitions), file=sys.stderr)
+    if carry is None:
+        print("%inf:csv_trimtime:groupby_time_gap:{}".format(time_gap_definitions), file=sys.stderr)
 
     try:
         for cdf in time_gap_definitions:
@@ -424,14 +642,12 @@ def groupby_time_gap(df, time_gap_definitions):
                 t_format = re.sub(r"\\=", "=", t_format)
             else:
                 t_format = "%Y-%m-%d %H:%M:%S"
-            df[t_col] = pd.to_datetime(df[t_col], format=t_format)
+            df[t_col] = parse_datetime(df, t_col, t_format)
 
-            df = groupby_gap(df, t_col, cname, timedelta(seconds=t_gap))
-
-            vcs = df[cname].value_counts()
-            print("%inf:csv_trimtime:groupby_time_gap:column={}:number of groups={}:max count in each group={}".format(
-                cname, len(vcs), max(vcs)),
-                  file=sys.stderr)
+            gap_carry = {} if carry is None else carry.setdefault(cname, {})
+            df = groupby_gap(df, t_col, cname, timedelta(seconds=t_gap), carry=gap_carry)
+            if carry is None:
+                print_gap_summary("groupby_time_gap", cname, gap_carry)
     except ValueError as e:
         print("??error:csv_trimtime:groupby time gap:{}:{}".format(t_col, e), file=sys.stderr)
         sys.exit(1)
@@ -439,16 +655,18 @@ def groupby_time_gap(df, time_gap_definitions):
     return df
 
 
-def groupby_value_gap(df, gap_definitions):
+def groupby_value_gap(df, gap_definitions, carry=None):
     """FIXME! briefly describe function
 
     :param df: 
     :param gap_definitions: [new_column_name=old_column:gap,...]
+    :param carry: dict to carry states of groups over chunks, in streaming mode. if None, summary of groups is printed.
     :returns: 
     :rtype: 
 
     """
-    print("%inf:csv_trimtime:groupby_gap:{}".format(gap_definitions), file=sys.stderr)
+    if carry is None:
+        print("%inf:csv_trimtime:groupby_gap:{}".format(gap_definitions), file=sys.stderr)
 
     try:
         for cdf in gap_definitions:
@@ -464,12 +682,10 @@ def groupby_value_gap(df, gap_definitions):
             t_col = cvs[0]
             t_gap = float(cvs[1])
 
-            df = groupby_gap(df, t_col, cname, t_gap)
-
-            vcs = df[cname].value_counts()
-            print("%inf:csv_trimtime:groupby_gap:column={}:number of groups={}:max count in each group={}".format(
-                cname, len(vcs), max(vcs)),
-                  file=sys.stderr)
+            gap_carry = {} if carry is None else carry.setdefault(cname, {})
+            df = groupby_gap(df, t_col, cname, t_gap, carry=gap_carry)
+            if carry is None:
+                print_gap_summary("groupby_gap", cname, gap_carry)
     except ValueError as e:
         print("??error:csv_trimtime:groupby gap:{}:{}".format(t_col, e), file=sys.stderr)
         sys.exit(1)
@@ -477,34 +693,76 @@ def groupby_value_gap(df, gap_definitions):
     return df
 
 
-def groupby_gap(df, column_name, group_column_name, gap):
-    """FIXME! briefly describe function
+def groupby_gap(df, column_name, group_column_name, gap, carry=None):
+    """make id of group, that is incremented at each gap between consecutive values larger than given gap
 
-    :param df: 
-    :param column_name: 
-    :param group_column_name: 
+    id of group is cumulative sum of 'absolute of diff > gap', in one pass.
+    in streaming mode, the last value, the last id of group and summary are carried over chunks by 'carry',
+    then ids of groups are the same as those for entire data.
+
+    :param df: pandas.DataFrame
+    :param column_name: name of column to find gaps
+    :param group_column_name: name of column of ids of groups
     :param gap: numerica value or datetime.timedelta()
-    :returns: 
-    :rtype: 
+    :param carry: dict to carry states over chunks, that is updated.
+    :returns: pandas.DataFrame
+    :rtype: pandas.DataFrame
 
     """
+    import pandas as pd
+    if carry is None:
+        carry = {}
+    if len(df) == 0:
+        df[group_column_name] = pd.Series(dtype="int64")
+        return df
+    ps = df[column_name]
+    diff_s = ps.diff()
+    if "last" in carry:
+        diff_s.iloc[0] = ps.iloc[0] - carry["last"]
+    gap_s = diff_s.abs() > gap
+    groups = gap_s.cumsum().astype("int64") + carry.get("group", 0)
+    df[group_column_name] = groups
+
+    # summary of gaps, values of gaps are kept only up to GAP_SUMMARY_MAX
+    gaps = diff_s.loc[gap_s]
+    if gaps.dtype.kind == "m":
+        gaps = gaps.dt.total_seconds()
+    if len(gaps) > 0:
+        n_keep = GAP_SUMMARY_MAX - len(carry.get("gaps", []))
+        carry["gaps"] = carry.get("gaps", []) + list(gaps.iloc[:max(n_keep, 0)])
+        carry["gap_min"] = min(carry.get("gap_min", gaps.min()), gaps.min())
+        carry["gap_max"] = max(carry.get("gap_max", gaps.max()), gaps.max())
+    carry["n_gaps"] = carry.get("n_gaps", 0) + len(gaps)
+
+    # groups are consecutive, the first group may continue from the previous chunk.
+    counts = groups.value_counts()
+    if "group" in carry and carry["group"] in counts.index:
+        counts[carry["group"]] += carry["count"]
+    carry["max_count"] = max(carry.get("max_count", 0), counts.max())
+    carry["last"] = ps.iloc[-1]
+    carry["group"] = groups.iloc[-1]
+    carry["count"] = counts[carry["group"]]
+    return df
+
+
+def print_gap_summary(name, group_column_name, carry):
+    """print summary of gaps and groups to stderr
 
-    dt_s = pd.Series([False] * len(df), index=df.index, dtype="boolean")
-    dt_s.loc[df[column_name].diff().abs() > gap] = True
+    :param name: name of processing
+    :param group_column_name: name of column of ids of groups
+    :param carry: dict of states of groupby_gap()
 
-    if df[column_name].diff().abs().loc[dt_s].dtype != np.timedelta64:
-        gap_list = list(df[column_name].diff().loc[dt_s].apply(lambda x: x.total_seconds()))
+    """
+    if carry.get("n_gaps", 0) > 0:
+        print("%inf:csv_trimtime:{}:column={}:detected gaps={}:min={}:max={}:first {} gap values={}".format(
+            name, group_column_name, carry["n_gaps"], carry["gap_min"], carry["gap_max"], len(carry["gaps"]), carry["gaps"]),
+              file=sys.stderr)
     else:
-        gap_list = list(df[column_name].diff().loc[dt_s])
-    print("%inf:csv_trimtime:detected gap values:\n{}".format(gap_list), file=sys.stderr)
-
-    g_count = len(dt_s.loc[dt_s])
-    df.loc[dt_s, group_column_name] = list(range(1, g_count + 1))
-    df[group_column_name].iat[0] = 0
-    df[group_column_name].ffill(axis=0, inplace=True)
-    # df[group_column_name].fillna(g_count + 1, inplace=True)
-    df[group_column_name] = df[group_column_name].astype('int64')
-    return df
+        print("%inf:csv_trimtime:{}:column={}:no gap was detected".format(name, group_column_name), file=sys.stderr)
+    print("%inf:csv_trimtime:{}:column={}:number of groups={}:max count in each group={}".format(
+        name, group_column_name,
+        carry.get("group", -1) + 1, carry.get("max_count", 0)),
+          file=sys.stderr)
 
 
 def calculate_time_diff(df, time_diff):
@@ -529,8 +787,8 @@ def calculate_time_diff(df, time_diff):
     else:
         t_format = "%Y-%m-%d %H:%M:%S"
 
-    df[t_col] = pd.to_datetime(df[t_col], format=t_format)
-    df[cname] = df[t_col].diff(t_step).apply(lambda x: x.total_seconds())
+    df[t_col] = parse_datetime(df, t_col, t_format)
+    df[cname] = df[t_col].diff(t_step).dt.total_seconds()
 
     print("%inf:csv_trimtime:calculate_time_diff:min={},max={},mean={}".format(df[cname].min(), df[cname].max(), df[cname].mean()),
           file=sys.stderr)
@@ -562,10 +820,10 @@ def calculate_elapsed_time(df, elapsed_time_def):
     else:
         t_format = "%Y-%m-%d %H:%M:%S"
 
-    df[t_col] = pd.to_datetime(df[t_col], format=t_format)
+    df[t_col] = parse_datetime(df, t_col, t_format)
     if t_org == 0:
         t_org = df[t_col][0]
-    df[cname] = (df[t_col] - t_org).apply(lambda x: x.total_seconds())
+    df[cname] = (df[t_col] - t_org).dt.total_seconds()
 
     print("%inf:csv_trimtime:calculate_elapsed_time:min={},max={},mean={}".format(df[cname].min(), df[cname].max(), df[cname].mean()),
           file=sys.stderr)
@@ -581,15 +839,21 @@ def sort_time_column(df, sort_time_def):
     else:
         t_format = cvs[1]
 
-    df[cname] = pd.to_datetime(df[cname], format=t_format)
+    df[cname] = parse_datetime(df, cname, t_format)
     df.sort_values(by=cname, inplace=True)
     df.reset_index(inplace=True)
 
     return df
 
 
-def do_rsampling(df, resample_defs, resample_func):
+def parse_resample_definition(resample_defs):
+    """parse definition of '--resample'
 
+    :param resample_defs: COLUMN[:time_format]:freq:COLUMN_TO_RESAMPLE[,COLUMN...]
+    :returns: name of column of datetime, format of datetime, frequency and names of columns to resample
+    :rtype: tuple
+
+    """
     cvs = re.split(r"\s*(?<!\\):\s*", resample_defs)
     if len(cvs) > 3:
         t_col = cvs[0]
@@ -606,36 +870,164 @@ def do_rsampling(df, resample_defs, resample_func):
         print("??error:csv_trimtime:resampling:invalid definition:{}".format(resample_defs), file=sys.stderr)
         sys.exit(1)
     columns = re.split(r"\s*(?<!\\),\s*", columns_s)
+    return t_col, t_fmt, t_freq, columns
+
+
+def parse_resample_functions(resample_func, columns):
+    """parse definition of functions for resampling
+
+    :param resample_func: FUNC[,FUNC...][,COLUMN=FUNC[:FUNC...]], functions without column are used for columns without functions.
+    :param columns: names of columns to resample
+    :returns: dict of name of column and list of functions
+    :rtype: dict
+
+    """
+    common_funcs = []
+    column_funcs = {}
+    for fd in re.split(r"\s*(?<!\\),\s*", resample_func):
+        cvs = re.split(r"\s*(?<!\\)=\s*", fd)
+        if len(cvs) > 1:
+            cname = re.sub(r"\\", "", cvs[0])
+            if cname not in columns:
+                print("??error:csv_trimtime:resampling:column is not in columns to resample:{}".format(cname), file=sys.stderr)
+                sys.exit(1)
+            funcs = re.split(r"\s*(?<!\\):\s*", cvs[1])
+            column_funcs.setdefault(cname, []).extend(funcs)
+        else:
+            funcs = [fd]
+            common_funcs.extend(funcs)
+        for func in funcs:
+            if func not in RESAMPLE_METHOD:
+                print("??error:csv_trimtime:resampling:invalid function:{}, available: {}".format(func, ",".join(RESAMPLE_METHOD)),
+                      file=sys.stderr)
+                sys.exit(1)
+    if len(common_funcs) == 0:
+        common_funcs = ["mean"]
+    return {v: column_funcs.get(v, common_funcs) for v in columns}
+
+
+def do_rsampling(df, resample_defs, resample_func, origin="start_day"):
+    """resample columns by time frequency
 
-    output_df = df[columns + [t_col]]
-
-    output_df[t_col] = pd.to_datetime(df[t_col], format=t_fmt)
-    output_df.set_index(t_col, inplace=True)
-
-    if resample_func == "sum":
-        output_df = output_df.resample(t_freq).sum()
-    elif resample_func == "min":
-        output_df = output_df.resample(t_freq).min()
-    elif resample_func == "max":
-        output_df = output_df.resample(t_freq).max()
-    elif resample_func == "mean":
-        output_df = output_df.resample(t_freq).mean()
-    elif resample_func == "std":
-        output_df = output_df.resample(t_freq).std()
-    elif resample_func == "count":
-        output_df = output_df.resample(t_freq).count()
-    elif resample_func == "nearest":
-        output_df = output_df.resample(t_freq).nearest()
-    elif resample_func in RESAMPLE_METHOD_INTERPOLATE:
-        if resample_func not in ["spline", "polynomial"]:
-            output_df = output_df.resample(t_freq).interpolate(method=resample_func)
+    all aggregations are done by one 'resample().agg()', interpolations and 'nearest' are done with the same resampler.
+    if one function is given for each column, names of columns are kept, otherwise names of columns in result are 'COLUMN_FUNC'.
+
+    :param df: pandas.DataFrame
+    :param resample_defs: COLUMN[:time_format]:freq:COLUMN_TO_RESAMPLE[,COLUMN...]
+    :param resample_func: FUNC[,FUNC...][,COLUMN=FUNC[:FUNC...]]
+    :param origin: origin of bins, see pandas.DataFrame.resample
+    :returns: pandas.DataFrame, index is datetime.
+    :rtype: pandas.DataFrame
+
+    """
+    import pandas as pd
+    t_col, t_fmt, t_freq, columns = parse_resample_definition(resample_defs)
+    func_map = parse_resample_functions(resample_func, columns)
+
+    output_df = df[columns].copy()
+    output_df.index = pd.DatetimeIndex(parse_datetime(df, t_col, t_fmt), name=t_col)
+    resampler = output_df.resample(t_freq, origin=origin)
+
+    agg_map = {}
+    results = {}
+    for cname, funcs in func_map.items():
+        for func in funcs:
+            if func in RESAMPLE_METHOD_INTERPOLATE or func == "nearest":
+                results.setdefault(func, []).append(cname)
+            else:
+                agg_map.setdefault(cname, []).append(func)
+    result_dfs = {}
+    if len(agg_map) > 0:
+        result_dfs["agg"] = resampler.agg(agg_map)
+    for func, cnames in results.items():
+        # selection of columns from resampler does not have 'nearest' and 'interpolate'
+        c_resampler = output_df[cnames].resample(t_freq, origin=origin)
+        if func == "nearest":
+            r_df = c_resampler.nearest()
+        elif func in ["spline", "polynomial"]:
+            r_df = c_resampler.interpolate(method=func, order=3)
         else:
-            output_df = output_df.resample(t_freq).interpolate(method=resample_func, order=3)
+            r_df = c_resampler.interpolate(method=func)
+        r_df.columns = pd.MultiIndex.from_tuples([(v, func) for v in r_df.columns])
+        result_dfs[func] = r_df
+
+    output_df = pd.concat(result_dfs.values(), axis=1)
+    output_df = output_df[[(cname, func) for cname, funcs in func_map.items() for func in funcs]]
+    if all([len(v) == 1 for v in func_map.values()]):
+        output_df.columns = [v[0] for v in output_df.columns]
+    else:
+        output_df.columns = ["{}_{}".format(*v) for v in output_df.columns]
 
     output_df.fillna(0, inplace=True)
     return output_df
 
 
+def do_rsampling_stream(df, resample_defs, resample_func, carry):
+    """resample chunk of input sorted by datetime, in streaming mode
+
+    rows of the last bin in chunk are carried to the next chunk, because the bin may continue in the next chunk,
+    and other bins are resampled. bins have the same origin as 'start_day' for entire data,
+    then results are the same as do_rsampling() for entire data, and memory does not depend on span of time.
+    only aggregations are available, and frequency must be fixed, ex. '10min', '1D'.
+
+    :param df: chunk as pandas.DataFrame, or None at end of input to resample the carried rows.
+    :param resample_defs: COLUMN[:time_format]:freq:COLUMN_TO_RESAMPLE[,COLUMN...]
+    :param resample_func: FUNC[,FUNC...][,COLUMN=FUNC[:FUNC...]]
+    :param carry: dict to carry rows of the last bin and origin over chunks, that is updated.
+    :returns: pandas.DataFrame, index is datetime. None if there is no bin to output.
+    :rtype: pandas.DataFrame
+
+    """
+    import pandas as pd
+    t_col, t_fmt, t_freq, columns = parse_resample_definition(resample_defs)
+    t_step = pd.Timedelta(pd.tseries.frequencies.to_offset(t_freq))
+    if df is None:
+        df = carry.pop("rows", None)
+        if df is None or len(df) == 0:
+            return None
+    else:
+        df = df[columns + [t_col]].copy()
+        df[t_col] = parse_datetime(df, t_col, t_fmt)
+        df = df.loc[df[t_col].notna()]
+        if len(df) == 0:
+            return None
+        if not df[t_col].is_monotonic_increasing or ("last" in carry and df[t_col].iloc[0] < carry["last"]):
+            print("??error:csv_trimtime:resampling:input must be sorted by datetime in streaming mode:{}".format(t_col), file=sys.stderr)
+            sys.exit(1)
+        carry["last"] = df[t_col].iloc[-1]
+        if "origin" not in carry:
+            carry["origin"] = df[t_col].iloc[0].normalize()
+        if "rows" in carry:
+            df = pd.concat([carry["rows"], df])
+        # start of the last bin
+        origin = carry["origin"]
+        t_last = origin + ((carry["last"] - origin) // t_step) * t_step
+        carry["bin"] = t_last
+        carry["rows"] = df.loc[df[t_col] >= t_last]
+        df = df.loc[df[t_col] < t_last]
+        if len(df) == 0:
+            return None
+
+    output_df = do_rsampling(df, resample_defs, resample_func, origin=carry["origin"])
+    if "rows" in carry:
+        # empty bins until the carried bin, as resampling of entire data
+        bins = pd.date_range(output_df.index[0], carry["bin"] - t_step, freq=t_step, name=t_col)
+        output_df = output_df.reindex(bins, fill_value=0)
+
+    # dtypes of the first bins are kept, then each column has the same format in all chunks.
+    dtypes = carry.setdefault("dtypes", output_df.dtypes.to_dict())
+    for cname, dtype in dtypes.items():
+        ps = output_df[cname]
+        if ps.dtype == dtype:
+            continue
+        if dtype.kind in "iu" and not (ps % 1 == 0).all():
+            print("#warn:csv_trimtime:resampling:{} has values that are not integer, those are written as float".format(cname),
+                  file=sys.stderr)
+            continue
+        output_df[cname] = ps.astype(dtype)
+    return output_df
+
+
 def do_reformat(df, reformat_def):
 
     cvs = re.split(r"\s*(?<!\\):\s*", reformat_def)
@@ -651,12 +1043,13 @@ def do_reformat(df, reformat_def):
     else:
         out_fmt = None
 
-    df[cname] = pd.to_datetime(df[cname], format=in_fmt)
+    df[cname] = parse_datetime(df, cname, in_fmt)
 
     return df, out_fmt
 
 
 def do_addtimecolumn(df, time_column_def):
+    import pandas as pd
     cvs = re.split(r"\s*(?<!\\):\s*", time_column_def)
     if len(cvs) < 2:
         print("??error:csv_trimtime:add time column:invalid definition:{}".format(time_column_def), file=sys.stderr)
@@ -682,11 +1075,12 @@ def evaluate_timestamp(df, eval_def):
     cname_0 = cvs[0]
     cname_1 = cvs[1]
 
-    df[cname_0] = list(map(lambda x: x.timestamp(), pd.to_datetime(df[cname_1]).dt.to_pydatetime()))
+    df[cname_0] = epoch_seconds(parse_datetime(df, cname_1, None))
     return df
 
 
 def do_select_hours(df, select_hours_def):
+    import pandas as pd
     cvs = re.split(r"\s*(?<!\\):\s*", select_hours_def)
     if len(cvs) < 2:
         print("??error:csv_trimtime:select hours: invalid format {}".format(select_hours_def), file=sys.stderr)
@@ -708,20 +1102,23 @@ def do_select_hours(df, select_hours_def):
     t_end = cvs[1]
     t_end = re.sub(r"\\", "", t_end)
 
-    df[t_col] = pd.to_datetime(df[t_col], format=t_fmt)
-    df.set_index(t_col, inplace=True)
-
-    output_df = df.iloc[df.index.indexer_between_time(t_start, t_end, include_start=True, include_end=True), :]
-    # columns = df.columns
-    # output_df = pd.DataFrame()
-    # for col in columns:
-    #     if col != t_col:
-    #         output_df[col] = df[col].between_time(t_start, t_end, include_start=True, include_end=True)
+    df[t_col] = parse_datetime(df, t_col, t_fmt)
+    # only selected rows are indexed by the column, instead of all rows.
+    i_rows = pd.DatetimeIndex(df[t_col]).indexer_between_time(t_start, t_end, include_start=True, include_end=True)
+    output_df = df.iloc[i_rows, :].set_index(t_col)
 
     return output_df
 
 
-def do_select_datetime(df, select_dt_def):
+def parse_select_datetime(select_dt_def):
+    """parse definition of '--select_datetime'
+
+    :param select_dt_def: COLUMN[:time_format]:start_time,end_time
+    :returns: name of column, format, start and end of range
+    :rtype: tuple
+
+    """
+    import pandas as pd
     cvs = re.split(r"\s*(?<!\\):\s*", select_dt_def)
     if len(cvs) < 2:
         print("??error:csv_trimtime:select datetime: invalid format {}".format(select_dt_def), file=sys.stderr)
@@ -738,23 +1135,74 @@ def do_select_datetime(df, select_dt_def):
         t_fmt = None
 
     cvs = re.split(r"\s*(?<!\\),\s*", t_range)
+    if len(cvs) < 2:
+        print("??error:csv_trimtime:select datetime: invalid range {}".format(t_range), file=sys.stderr)
+        sys.exit(1)
     t_start = cvs[0]
     t_start = re.sub(r"\\", "", t_start)
     t_end = cvs[1]
     t_end = re.sub(r"\\", "", t_end)
 
-    t_start = dtt.strptime(t_start, t_fmt)
-    t_end = dtt.strptime(t_end, t_fmt)
+    if t_fmt is not None:
+        t_start = dtt.strptime(t_start, t_fmt)
+        t_end = dtt.strptime(t_end, t_fmt)
+    else:
+        t_start = pd.Timestamp(t_start)
+        t_end = pd.Timestamp(t_end)
+
+    return t_col, t_fmt, t_start, t_end
+
+
+def do_select_datetime(df, select_dt_def):
+    t_col, t_fmt, t_start, t_end = parse_select_datetime(select_dt_def)
 
-    df[t_col] = pd.to_datetime(df[t_col], format=t_fmt)
+    df[t_col] = parse_datetime(df, t_col, t_fmt)
     # df.set_index(t_col, inplace=True)
 
-    output_df = df.loc[(df[t_col] >= t_start) & (df[t_col] <= t_end)]
+    ts = df[t_col]
+    if ts.is_monotonic_increasing:
+        # sorted column: window is found by binary search, instead of mask of all rows.
+        output_df = df.iloc[ts.searchsorted(t_start, side="left"):ts.searchsorted(t_end, side="right")]
+    else:
+        output_df = df.loc[(ts >= t_start) & (ts <= t_end)]
 
     return output_df
 
 
-def do_get_range_time(df, range_time_def):
+def select_time_index_range(csv_file, select_dt_def):
+    """range of rows to read for '--select_datetime' with time index, see csv_index.py
+
+    :param csv_file: path of csv file
+    :param select_dt_def: COLUMN[:time_format]:start_time,end_time
+    :returns: (index of the first row, number of rows) or None if time index is not available.
+    :rtype: tuple
+
+    """
+    from csv_index import get_time_index, time_row_range
+
+    t_col, t_fmt, t_start, t_end = parse_select_datetime(select_dt_def)
+    entry = get_time_index(csv_file, t_col, t_fmt)
+    if entry is None:
+        return None
+    row_range = time_row_range(entry, t_start, t_end)
+    if row_range is None:
+        print("#warn:csv_trimtime:time index:'{}' is not sorted or time zone does not match, all rows are read".format(t_col),
+              file=sys.stderr)
+        return None
+    print("%inf:csv_trimtime:time index:rows {} - {} of {} rows are read".format(row_range[0], row_range[0] + row_range[1],
+                                                                                entry["n_rows"]),
+          file=sys.stderr)
+    return row_range
+
+
+def parse_range_time_definition(range_time_def):
+    """parse definition of '--get_range_of_time'
+
+    :param range_time_def: COLUMN[:datetime_format]:unit
+    :returns: name of column, format and unit
+    :rtype: tuple
+
+    """
     cvs = re.split(r"\s*(?<!\\):\s*", range_time_def)
     if len(cvs) < 2:
         print("??error:csv_trimtime:get range of time:invalid definition:{}".format(range_time_def), file=sys.stderr)
@@ -767,10 +1215,14 @@ def do_get_range_time(df, range_time_def):
     else:
         in_fmt = None
         t_unit = cvs[1]
+    if t_unit.upper() not in ["D", "H", "M", "S"]:
+        print("??error:csv_trimtime:get time of range:invalid unit:{}".format(t_unit), file=sys.stderr)
+        sys.exit(1)
 
-    df[cname] = pd.to_datetime(df[cname], format=in_fmt)
-    dt_max = df[cname].max()
-    dt_min = df[cname].min()
+    return cname, in_fmt, t_unit
+
+
+def range_of_time(cname, dt_min, dt_max, t_unit):
     dt = dt_max - dt_min
     dt = dt.total_seconds()
     unit_s = "seconds"
@@ -783,17 +1235,99 @@ def do_get_range_time(df, range_time_def):
     elif t_unit.upper() == "M":
         dt = dt / (60)
         unit_s = "mins"
-    elif t_unit.upper() != "S":
-        print("??error:csv_trimtime:get time of range:invalid unit:{}".format(t_unit), file=sys.stderr)
-        sys.exit(1)
 
     return dt, cname, unit_s, dt_max, dt_min
 
 
-if __name__ == "__main__":
-    args = init()
+def do_get_range_time(df, range_time_def):
+    cname, in_fmt, t_unit = parse_range_time_definition(range_time_def)
+
+    df[cname] = parse_datetime(df, cname, in_fmt)
+    dt_max = df[cname].max()
+    dt_min = df[cname].min()
+
+    return range_of_time(cname, dt_min, dt_max, t_unit)
+
+
+def get_range_time_file(csv_file, range_time_def, chunk_size=0, use_time_index=False, assume_sorted=False):
+    """range of time of column in file, without reading other columns
+
+    min and max are given by time index, by the first and the last records of sorted column or by reading the column with chunks.
+
+    :param csv_file: path of csv file or file object
+    :param range_time_def: COLUMN[:datetime_format]:unit
+    :param chunk_size: number of rows in each chunk, if 0, RANGE_CHUNK_ROWS is used.
+    :param use_time_index: if True, time index is made or updated when it is not up to date.
+    :param assume_sorted: if True, column is treated as sorted.
+    :returns: range, name of column, unit, max and min
+    :rtype: tuple
+
+    """
+    import pandas as pd
+    from csv_arrow import is_arrow_stream, iter_arrow_stream
+    from csv_index import available_index, get_index, read_csv_rows, load_time_index, get_time_index
+
+    cname, in_fmt, t_unit = parse_range_time_definition(range_time_def)
+    with_index = available_index(csv_file) and not is_arrow_stream(csv_file)
+
+    if with_index:
+        entry = get_time_index(csv_file, cname, in_fmt) if use_time_index else load_time_index(csv_file, cname, in_fmt)
+        if entry is not None and entry["min"] is not None:
+            print("%inf:csv_trimtime:get range of time:given by time index:{}".format(cname), file=sys.stderr)
+            dt_min, dt_max = [pd.Timestamp(v, tz=entry["tz"]) for v in [entry["min"], entry["max"]]]
+            return range_of_time(cname, dt_min, dt_max, t_unit)
+
+    if with_index and assume_sorted:
+        index = get_index(csv_file)
+        if index["n_rows"] > 0:
+            df = pd.concat([
+                read_csv_rows(csv_file, 0, 1, index=index, usecols=[cname], dtype={cname: str}),
+                read_csv_rows(csv_file, index["n_rows"] - 1, 1, index=index, usecols=[cname], dtype={cname: str})
+            ])
+            ts = pd.to_datetime(df[cname], format=in_fmt)
+            if ts.notna().all():
+                print("%inf:csv_trimtime:get range of time:the first and the last records were read:{}".format(cname), file=sys.stderr)
+                return range_of_time(cname, ts.iloc[0], ts.iloc[-1], t_unit)
+        print("#warn:csv_trimtime:get range of time:the first or the last record has no datetime, all records are read", file=sys.stderr)
+    elif assume_sorted:
+        print("#warn:csv_trimtime:'--assume_sorted' is available only for csv file, all records are read", file=sys.stderr)
+
+    chunk_size = RANGE_CHUNK_ROWS if chunk_size == 0 else chunk_size
+    if is_arrow_stream(csv_file):
+        csv_reader = iter_arrow_stream(csv_file, chunk_size)
+    else:
+        csv_reader = pd.read_csv(csv_file, usecols=[cname], dtype={cname: str}, chunksize=chunk_size)
+    dt_mins = []
+    dt_maxs = []
+    for df in csv_reader:
+        ts = pd.to_datetime(df[cname], format=in_fmt, cache=True)
+        dt_mins.append(ts.min())
+        dt_maxs.append(ts.max())
+    print("%inf:csv_trimtime:get range of time:column was read with {} chunks:{}".format(len(dt_mins), cname), file=sys.stderr)
+
+    if len(dt_mins) == 0:
+        return range_of_time(cname, pd.NaT, pd.NaT, t_unit)
+    return range_of_time(cname, pd.Series(dt_mins).min(), pd.Series(dt_maxs).max(), t_unit)
+
+
+def main(args, in_df=None, to_pipe=False):
+    """run csv_trimtime.py with parsed arguments
+
+    :param args: result of init()
+    :param in_df: pandas.DataFrame as input instead of csv file, given by csv_pipeline.py
+    :param to_pipe: if True, result is returned instead of output, for csv_pipeline.py
+    :returns: result and flag whether index is a part of result, only if 'to_pipe' is True.
+    :rtype: tuple
+
+    """
+    import pandas as pd
+    from csv_schema import read_csv_with_schema
+    from csv_arrow import write_dataframe, is_arrow_stream, iter_arrow_stream
+    from csv_index import available_index
+
     csv_file = args.csv_file
     output_file = args.OUTPUT
+    output_format = args.OFORMAT
 
     if csv_file == "-":
         csv_file = sys.stdin
@@ -807,8 +1341,9 @@ if __name__ == "__main__":
     # select hours
     t_select_hours = args.TSELECT_HOURS
 
-    # select hours
+    # select datetime
     t_select_dt = args.TSELECT
+    use_time_index = args.TIME_INDEX
 
     # timestamp
     tstamp_def = args.TSTAMP
@@ -850,68 +1385,227 @@ if __name__ == "__main__":
     resample_defs = args.RESAMPLE
     resample_func = args.RESAMPLE_FUNC
 
-    #--- processing
-    csv_df = pd.read_csv(csv_file)
-
-    out_date_fmt = None
+    if resample_defs is not None:
+        resample_func_map = parse_resample_functions(resample_func, parse_resample_definition(resample_defs)[3])
+        print("%inf:csv_trimtime:resampling:functions={}".format(resample_func_map), file=sys.stderr)
+
+    # streaming mode
+    chunk_size = args.CHUNKSIZE
+    resample_date_fmt = None
+    if chunk_size < 0:
+        print("??error:csv_trimtime:'--chunksize' must be positive:{}".format(chunk_size), file=sys.stderr)
+        sys.exit(1)
 
-    if range_time_defs is not None:
-        r_time, cname, unit_s, dt_max, dt_min = do_get_range_time(csv_df, range_time_defs)
+    # range of time, only the column is read.
+    if range_time_defs is not None and in_df is None:
+        r_time, cname, unit_s, dt_max, dt_min = get_range_time_file(csv_file,
+                                                                    range_time_defs,
+                                                                    chunk_size=chunk_size,
+                                                                    use_time_index=use_time_index,
+                                                                    assume_sorted=args.ASSUME_SORTED)
         print("%inf:csv_trimtime:get time of range:{}:max={},min={}:perid={} {}".format(cname, dt_max, dt_min, r_time, unit_s))
         sys.exit(0)
+    if chunk_size > 0:
+        global_opts = {
+            "--sort_datetime": sort_time_def is not None,
+            "--add_time_column": time_column_def is not None,
+            "--calculate_elapsed_time": elapsed_time_def is not None,
+            "--calculate_time_diff": time_diff is not None,
+        }
+        global_opts = [k for k, v in global_opts.items() if v]
+        if len(global_opts) > 0:
+            print("??error:csv_trimtime:'--chunksize' is not available with {}, those require entire data.".format(",".join(global_opts)),
+                  file=sys.stderr)
+            sys.exit(1)
+        if output_format != "csv":
+            print("??error:csv_trimtime:'--chunksize' is available only for 'csv' output format:{}".format(output_format),
+                  file=sys.stderr)
+            sys.exit(1)
+        if in_df is not None:
+            print("??error:csv_trimtime:'--chunksize' is not available in pipeline", file=sys.stderr)
+            sys.exit(1)
+        if resample_defs is not None:
+            t_freq, columns = parse_resample_definition(resample_defs)[2:]
+            if not isinstance(pd.tseries.frequencies.to_offset(t_freq), pd.offsets.Tick):
+                print("??error:csv_trimtime:'--resample' with '--chunksize' is available only for fixed frequency:{}".format(t_freq),
+                      file=sys.stderr)
+                sys.exit(1)
+            r_funcs = set(sum(resample_func_map.values(), []))
+            # bins at midnight in some chunks must be printed with time, as in the result of entire data.
+            t_step = pd.Timedelta(pd.tseries.frequencies.to_offset(t_freq))
+            if t_step % pd.Timedelta("1D") != pd.Timedelta(0) and t_step % pd.Timedelta("1S") == pd.Timedelta(0):
+                resample_date_fmt = "%Y-%m-%d %H:%M:%S"
+            if len(r_funcs & set(RESAMPLE_METHOD_INTERPOLATE + ["nearest"])) > 0:
+                print("??error:csv_trimtime:'--resample' with '--chunksize' is available only for aggregations:{}".format(resample_func),
+                      file=sys.stderr)
+                sys.exit(1)
+        print("%Inf:csv_trimtime:streaming mode:chunk size={}".format(chunk_size), file=sys.stderr)
+
+    # time index
+    row_range = None
+    if use_time_index:
+        row_opts = {
+            "--sort_datetime": sort_time_def is not None,
+            "--add_time_column": time_column_def is not None,
+            "--calculate_elapsed_time": elapsed_time_def is not None,
+            "--gap": len(gap_defs) > 0,
+            "--time_gap": len(timegap_defs) > 0,
+            "--calculate_time_diff": time_diff is not None,
+            "--change_timefreq": len(ch_timefreqs) > 0,
+            "--reformat": refmt_def is not None,
+            "--resample": resample_defs is not None,
+        }
+        row_opts = [k for k, v in row_opts.items() if v]
+        if t_select_dt is None:
+            print("??error:csv_trimtime:'--time_index' requires '--select_datetime' or '--get_range_of_time'", file=sys.stderr)
+            sys.exit(1)
+        if len(row_opts) > 0:
+            print("??error:csv_trimtime:'--time_index' is not available with {}, those require rows out of range.".format(
+                ",".join(row_opts)),
+                  file=sys.stderr)
+            sys.exit(1)
+        if chunk_size > 0 or in_df is not None or not available_index(csv_file) or is_arrow_stream(csv_file):
+            print("#warn:csv_trimtime:'--time_index' is available only for csv file without '--chunksize', all rows are read",
+                  file=sys.stderr)
+        else:
+            row_range = select_time_index_range(csv_file, t_select_dt)
 
-    if sort_time_def is not None:
-        print("%Inf:csv_trimtime:sort datetime:[{}]".format(sort_time_def), file=sys.stderr)
-        csv_df = sort_time_column(csv_df, sort_time_def)
-
-    # timestamp
-    if tstamp_def is not None:
-        csv_df = evaluate_timestamp(csv_df, tstamp_def)
-
-    # time series
-    if time_column_def is not None:
-        df = do_addtimecolumn(csv_df, time_column_def)
-
-    # reformat
-    if refmt_def is not None:
-        df, out_date_fmt = do_reformat(csv_df, refmt_def)
-
-    if elapsed_time_def is not None:
-        print("%Inf:csv_trimtime:calculate elapsed time:[{}]".format(elapsed_time_def), file=sys.stderr)
-        csv_df = calculate_elapsed_time(csv_df, elapsed_time_def)
-
-    if len(gap_defs) > 0:
-        print("%Inf:csv_trimtime:groupby gap:[{}]".format(gap_defs), file=sys.stderr)
-        csv_df = groupby_value_gap(csv_df, gap_defs)
-
-    if len(timegap_defs) > 0:
-        print("%Inf:csv_trimtime:groupby time gap:[{}]".format(timegap_defs), file=sys.stderr)
-        csv_df = groupby_time_gap(csv_df, timegap_defs)
-
-    if time_diff is not None:
-        print("%Inf:csv_trimtime:calculate time diff:[{}]".format(time_diff), file=sys.stderr)
-        csv_df = calculate_time_diff(csv_df, time_diff)
-
-    if len(ch_timefreqs) > 0:
-        print("%Inf:csv_trimtime:changing time frequency:[{}]".format(ch_timefreqs), file=sys.stderr)
-        csv_df = change_time_frequency(csv_df, ch_timefreqs)
-
-    if decomp_parts is not None:
-        csv_df = decomp_datetime(csv_df, decomp_parts)
-
-    csv_index = False
-    if resample_defs is not None:
-        print("%Inf:csv_trimtime:resampling:[{}]".format(resample_defs), file=sys.stderr)
-        csv_df = do_rsampling(csv_df, resample_defs, resample_func)
-        csv_index = True
-
-    if t_select_dt is not None:
-        print("%Inf:csv_trimtime:select datetime:[{}]".format(t_select_dt), file=sys.stderr)
-        csv_df = do_select_datetime(csv_df, t_select_dt)
+    #--- processing
+    parsed_datetime_memo.clear()
+    if in_df is not None:
+        csv_reader = [in_df]
+    elif chunk_size > 0:
+        if is_arrow_stream(csv_file):
+            csv_reader = iter_arrow_stream(csv_file, chunk_size)
+        else:
+            csv_reader = pd.read_csv(csv_file, chunksize=chunk_size)
+    else:
+        csv_reader = [read_csv_with_schema(csv_file, row_range=row_range)]
+
+    # states of groups and rows of the last bin of resampling over chunks
+    gap_carry = {} if chunk_size > 0 else None
+    timegap_carry = {} if chunk_size > 0 else None
+    resample_carry = {}
+    n_output = 0
+
+    i_chunk = -1
+    n_read_rows = 0
+    for i_chunk, csv_df in enumerate(csv_reader):
+        n_read_rows += len(csv_df)
+        out_date_fmt = None
+
+        if range_time_defs is not None:
+            r_time, cname, unit_s, dt_max, dt_min = do_get_range_time(csv_df, range_time_defs)
+            print("%inf:csv_trimtime:get time of range:{}:max={},min={}:perid={} {}".format(cname, dt_max, dt_min, r_time, unit_s))
+            sys.exit(0)
+
+        if sort_time_def is not None:
+            print("%Inf:csv_trimtime:sort datetime:[{}]".format(sort_time_def), file=sys.stderr)
+            csv_df = sort_time_column(csv_df, sort_time_def)
+
+        # timestamp
+        if tstamp_def is not None:
+            csv_df = evaluate_timestamp(csv_df, tstamp_def)
+
+        # time series
+        if time_column_def is not None:
+            df = do_addtimecolumn(csv_df, time_column_def)
+
+        # reformat
+        if refmt_def is not None:
+            df, out_date_fmt = do_reformat(csv_df, refmt_def)
+
+        if elapsed_time_def is not None:
+            print("%Inf:csv_trimtime:calculate elapsed time:[{}]".format(elapsed_time_def), file=sys.stderr)
+            csv_df = calculate_elapsed_time(csv_df, elapsed_time_def)
+
+        if len(gap_defs) > 0:
+            if i_chunk <= 0:
+                print("%Inf:csv_trimtime:groupby gap:[{}]".format(gap_defs), file=sys.stderr)
+            csv_df = groupby_value_gap(csv_df, gap_defs, carry=gap_carry)
+
+        if len(timegap_defs) > 0:
+            if i_chunk <= 0:
+                print("%Inf:csv_trimtime:groupby time gap:[{}]".format(timegap_defs), file=sys.stderr)
+            csv_df = groupby_time_gap(csv_df, timegap_defs, carry=timegap_carry)
+
+        if time_diff is not None:
+            print("%Inf:csv_trimtime:calculate time diff:[{}]".format(time_diff), file=sys.stderr)
+            csv_df = calculate_time_diff(csv_df, time_diff)
+
+        if len(ch_timefreqs) > 0:
+            print("%Inf:csv_trimtime:changing time frequency:[{}]".format(ch_timefreqs), file=sys.stderr)
+            csv_df = change_time_frequency(csv_df, ch_timefreqs)
+
+        if decomp_parts is not None:
+            csv_df = decomp_datetime(csv_df, decomp_parts)
+
+        csv_index = False
+        if resample_defs is not None:
+            csv_index = True
+            if chunk_size > 0:
+                if i_chunk == 0:
+                    print("%Inf:csv_trimtime:resampling:[{}]".format(resample_defs), file=sys.stderr)
+                csv_df = do_rsampling_stream(csv_df, resample_defs, resample_func, resample_carry)
+                if csv_df is None:
+                    continue
+                out_date_fmt = resample_date_fmt
+            else:
+                print("%Inf:csv_trimtime:resampling:[{}]".format(resample_defs), file=sys.stderr)
+                csv_df = do_rsampling(csv_df, resample_defs, resample_func)
+
+        if t_select_dt is not None:
+            print("%Inf:csv_trimtime:select datetime:[{}]".format(t_select_dt), file=sys.stderr)
+            csv_df = do_select_datetime(csv_df, t_select_dt)
+
+        if t_select_hours is not None:
+            print("%Inf:csv_trimtime:select hours:[{}]".format(t_select_hours), file=sys.stderr)
+            csv_df = do_select_hours(csv_df, t_select_hours)
+            csv_index = True
+
+        if chunk_size > 0:
+            if n_output == 0:
+                print("%inf:csv_trimtime:output into:{}".format(output_file), file=sys.stderr)
+            write_dataframe(csv_df,
+                            output_file,
+                            output_format,
+                            index=csv_index,
+                            date_format=out_date_fmt,
+                            header=n_output == 0,
+                            mode="w" if n_output == 0 else "a")
+            n_output += 1
+
+    if chunk_size > 0:
+        if resample_defs is not None:
+            # the last bin
+            csv_df = do_rsampling_stream(None, resample_defs, resample_func, resample_carry)
+            if csv_df is not None:
+                write_dataframe(csv_df,
+                                output_file,
+                                output_format,
+                                index=True,
+                                date_format=resample_date_fmt,
+                                header=n_output == 0,
+                                mode="w" if n_output == 0 else "a")
+        for cname, carry in gap_carry.items():
+            print_gap_summary("groupby_gap", cname, carry)
+        for cname, carry in timegap_carry.items():
+            print_gap_summary("groupby_time_gap", cname, carry)
+        print("%Inf:csv_trimtime:streaming mode:number of chunks={}:number of rows={}".format(i_chunk + 1, n_read_rows),
+              file=sys.stderr)
+        print_parsed_datetime_memo()
+        return
+
+    print_parsed_datetime_memo()
+    if to_pipe:
+        if out_date_fmt is not None:
+            # as to_csv with 'date_format'
+            for cname in csv_df.select_dtypes(include="datetime").columns:
+                csv_df[cname] = csv_df[cname].dt.strftime(out_date_fmt)
+        return csv_df, csv_index
+    write_dataframe(csv_df, output_file, output_format, index=csv_index, date_format=out_date_fmt)
 
-    if t_select_hours is not None:
-        print("%Inf:csv_trimtime:select hours:[{}]".format(t_select_hours), file=sys.stderr)
-        csv_df = do_select_hours(csv_df, t_select_hours)
-        csv_index = True
 
-    csv_df.to_csv(output_file, index=csv_index, date_format=out_date_fmt)
+if __name__ == "__main__":
+    args = init()
+    main(args)
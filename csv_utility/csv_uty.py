@@ -18,20 +18,15 @@ import textwrap
 import sys
 
 import re
+import ast
 from pathlib import Path
-from distutils.version import LooseVersion
 
+import os
 import json
-
-import numpy as np
-
-import pandas as pd
+import tempfile
 
 VERSION = 1.0
 PANDAS_MIN_VERSION = "1.1.3"
-if LooseVersion(PANDAS_MIN_VERSION) > LooseVersion(pd.__version__):
-    print("??Error:csv_uty:padnas version must be newer than {}.".format(PANDAS_MIN_VERSION), file=sys.stderr)
-    sys.exit(1)
 
 OUTPUT_FORMAT_DESC = {
     "csv": "comma-separated values (csv) file",
@@ -40,13 +35,25 @@ OUTPUT_FORMAT_DESC = {
     "pickel": "Pickle (serialize) object to file",
     "json": "JSON string",
     "feather": "binary Feather format, that requires pyarrow module",
-    "stata": "Stata dta format"
+    "stata": "Stata dta format",
+    "arrow_stream": "Arrow IPC stream, that is read by csv_tools from stdin, requires pyarrow module"
 }
 OUTPUT_FORMAT = list(OUTPUT_FORMAT_DESC.keys())
 OUTPUT_REQUIRED_FILE = ["hdf", "parquet", "pickel", "feather", "stata"]
 
 
-def init():
+def version_tuple(version):
+    """numbers in version string, to compare versions
+
+    :param version: version string, ex. '1.1.3'
+    :returns: tuple of numbers
+    :rtype: tuple
+
+    """
+    return tuple([int(v) for v in re.findall(r"\d+", version)[:3]])
+
+
+def init(argv=None):
     output_format_help = ""
     for k, v in OUTPUT_FORMAT_DESC.items():
         output_format_help += "    {:6s}:{}\n".format(k, v)
@@ -67,8 +74,12 @@ remark:
   the function will be applied by Series.map, see examples.
 
   If you want to use commas in expression of '--add_columns' and '--trim_columns', the comma must be escaped by back-slash. see examples.
+  Each definition of '--add_columns' is parsed only once. 'apply' or 'map' with 'int', 'float', 'lambda x: int(x,base)' or 'lambda x: float(x)'
+  are done by vectorized operation, and if numexpr module is available, expression that has only arithmetic operations 
+  for numeric columns is evaluated by numexpr. Others are evaluated by python per row. Path taken for each definition is printed at end.
   For '--add_columns', values of each column, that start with '0b' or '0o' or '0x', are converted int integer internaly,
   but at output value of those columns was formatted back into original format.
+  Only columns that are referred in '--add_columns' are converted, and the format is checked with sample of rows.
 
   [DEPRECATE] '--change_timefreq' was deprecated. use 'csv_trimtime'.
   For '--change_timefreq', available methods are floor, ceil,round. About format string, you may find answer in
@@ -77,6 +88,24 @@ remark:
   'Time series / date functionality https://pandas.pydata.org/pandas-docs/stable/user_guide/timeseries.html#timeseries-offset-aliases'.
   If you want to use commas and colon in expression of '--change_timefreq', those must be escaped by back-slash. see examples.
 
+  If '--chunksize' was given, input is read and processed with chunk of the given number of rows, and result of each chunk is written
+  into output as soon as it is done, so memory usage depends on the size of chunk, not on the size of file.
+  In this mode, '--transpose' and '--stack' are not available,
+  because those need the entire data. For '--fillna', '@interpolate' and '@backward' are not available, too.
+  Only 'csv' is available as output format.
+  All chunks must have the same columns in the result. for '--decompose_bit_string', NBITS should be given enough large,
+  and '--split_into_columns' with single character separator may not be used.
+  With '--sort' or '--sort_datetime' in this mode, external sort is done: sorted runs are spilled into temporary Arrow files,
+  when size of buffered chunks exceeds half of '--sort_memory', and those are merged into output. pyarrow is required.
+  For '--sort_datetime', columns are sorted as datetime64(int64) values, not as strings.
+  With '--drop_duplicated' in this mode, 128-bit digests of rows are kept in a hash table, and duplicated rows are dropped
+  from each chunk. With '--dedup_partitions', the table is partitioned and stored in temporary memory-mapped files,
+  for key space larger than memory.
+
+  When input is a file, only columns that are needed are read from the file. Those are columns to output by '--columns' and '--columns_regex',
+  and columns that are referred by other options. Columns to drop by '--drop_columns' and '--drop_columns_regex' are not read.
+  '--print_plan' prints the plan of columns to read. For stdin, all columns are read.
+
   After other processings, '--trim_columns' are applied immediately before output.
   When '--drop_dulicated' was given, first row that has same values of columns will be remained.
 
@@ -113,6 +142,7 @@ remark:
     json     : JSON string
     feather  : binary Feather format, that requires pyarrow module
     stata    : Stata dta format
+    arrow_stream : Arrow IPC stream, that is read by csv_tools from stdin, requires pyarrow module
 
   processing order:
    add serial column, dropping columns(regx), dropping rows, dropping na, dropping duplicated, adding columns that was changed with time frequency, 
@@ -120,7 +150,7 @@ remark:
    decompose bits string, sort/sort by datetime, rename columns, stacking
 
 SECURITY WARNING:
-  this use 'exec' for '--add_columns' and '--prologe', '--trim_columns' without any sanity.
+  this use 'exec' or 'eval' for '--add_columns' and '--prologe', '--trim_columns' without any sanity.
 
 example:
   csv_uty.py --serial_column=serial:100 test1.csv
@@ -207,6 +237,9 @@ example:
 
   csv_uty.py --output_format=hdf --output=test.dat bit-pattern-headers.csv
 
+  csv_uty.py --chunksize=100000 --decompose_bit_string=D:16 --drop_columns=A test1.csv
+  csv_uty.py --chunksize=100000 --sort_memory=256 --sort_datetime="desc|ABC002" test_sort.csv
+
   input: test1.csv
   A,B,C,D
   1,2,3,0b01010
@@ -366,6 +399,31 @@ example:
                             metavar='COLUMN[,COLUMN[,COLUMN...]',
                             default=None)
 
+    arg_parser.add_argument("--chunksize",
+                            dest="CHUNKSIZE",
+                            help="number of rows in each chunk for streaming mode, see remark",
+                            type=int,
+                            metavar='ROWS',
+                            default=0)
+    arg_parser.add_argument("--sort_memory",
+                            dest="SORT_MEMORY",
+                            help="memory budget in MB for external sort in streaming mode, default=1024",
+                            type=int,
+                            metavar='MB',
+                            default=1024)
+    arg_parser.add_argument("--dedup_partitions",
+                            dest="DEDUP_PARTITIONS",
+                            help="number of partitions of table of digests on disk for '--drop_duplicated' in streaming mode, default=0(in memory)",
+                            type=int,
+                            metavar='INT',
+                            default=0)
+
+    arg_parser.add_argument("--print_plan",
+                            dest="PRINT_PLAN",
+                            help="print plan of columns to read and exit",
+                            action="store_true",
+                            default=False)
+
     arg_parser.add_argument("--output",
                             dest="OUTPUT",
                             help="path of output csv file, default=stdout",
@@ -376,7 +434,7 @@ example:
     arg_parser.add_argument('csv_file', metavar='CSV_FILE', help='file to read. if "-", stdin is used')
     # arg_parser.add_argument('infile', nargs='?', type=argparse.FileType('r'), default=sys.stdin)
     # arg_parser.add_argument('outfile', nargs='?', type=argparse.FileType('w'), default=sys.stdout)
-    args = arg_parser.parse_args()
+    args = arg_parser.parse_args(argv)
     return args
 
 
@@ -486,60 +544,483 @@ def trim_columns_in_df(df, fmt_columns):
                 try:
                     estr = 'df["{0}"] = df["{0}"].map({1}, na_action="ignore")'.format(cs[0], cs[1])
                     print("%Inf:csv_uty:trim columns:{}".format(estr), file=sys.stderr)
-                    exec(estr)
+                    exec(estr, get_user_code_namespace(), {"df": df})
                 except ValueError as e:
                     print("??Error:csv_uty:trim_columns_in_df:{}={}:{}".format(cs[0], cs[1], e), file=sys.stderr)
         else:
             print("#warning:csv_uty:trim_columns: invalid definitin for triming columns:{}".format(fc), file=sys.stderr)
 
 
-def add_columns_to_df(df, add_columns):
-    """add or replace columns as result of evaluating expression
+ADD_COLUMNS_NUMEXPR_NODES = (ast.Expression, ast.BinOp, ast.UnaryOp, ast.Compare, ast.Name, ast.Load, ast.Constant, ast.Add, ast.Sub,
+                             ast.Mult, ast.Div, ast.USub, ast.UAdd, ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE)
+INT_DIGIT_TABLE = bytes([int(chr(v), 16) if chr(v) in "0123456789abcdefABCDEF" else 255 for v in range(256)])
+INT_PREFIX_BASE = {ord("b"): 2, ord("o"): 8, ord("x"): 16}
+PREFIX_NUMBER_DIGITS = {"b": "01", "o": "0-7", "x": "0-9a-f"}
+PREFIX_NUMBER_SAMPLE_SIZE = 100
+
+numexpr_module = None
+user_code_namespace = None
+
+SORT_SPILL_BATCH_ROWS = 8192
+SORT_RUN_COLUMN = "__csv_uty_sort_run"
+SORT_POS_COLUMN = "__csv_uty_sort_pos"
+pyarrow_module = None
+
+DEDUP_HASH_KEYS = ["0123456789123456", "csv_uty_dedup_lo"]
+DEDUP_TABLE_CAPACITY = 1 << 16
+DEDUP_MAX_LOAD = 0.5
 
-    :param df: dataframe that will be modified inplace.
-    :param add_columns: list of defitions
+
+def get_numexpr():
+    """import numexpr module if it is available
+
+    :returns: numexpr module or None
 
     """
+    global numexpr_module
+    if numexpr_module is None:
+        try:
+            import numexpr
+            numexpr_module = numexpr
+        except ImportError:
+            numexpr_module = False
+    return numexpr_module if numexpr_module else None
+
+
+def get_user_code_namespace():
+    """namespace to run python code given by user with '--prologe', '--add_columns' and '--trim_columns'.
+    numpy and pandas are available as 'np' and 'pd', and names defined by '--prologe' are kept for later code.
+
+    :returns: dict of global names
+    :rtype: dict
+
+    """
+    global user_code_namespace
+    if user_code_namespace is None:
+        import numpy as np
+        import pandas as pd
+        user_code_namespace = dict(globals(), np=np, pd=pd)
+    return user_code_namespace
+
 
+def parse_int_strings(ps, base=0):
+    """convert strings in series into integers, as same as 'int(x, base)', with vectorized operation.
+
+    :param ps: pandas.Series of strings
+    :param base: 0, 2, 8, 10 or 16. if 0, base is derived from prefix('0b','0o','0x') of each value.
+    :returns: pandas.Series of int64 or uint64, or None if values could not be converted by vectorized operation.
+    :remark:
+       None is returned for values that have signs, spaces, underscores, NA and so on,
+       then 'int(x, base)' should be used for those.
+
+    """
+    import numpy as np
+    import pandas as pd
+    if base not in [0, 2, 8, 10, 16] or len(ps) == 0:
+        return None
+    if ps.dtype != object and format(ps.dtype) != "string":
+        return None
+    if ps.isna().any() or pd.api.types.infer_dtype(ps, skipna=False) != "string":
+        return None
+    try:
+        s_a = np.asarray(ps.to_numpy(dtype=object), dtype="S")
+    except UnicodeEncodeError:
+        return None
+    width = s_a.dtype.itemsize
+    if width == 0:
+        return None
+    mat = s_a.view(np.uint8).reshape(len(s_a), width)
+    lengths = (mat != 0).sum(axis=1)
+
+    bases = np.full(len(s_a), 10 if base == 0 else base, dtype=np.uint64)
+    starts = np.zeros(len(s_a), dtype=np.int64)
+    if width > 2:
+        p_base = np.zeros(len(s_a), dtype=np.uint64)
+        for pc, pb in INT_PREFIX_BASE.items():
+            p_base[(mat[:, 1] | 0x20) == pc] = pb
+        has_prefix = (lengths > 2) & (mat[:, 0] == ord("0")) & (p_base > 0)
+        if base == 0:
+            bases[has_prefix] = p_base[has_prefix]
+        elif np.any(has_prefix & (p_base != base)):
+            return None
+        starts[has_prefix] = 2
+    n_digits = lengths - starts
+    if np.any(n_digits <= 0):
+        return None
+    max_digits = {2: 64, 8: 21, 10: 19, 16: 16}
+    for b, md in max_digits.items():
+        if np.any(n_digits[bases == b] > md):
+            return None
+
+    pos = np.arange(width)
+    valid = (pos[np.newaxis, :] >= starts[:, np.newaxis]) & (pos[np.newaxis, :] < lengths[:, np.newaxis])
+    digits = np.frombuffer(INT_DIGIT_TABLE, dtype=np.uint8)[mat]
+    if np.any(valid & (digits >= bases[:, np.newaxis])):
+        return None
+
+    values = np.zeros(len(s_a), dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        for j in range(width):
+            vj = valid[:, j]
+            values[vj] = values[vj] * bases[vj] + digits[vj, j]
+    if base == 0 and np.any((bases == 10) & (n_digits > 1) & (mat[:, 0] == ord("0")) & (values != 0)):
+        # int("010", 0) raises ValueError
+        return None
+    if np.any((bases == 10) & (n_digits == 19) & (values < np.uint64(10**18))):
+        # overflow in 19 digits
+        return None
+
+    if np.all(values < np.uint64(2**63)):
+        values = values.astype(np.int64)
+    return pd.Series(values, index=ps.index, name=ps.name)
+
+
+def apply_column_function(ps, func, conv, base, method, stats, **kwargs):
+    """do 'Series.apply' or 'Series.map' with vectorized operation if possible.
+
+    :param ps: pandas.Series
+    :param func: function that was given to 'apply' or 'map'
+    :param conv: kind of function, 'int' or 'float'
+    :param base: base for 'int'
+    :param method: 'apply' or 'map'
+    :param stats: dict to count fallbacks into python function
+    :returns: pandas.Series
+
+    """
+    import pandas as pd
+    result = None
+    if isinstance(ps, pd.Series) and (method == "apply" or kwargs.get("na_action") is None or not ps.isna().any()):
+        if conv == "int":
+            result = parse_int_strings(ps, base)
+        elif conv == "float" and (ps.dtype == object or format(ps.dtype) == "string"):
+            if not ps.isna().any() and pd.api.types.infer_dtype(ps, skipna=False) == "string":
+                try:
+                    result = ps.astype("float64")
+                except ValueError:
+                    result = None
+    if result is not None:
+        return result
+
+    stats["fallback"] += 1
+    return getattr(ps, method)(func, **kwargs)
+
+
+def rewrite_column_functions(tree, stats):
+    """rewrite 'Series.apply(lambda x: int(x, base))' and others into call of vectorized function
+
+    :param tree: ast of expression
+    :param stats: dict that will be given to 'apply_column_function'
+    :returns: ast and number of rewritten calls
+    :rtype: (ast, int)
+
+    """
+    def conv_of_func(node):
+        arg_name = None
+        if isinstance(node, ast.Name) and node.id in ["int", "float"]:
+            return node.id, 10
+        if not isinstance(node, ast.Lambda) or len(node.args.args) != 1:
+            return None
+        arg_name = node.args.args[0].arg
+        body = node.body
+        if not isinstance(body, ast.Call) or not isinstance(body.func, ast.Name) or len(body.keywords) > 0:
+            return None
+        if body.func.id not in ["int", "float"] or len(body.args) == 0:
+            return None
+        if not isinstance(body.args[0], ast.Name) or body.args[0].id != arg_name:
+            return None
+        if len(body.args) == 1:
+            return body.func.id, 10
+        if body.func.id == "int" and len(body.args) == 2 and isinstance(body.args[1], ast.Constant) and isinstance(
+                body.args[1].value, int):
+            return "int", body.args[1].value
+        return None
+
+    class ColumnFunctionTransformer(ast.NodeTransformer):
+        n_rewrite = 0
+
+        def visit_Call(self, node):
+            self.generic_visit(node)
+            if not isinstance(node.func, ast.Attribute) or node.func.attr not in ["apply", "map"] or len(node.args) != 1:
+                return node
+            if any([kw.arg != "na_action" for kw in node.keywords]):
+                return node
+            conv = conv_of_func(node.args[0])
+            if conv is None:
+                return node
+            new_node = ast.Call(func=ast.Name(id="apply_column_function", ctx=ast.Load()),
+                                args=[
+                                    node.func.value, node.args[0],
+                                    ast.Constant(value=conv[0]),
+                                    ast.Constant(value=conv[1]),
+                                    ast.Constant(value=node.func.attr),
+                                    ast.Name(id="__stats", ctx=ast.Load())
+                                ],
+                                keywords=node.keywords)
+            self.n_rewrite += 1
+            return ast.copy_location(new_node, node)
+
+    transformer = ColumnFunctionTransformer()
+    tree = transformer.visit(tree)
+    return ast.fix_missing_locations(tree), transformer.n_rewrite
+
+
+def compile_add_columns(add_columns):
+    """parse definitions for '--add_columns' and compile those.
+
+    :param add_columns: list of defitions
+    :returns: list of compiled definitions
+    :rtype: list of dict
+
+    """
     print("%inf:csv_uty:add_columns:{}".format(add_columns), file=sys.stderr)
+    result = []
     for ac in add_columns:
         cs = re.split(r"\s*=\s*", ac, maxsplit=1)
-        if len(cs) >= 2:
-            # if cs[0] in df.columns:
-            #     print("??Error:csv_uty:add_columns:{} was already exists".format(cs[0]), file=sys.stderr)
-            #     exit(1)
-            rcs = cs[1]
-            # rcs = re.sub(r'\$(\w+)', r'df["\1"]', rcs)
-            # rcs = re.sub(r'\$([\w:;@_；：＠＿\(\)（）]+)', r'df["\1"]', rcs)
-            rcs = re.sub(r'\${([^}]+)}', r'df["\1"]', rcs)
-            rcs = re.sub(r'(0b[01]+|0o[0-7]+|0x[0-9a-f]+)', lambda m: str(int(m.group(1), 0)), rcs, re.IGNORECASE)
-            rcs = re.sub(r'\\,', r',', rcs)
-            try:
-                estr = 'df["{}"]={}'.format(cs[0], rcs)
-                print("%Inf:csv_uty:add columns:{}".format(estr), file=sys.stderr)
-                exec(estr)
-            except TypeError as e:
-                print("??Error:csv_uty:add_columns_to_df:{}={}:{}".format(cs[0], rcs, e), file=sys.stderr)
+        if len(cs) < 2:
+            print("#warning:csv_uty:add_columns: invalid definitin for add columns:{}".format(ac), file=sys.stderr)
+            continue
+        rcs = re.sub(r'\\,', r',', cs[1])
+        ref_columns = {}
+
+        def ref_name(m):
+            col = m.group(1)
+            if col not in ref_columns:
+                ref_columns[col] = "__col_{}".format(len(ref_columns))
+            return ref_columns[col]
 
+        expr = re.sub(r'\${([^}]+)}', ref_name, rcs)
+        try:
+            tree = ast.parse(expr.strip(), mode="eval")
+        except SyntaxError as e:
+            print("??Error:csv_uty:add_columns:invalid expression:{}={}:{}".format(cs[0], rcs, e), file=sys.stderr)
+            sys.exit(1)
+
+        stats = {"numexpr": 0, "vectorized": 0, "python": 0, "fallback": 0}
+        ne_expr = None
+        if len(ref_columns) > 0 and all([isinstance(v, ADD_COLUMNS_NUMEXPR_NODES) for v in ast.walk(tree)]):
+            if all([not isinstance(v, ast.Constant) or type(v.value) in [int, float] for v in ast.walk(tree)]):
+                ne_expr = expr.strip()
+        n_lambda = len([v for v in ast.walk(tree) if isinstance(v, ast.Lambda)])
+        tree, n_rewrite = rewrite_column_functions(tree, stats)
+        if n_lambda > n_rewrite:
+            path = "python"
+        elif ne_expr is not None and get_numexpr() is not None:
+            path = "numexpr"
         else:
-            print("#warning:csv_uty:add_columns: invalid definitin for add columns:{}".format(ac), file=sys.stderr)
+            path = "vectorized"
+
+        dexpr = re.sub(r'\${([^}]+)}', r'df["\1"]', rcs)
+        print("%Inf:csv_uty:add columns:df[\"{}\"]={}:path={}".format(cs[0], dexpr, path), file=sys.stderr)
+        result.append({
+            "column": cs[0],
+            "definition": rcs,
+            "columns": ref_columns,
+            "code": compile(tree, "<add_columns:{}>".format(cs[0]), "eval"),
+            "numexpr": ne_expr,
+            "refer_df": any([isinstance(v, ast.Name) and v.id == "df" for v in ast.walk(tree)]),
+            "path": path,
+            "stats": stats
+        })
+
+    return result
+
+
+def add_columns_to_df(df, add_columns):
+    """add or replace columns as result of evaluating expression
+
+    :param df: dataframe that will be modified inplace.
+    :param add_columns: list of defitions or result of compile_add_columns
 
+    """
+    import numpy as np
+    import pandas as pd
 
-def prefix_number_to_int(df):
+    if len(add_columns) > 0 and isinstance(add_columns[0], str):
+        add_columns = compile_add_columns(add_columns)
+    for ac in add_columns:
+        cname = ac["column"]
+        try:
+            l_vars = {"df": df, "__stats": ac["stats"]}
+            for col, vname in ac["columns"].items():
+                l_vars[vname] = df[col]
+            # numexpr does not support unsigned integers(ex. uint64 from 64-bit hex), those are evaluated by pandas.
+            if ac["path"] == "numexpr" and all(
+                [isinstance(df[col].dtype, np.dtype) and df[col].dtype.kind in "ifb" for col in ac["columns"]]):
+                ne_vars = {vname: df[col].to_numpy() for col, vname in ac["columns"].items()}
+                df[cname] = pd.Series(get_numexpr().evaluate(ac["numexpr"], local_dict=ne_vars), index=df.index)
+                ac["stats"]["numexpr"] += 1
+            else:
+                n_fallback = ac["stats"]["fallback"]
+                df[cname] = eval(ac["code"], get_user_code_namespace(), l_vars)
+                if ac["path"] == "python" or ac["stats"]["fallback"] > n_fallback:
+                    ac["stats"]["python"] += 1
+                else:
+                    ac["stats"]["vectorized"] += 1
+        except TypeError as e:
+            print("??Error:csv_uty:add_columns_to_df:{}={}:{}".format(cname, ac["definition"], e), file=sys.stderr)
+        except KeyError as e:
+            print("??Error:csv_uty:add_columns_to_df:{}={}:column not found:{}".format(cname, ac["definition"], e), file=sys.stderr)
+            sys.exit(1)
+
+
+def referred_columns_of_add_columns(add_columns):
+    """names of columns that were referred in definitions of '--add_columns'
+
+    :param add_columns: result of compile_add_columns
+    :returns: list of names of columns, or None if all columns may be referred.
+
+    """
+    if any([ac["refer_df"] for ac in add_columns]):
+        return None
+    result = []
+    for ac in add_columns:
+        result.extend([v for v in ac["columns"].keys() if v not in result])
+    return result
+
+
+def report_add_columns(add_columns):
+    """print paths that were taken to evaluate each definition of '--add_columns'
+
+    :param add_columns: result of compile_add_columns
+
+    """
+    for ac in add_columns:
+        st = ac["stats"]
+        print("%inf:csv_uty:add_columns:{}:planned path={}:evaluated by numexpr={},vectorized={},python={}".format(
+            ac["column"], ac["path"], st["numexpr"], st["vectorized"], st["python"]),
+              file=sys.stderr)
+
+
+def sniff_prefix_number(ps, n_sample=PREFIX_NUMBER_SAMPLE_SIZE):
+    """check whether values in series are prefixed integer, using sample of rows.
+
+    :param ps: pandas.Series
+    :param n_sample: number of rows to check
+    :returns: prefix of the first value and length of its digits, or None
+    :rtype: (str, int)
+
+    """
+    import numpy as np
+    import pandas as pd
+    if len(ps) == 0 or (ps.dtype != object and format(ps.dtype) != "string"):
+        return None
+    n_rows = len(ps)
+    i_rows = np.unique(np.r_[np.arange(min(n_rows, n_sample // 2)), np.linspace(0, n_rows - 1, n_sample // 2, dtype=np.int64)])
+    sample = ps.iloc[i_rows].dropna()
+    if len(sample) == 0 or pd.api.types.infer_dtype(sample, skipna=False) != "string":
+        return None
+    val = sample.iloc[0]
+    mode = val[:2]
+    if re.match(r'^(0x[a-f0-9]+|0o[0-7]+|0b[01]+)$', val, re.IGNORECASE) is None:
+        return None
+    if not sample.str.fullmatch(r'0{}[{}]+'.format(mode[1], PREFIX_NUMBER_DIGITS[mode[1].lower()]), case=False).all():
+        return None
+    return mode, len(val) - 2
+
+
+def format_prefix_numbers(ps, mode, length):
+    """convert integers into prefixed strings, as same as 'format(x, "#0{length+2}{mode[1]}")', with vectorized operation.
+
+    :param ps: pandas.Series of integers
+    :param mode: prefix, '0b', '0o', '0x' or '0X'
+    :param length: minimum number of digits
+    :returns: pandas.Series of strings or None if values could not be converted by vectorized operation.
+
+    """
+    import numpy as np
+    import pandas as pd
+    if not pd.api.types.is_integer_dtype(ps.dtype):
+        return None
+    na_mask = ps.isna().to_numpy(dtype=bool)
+    values = ps[~na_mask].to_numpy()
+    if values.dtype.kind == "i":
+        if np.any(values < 0):
+            return None
+        values = values.astype(np.uint64)
+    if len(values) == 0:
+        return ps.astype(object)
+    shift = {"b": 1, "o": 3, "x": 4}[mode[1].lower()]
+    digit_chars = np.frombuffer(b"0123456789ABCDEF" if mode[1] == "X" else b"0123456789abcdef", dtype=np.uint8)
+
+    n_digits = max(-(-64 // shift), length)
+    pos = np.arange(n_digits, dtype=np.uint64)[::-1]
+    shifts = np.minimum(pos * np.uint64(shift), np.uint64(63))
+    digits = ((values[:, np.newaxis] >> shifts) & np.uint64(2**shift - 1)).astype(np.uint8)
+    digits[:, pos * shift >= 64] = 0
+    # number of leading digits to remove
+    nonzero = digits != 0
+    first = np.where(nonzero.any(axis=1), np.argmax(nonzero, axis=1), n_digits - 1)
+    starts = np.minimum(first, n_digits - length)
+    chars = digit_chars[digits]
+    idx = np.arange(n_digits)[np.newaxis, :] + starts[:, np.newaxis]
+    chars = np.where(idx < n_digits, np.take_along_axis(chars, np.minimum(idx, n_digits - 1), axis=1), 0).astype(np.uint8)
+    prefix = np.tile(np.frombuffer(mode.encode(), dtype=np.uint8), (len(values), 1))
+    chars = np.ascontiguousarray(np.hstack([prefix, chars]))
+    strs = chars.view("S{}".format(chars.shape[1])).ravel().astype(str)
+
+    result = pd.Series(np.full(len(ps), np.nan, dtype=object), index=ps.index, name=ps.name)
+    result[~na_mask] = strs
+    return result
+
+
+def prefix_number_to_int(df, columns=None, done_columns=None):
     """convert prefixed integer in dataframe into integer
 
     :param df: dataframe that will be modified inplace.
+    :param columns: names of columns to check, if None, all columns are checked.
+    :param done_columns: result of the call for the first chunk, if given, only these columns are converted with the same prefix and length.
     :returns: information of modified columns
     :rtype: list of dict
 
     """
-    done_columns = []
-    for col in df.columns:
-        val = str(df[col][0])
-        if re.match(r'^(0x[a-f0-9]|0o[0-7]+|0b[01]+)$', val, re.IGNORECASE) is not None:
-            df[col] = df[col].map(lambda x: int(x, 0), na_action='ignore')
-            done_columns.append({"column": col, "mode": val[:2], "length": len(val) - 2})
-    return done_columns
+    import numpy as np
+    import pandas as pd
+    if done_columns is None:
+        if columns is None:
+            columns = df.columns
+        planned = []
+        for col in [v for v in columns if v in df.columns]:
+            sniffed = sniff_prefix_number(df[col])
+            if sniffed is not None:
+                planned.append({"column": col, "mode": sniffed[0], "length": sniffed[1]})
+    else:
+        # chunks after the first are converted as same as the first chunk, then format of columns is not changed between chunks.
+        planned = done_columns
+
+    result = []
+    for col_d in planned:
+        col = col_d["column"]
+        mode = col_d["mode"]
+        base = {"b": 2, "o": 8, "x": 16}[mode[1].lower()]
+        na_mask = df[col].isna()
+        if done_columns is not None and na_mask.all():
+            result.append(col_d)
+            continue
+        values = df[col][~na_mask]
+        if values.dtype.kind == "f":
+            # values without prefix in later chunks may be parsed as numbers by reader.
+            values = values.astype("int64")
+        values = values.astype(str)
+        s_values = values
+        values = parse_int_strings(s_values, base)
+        if values is None:
+            try:
+                values = s_values.map(lambda x: int(x, base))
+            except ValueError as e:
+                if done_columns is not None:
+                    print("??Error:csv_uty:{} was not converted into integer as same as the first chunk:{}".format(col, e), file=sys.stderr)
+                    sys.exit(1)
+                print("#warn:csv_uty:{} was not converted into integer:{}".format(col, e), file=sys.stderr)
+                continue
+        if na_mask.any():
+            dtype = "UInt64" if values.dtype == np.uint64 else "Int64"
+            df[col] = pd.Series(pd.array(np.zeros(len(df), dtype=values.dtype), dtype=dtype), index=df.index)
+            df.loc[na_mask, col] = pd.NA
+            df.loc[~na_mask, col] = values
+        else:
+            df[col] = values
+        result.append(col_d)
+    return result
 
 
 def int_to_prefix_numer(df, done_columns):
@@ -553,8 +1034,12 @@ def int_to_prefix_numer(df, done_columns):
         col = col_d["column"]
         mode = col_d["mode"]
         slen = col_d["length"]
-        fmt = "#0{}{}".format(slen + 2, mode[1])
-        df[col] = df[col].map(lambda x: format(int(x), fmt), na_action='ignore')
+        values = format_prefix_numbers(df[col], mode, slen)
+        if values is not None:
+            df[col] = values
+        else:
+            fmt = "#0{}{}".format(slen + 2, mode[1])
+            df[col] = df[col].map(lambda x: format(int(x), fmt), na_action='ignore')
 
 
 def parse_drop_rows(d_rows):
@@ -578,6 +1063,80 @@ def parse_drop_rows(d_rows):
     return result
 
 
+def decode_bit_patterns(values):
+    """decode strings into bits pattern with vectorized operation
+
+    :param values: numpy array of strings, that were lowered and validated by decomp_bits_pattern.
+    :returns: matrix of bits(LSB first), number of bits for each row and flag of failure for each row
+    :rtype: (numpy.ndarray[int8], numpy.ndarray[int64], numpy.ndarray[bool])
+    :remark:
+       '0b','0o','0x' prefixed values and decimal values are converted into binary without leading zeros,
+       string of decimal that has only '0' and '1' is treated as bits pattern as it is.
+
+    """
+    import numpy as np
+    n_rows = len(values)
+    fallback = np.zeros(n_rows, dtype=bool)
+    try:
+        s_a = np.asarray(values, dtype="S")
+    except UnicodeEncodeError:
+        fallback = np.array([not v.isascii() for v in values], dtype=bool)
+        s_a = np.asarray(np.where(fallback, "0", values), dtype="S")
+    width = max(s_a.dtype.itemsize, 2)
+    s_a = s_a.astype("S{}".format(width))
+    mat = s_a.view(np.uint8).reshape(n_rows, width)
+    lengths = (mat != 0).sum(axis=1)
+
+    prefix = np.where((lengths > 2) & (mat[:, 0] == ord("0")), mat[:, 1], 0)
+    starts = np.where(np.isin(prefix, list(INT_PREFIX_BASE.keys())), 2, 0)
+    n_digits = lengths - starts
+    failed = (n_digits <= 0) & ~fallback
+    n_digits = np.maximum(n_digits, 0)
+
+    # digits in reversed order, the least significant digit is at first
+    pos = np.arange(width)
+    idx = lengths[:, np.newaxis] - 1 - pos[np.newaxis, :]
+    in_digits = pos[np.newaxis, :] < n_digits[:, np.newaxis]
+    d_rev = np.where(in_digits, np.frombuffer(INT_DIGIT_TABLE, dtype=np.uint8)[np.take_along_axis(mat, np.clip(idx, 0, width - 1), axis=1)], 0)
+
+    is_binstr = (starts == 0) & np.all(~in_digits | (d_rev <= 1), axis=1)
+    is_decimal = (starts == 0) & ~is_binstr
+    fallback |= is_decimal & (n_digits > 19)
+    groups = [(is_binstr, 1), (prefix == ord("b"), 1), (prefix == ord("o"), 3), (prefix == ord("x"), 4)]
+
+    bits = np.zeros((n_rows, max(width * 4, 64)), dtype=np.int8)
+    for g_rows, k in groups:
+        g_rows = g_rows & ~fallback & ~failed
+        if not np.any(g_rows):
+            continue
+        g_d = d_rev[g_rows]
+        g_bad = np.any(g_d >= 2**k, axis=1)
+        failed[np.flatnonzero(g_rows)[g_bad]] = True
+        g_bits = ((g_d[:, :, np.newaxis] >> np.arange(k, dtype=np.uint8)) & 1).reshape(len(g_d), width * k)
+        g_bits[g_bad] = 0
+        bits[g_rows, :width * k] = g_bits
+
+    d_rows = is_decimal & ~fallback & ~failed
+    if np.any(d_rows):
+        d_vals = np.zeros(np.count_nonzero(d_rows), dtype=np.uint64)
+        for t in range(min(width, 19)):
+            d_vals += d_rev[d_rows, t].astype(np.uint64) * np.uint64(10**t)
+        bits[d_rows, :64] = (d_vals[:, np.newaxis] >> np.arange(64, dtype=np.uint64)) & np.uint64(1)
+
+    for ir in np.flatnonzero(fallback):
+        vb = "{:0b}".format(int(values[ir]))[::-1]
+        if len(vb) > bits.shape[1]:
+            bits = np.pad(bits, ((0, 0), (0, len(vb) - bits.shape[1])))
+        bits[ir, :len(vb)] = np.frombuffer(vb.encode(), dtype=np.uint8) - ord("0")
+
+    has_bits = bits.any(axis=1)
+    n_bits = np.where(has_bits, bits.shape[1] - np.argmax(bits[:, ::-1], axis=1), 1)
+    n_bits = np.where(is_binstr & ~fallback, n_digits, n_bits)
+    n_bits[failed] = 0
+
+    return bits, n_bits, failed
+
+
 def decomp_bits_pattern(df, column_name, nbits=0):
     """decompose string into character as bits pattern.
 
@@ -593,49 +1152,47 @@ def decomp_bits_pattern(df, column_name, nbits=0):
         but "200" is treated as decimal value and results is ["1","1","0","0","1","0","0","0"].
 
     """
+    import numpy as np
+    import pandas as pd
     print("%inf:csv_uty:decomp_bits:{}".format(column_name), file=sys.stderr)
     df.reset_index(inplace=True)
     ds = df[column_name]
     if format(ds.dtype) != "string" and format(ds.dtype) != "object":
         print("??Error:csv_uty:{} has no string.".format(column_name), file=sys.stderr)
         return
-    if nbits > 0:
-        cns = ["{}_B{:03d}".format(column_name, i) for i in range(nbits)]
-        df[cns] = 0
-        cnames = set(cns)
-    else:
-        cnames = set()
 
-    ds.fillna("0", inplace=True)
-    for ir in range(len(df)):
-        val = ds.loc[ir]
-        if val is np.nan or val is None:
-            continue
-        val = val.strip('"\'')  # removing quotation
-        val = re.sub(r"\.0$", "", val)  # removing the trailing ".0"
-        if not val.isdecimal() and not (val.startswith("0b") or val.startswith("0o") or val.startswith("0x") and val[2:].isdecimal()):
+    ds = ds.fillna("0")
+    df[column_name] = ds
+    ds = ds.astype(str).str.strip('"\'')  # removing quotation
+    ds = ds.str.replace(r"\.0$", "", regex=True)  # removing the trailing ".0"
+    is_valid = ds.str.isdecimal() | ds.str.startswith("0b") | ds.str.startswith("0o") | (ds.str.startswith("0x")
+                                                                                          & ds.str[2:].str.isdecimal())
+    is_valid = is_valid.to_numpy(dtype=bool)
+    for val in ds[~is_valid]:
+        print("??Error:csv_uty:{} was not decimal value:{}".format(val, column_name), file=sys.stderr)
+
+    bits = np.zeros((len(df), 0), dtype=np.int8)
+    n_bits = np.zeros(len(df), dtype=np.int64)
+    if np.any(is_valid):
+        v_bits, v_nbits, v_failed = decode_bit_patterns(ds[is_valid].str.lower().to_numpy(dtype=object))
+        for val in ds[is_valid][v_failed]:
             print("??Error:csv_uty:{} was not decimal value:{}".format(val, column_name), file=sys.stderr)
-            continue
-        val = val.lower()
-        if val.isdecimal() and len(re.sub(r"[01]", "", val)) > 0:
-            val = "{:0b}".format(int(val))
-        elif val.startswith("0b"):
-            val = "{:0b}".format(int(val[2:], 2))
-        elif val.startswith("0o"):
-            val = "{:0b}".format(int(val[2:], 8))
-        elif val.startswith("0x"):
-            val = "{:0b}".format(int(val[2:], 16))
-        vals = list(reversed(list(val)))
-        vname = ["{}_B{:03d}".format(column_name, i) for i in range(len(vals))]
-        cnames.update(set(vname))
-        df.loc[ir, vname] = vals
-
-    print("%Inf:csv_uty:new columns was added: {}".format(sorted(list(cnames))), file=sys.stderr)
-
-    # fillna by '0'
-    for cn in cnames:
-        df[cn].fillna(0, inplace=True)
-        df[cn] = df[cn].astype('int64')
+        bits = np.zeros((len(df), v_bits.shape[1]), dtype=np.int8)
+        bits[is_valid] = v_bits
+        n_bits[is_valid] = v_nbits
+
+    ncols = max(nbits, int(n_bits.max()) if len(n_bits) > 0 else 0)
+    if ncols > bits.shape[1]:
+        bits = np.pad(bits, ((0, 0), (0, ncols - bits.shape[1])))
+    cnames = ["{}_B{:03d}".format(column_name, i) for i in range(ncols)]
+    print("%Inf:csv_uty:new columns was added: {}".format(sorted(cnames)), file=sys.stderr)
+
+    bits_df = pd.DataFrame(bits[:, :ncols], columns=cnames, index=df.index)
+    e_cols = [v for v in cnames if v in df.columns]
+    if len(e_cols) > 0:
+        df[e_cols] = bits_df[e_cols]
+        bits_df.drop(columns=e_cols, inplace=True)
+    df = pd.concat([df, bits_df], axis=1)
 
     return df
 
@@ -649,6 +1206,7 @@ def change_time_frequency(df, ch_definitions):
     :rtype: 
 
     """
+    import pandas as pd
     print("%inf:csv_uty:change_timefreq:{}".format(ch_definitions), file=sys.stderr)
     print("#warn:csv_uty:change_timefreq:THIS IS DEPRECATED. USE csv_trimtime.py", file=sys.stderr)
 
@@ -690,11 +1248,12 @@ def change_time_frequency(df, ch_definitions):
     return df
 
 
-def do_fillna(df, fillna_defs):
+def do_fillna(df, fillna_defs, carry=None):
     """FIXME! briefly describe function
 
     :param df: 
     :param fillna_defs: [COLUMN=[@]value,...]
+    :param carry: dict to carry last valid values for '@forward' over chunks, in streaming mode.
     :returns: 
     :rtype: 
 
@@ -710,6 +1269,11 @@ def do_fillna(df, fillna_defs):
             df[cname].interpolate(limit_area='outside', inplace=True)
         elif f_value == "@forward":
             df[cname].ffill(inplace=True)
+            if carry is not None:
+                if cname in carry:
+                    df[cname].fillna(carry[cname], inplace=True)
+                if df[cname].last_valid_index() is not None:
+                    carry[cname] = df[cname].loc[df[cname].last_valid_index()]
         elif f_value == "@backward":
             df[cname].bfill(inplace=True)
         else:
@@ -775,6 +1339,7 @@ def do_split_into_columns(df, split_flags):
     :rtype: 
 
     """
+    import pandas as pd
     print("%inf:csv_uty:split_into_columns:{}".format(split_flags), file=sys.stderr)
     for sf in split_flags:
         cvs = re.split(r"\s*(?<!\\):\s*", sf)
@@ -795,13 +1360,14 @@ def do_split_into_columns(df, split_flags):
     return df
 
 
-def do_sort(df, column_defs, datetime_fmt=None):
-    if datetime_fmt is None:
-        print("%inf:csv_uty:sort:{}".format(column_defs), file=sys.stderr)
-    else:
-        print("%inf:csv_uty:sort as datetime:{},fmt={}".format(column_defs, datetime_fmt), file=sys.stderr)
-    # column_defs= [asc_or_desc|]column[,column...]
+def parse_sort_defs(column_defs):
+    """parse definition of sorting
 
+    :param column_defs: [asc_or_desc|]column[,column...]
+    :returns: names of columns and ascending
+    :rtype: tuple(list[str],bool)
+
+    """
     ascending = True
     if column_defs.find("|") != -1:
         cvs = re.split(r"\|", column_defs)
@@ -815,16 +1381,387 @@ def do_sort(df, column_defs, datetime_fmt=None):
         column_defs = cvs[1]
 
     columns = re.split(r"\s*,\s*", column_defs)
+    return columns, ascending
+
+
+def convert_sort_datetime(df, columns, datetime_fmt):
+    """convert columns to sort into datetime, those are sorted as int64 values of datetime64.
+
+    :param df: pandas.DataFrame
+    :param columns: names of columns
+    :param datetime_fmt: format of datetime
+    :returns: pandas.DataFrame
+    :rtype: pandas.DataFrame
+
+    """
+    import pandas as pd
+    for cn in columns:
+        df[cn] = pd.to_datetime(df[cn], format=datetime_fmt)
+    return df
+
+
+def do_sort(df, column_defs, datetime_fmt=None):
+    if datetime_fmt is None:
+        print("%inf:csv_uty:sort:{}".format(column_defs), file=sys.stderr)
+    else:
+        print("%inf:csv_uty:sort as datetime:{},fmt={}".format(column_defs, datetime_fmt), file=sys.stderr)
+    # column_defs= [asc_or_desc|]column[,column...]
+
+    columns, ascending = parse_sort_defs(column_defs)
 
     if datetime_fmt is not None:
-        for cn in columns:
-            df[cn] = pd.to_datetime(df[cn], format=datetime_fmt)
+        df = convert_sort_datetime(df, columns, datetime_fmt)
 
     df.sort_values(columns, ascending=ascending, inplace=True, axis=0, na_position="last")
     return df
 
 
-def output_dataframe(df, output_file, output_format, index=False, columns=[]):
+def get_pyarrow():
+    """import pyarrow module if it is available
+
+    :returns: pyarrow module or None
+
+    """
+    global pyarrow_module
+    if pyarrow_module is None:
+        try:
+            import pyarrow
+            import pyarrow.ipc
+            pyarrow_module = pyarrow
+        except ImportError:
+            pyarrow_module = False
+    return pyarrow_module if pyarrow_module else None
+
+
+def spill_sorted_run(df, columns, ascending, spill_dir, i_run):
+    """sort dataframe and spill it into temporary Arrow file as a run of external sort
+
+    :param df: pandas.DataFrame
+    :param columns: names of columns to sort
+    :param ascending: ascending or descending
+    :param spill_dir: directory to spill
+    :param i_run: index of run
+    :returns: path of spilled file
+    :rtype: Path
+
+    """
+    pa = get_pyarrow()
+    df = df.sort_values(columns, ascending=ascending, axis=0, na_position="last", kind="mergesort")
+    run_path = Path(spill_dir) / "run_{:05d}.arrow".format(i_run)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    with pa.OSFile(str(run_path), "wb") as f:
+        writer = pa.ipc.new_file(f, table.schema)
+        writer.write_table(table, max_chunksize=SORT_SPILL_BATCH_ROWS)
+        writer.close()
+    return run_path
+
+
+def merge_sorted_runs(run_paths, columns, ascending, batch_rows):
+    """k-way merge of sorted runs
+
+    Rows from each run are loaded up to 'batch_rows'. Rows that are not larger than the last loaded row of every
+    run, that has more rows, are merged and yielded at each step.
+
+    :param run_paths: paths of spilled runs
+    :param columns: names of columns to sort
+    :param ascending: ascending or descending
+    :param batch_rows: number of rows to load from each run at once
+    :returns: generator of sorted pandas.DataFrame
+
+    """
+    import numpy as np
+    import pandas as pd
+    pa = get_pyarrow()
+    readers = [pa.ipc.open_file(pa.memory_map(str(v))) for v in run_paths]
+    next_batch = [0] * len(readers)
+    buffers = [None] * len(readers)
+
+    def load_rows(i_run):
+        reader = readers[i_run]
+        batches = []
+        n_rows = 0
+        while next_batch[i_run] < reader.num_record_batches and n_rows < batch_rows:
+            batch = reader.get_batch(next_batch[i_run])
+            next_batch[i_run] += 1
+            batches.append(batch)
+            n_rows += batch.num_rows
+        if len(batches) == 0:
+            return None
+        df = pa.Table.from_batches(batches).to_pandas()
+        df[SORT_RUN_COLUMN] = i_run
+        return df
+
+    sort_columns = columns + [SORT_RUN_COLUMN, SORT_POS_COLUMN]
+    sort_ascending = [ascending] * len(columns) + [True, True]
+    while True:
+        for i_run in range(len(readers)):
+            if buffers[i_run] is None or len(buffers[i_run]) == 0:
+                buffers[i_run] = load_rows(i_run)
+        active = [v for v in buffers if v is not None and len(v) > 0]
+        if len(active) == 0:
+            break
+        merged_df = pd.concat(active, ignore_index=True)
+        merged_df[SORT_POS_COLUMN] = np.arange(len(merged_df))
+        merged_df.sort_values(sort_columns, ascending=sort_ascending, inplace=True, na_position="last", kind="mergesort")
+        merged_df.reset_index(drop=True, inplace=True)
+
+        # rows up to the first of last loaded rows of runs, that have more rows, may be output.
+        n_out = len(merged_df)
+        for i_run in range(len(readers)):
+            if buffers[i_run] is not None and next_batch[i_run] < readers[i_run].num_record_batches:
+                pos = np.flatnonzero(merged_df[SORT_RUN_COLUMN].to_numpy() == i_run)[-1]
+                n_out = min(n_out, pos + 1)
+
+        rest_df = merged_df.iloc[n_out:]
+        for i_run in range(len(readers)):
+            if buffers[i_run] is not None:
+                buffers[i_run] = rest_df[rest_df[SORT_RUN_COLUMN] == i_run].drop(columns=[SORT_POS_COLUMN])
+        yield merged_df.iloc[:n_out].drop(columns=[SORT_RUN_COLUMN, SORT_POS_COLUMN])
+
+
+def row_digests(df, columns=None):
+    """128-bit digests of rows, as two arrays of uint64
+
+    :param df: pandas.DataFrame
+    :param columns: names of columns to make digests, None means all columns.
+    :returns: upper and lower 64bits of digests
+    :rtype: tuple(numpy.ndarray,numpy.ndarray)
+
+    """
+    import numpy as np
+    import pandas as pd
+    if columns is not None:
+        df = df[columns]
+    hi = pd.util.hash_pandas_object(df, index=False, hash_key=DEDUP_HASH_KEYS[0]).to_numpy(dtype=np.uint64)
+    lo = pd.util.hash_pandas_object(df[df.columns[::-1]], index=False, hash_key=DEDUP_HASH_KEYS[1]).to_numpy(dtype=np.uint64)
+    # (0,0) is used as empty slot of table
+    lo[(hi == 0) & (lo == 0)] = 1
+    return hi, lo
+
+
+def make_digest_table(capacity, spill_dir=None):
+    """make open-addressing table of digests
+
+    :param capacity: number of slots, that must be power of 2
+    :param spill_dir: if given, slots are stored in memory-mapped files in the directory
+    :returns: table
+    :rtype: dict
+
+    """
+    import numpy as np
+    table = {"n": 0, "capacity": capacity, "spill_dir": spill_dir}
+    if spill_dir is None:
+        table["hi"] = np.zeros(capacity, dtype=np.uint64)
+        table["lo"] = np.zeros(capacity, dtype=np.uint64)
+    else:
+        for k in ["hi", "lo"]:
+            fd, path = tempfile.mkstemp(prefix="digest_{}_".format(k), dir=spill_dir)
+            os.close(fd)
+            table[k] = np.memmap(path, dtype=np.uint64, mode="w+", shape=(capacity, ))
+    return table
+
+
+def probe_digest_table(table, hi, lo):
+    """insert digests, that are unique each other, into table
+
+    :param table: table of digests
+    :param hi: upper 64bits of digests
+    :param lo: lower 64bits of digests
+    :returns: True for digests that were not in the table
+    :rtype: numpy.ndarray
+
+    """
+    import numpy as np
+    is_new = np.zeros(len(hi), dtype=bool)
+    mask = np.uint64(table["capacity"] - 1)
+    t_hi = table["hi"]
+    t_lo = table["lo"]
+    pend = np.arange(len(hi))
+    slots = (lo & mask).astype(np.int64)
+    while len(pend) > 0:
+        s_hi = t_hi[slots]
+        s_lo = t_lo[slots]
+        done = (s_hi == hi[pend]) & (s_lo == lo[pend])
+        e_idx = np.flatnonzero((s_hi == 0) & (s_lo == 0))
+        if len(e_idx) > 0:
+            # first one of digests for the same empty slot takes it, others go to next slot
+            _, first_pos = np.unique(slots[e_idx], return_index=True)
+            winners = e_idx[first_pos]
+            t_hi[slots[winners]] = hi[pend[winners]]
+            t_lo[slots[winners]] = lo[pend[winners]]
+            is_new[pend[winners]] = True
+            done[winners] = True
+            table["n"] += len(winners)
+        pend = pend[~done]
+        slots = (slots[~done] + 1) & np.int64(mask)
+    return is_new
+
+
+def grow_digest_table(table, n_add):
+    """grow table to keep load factor under DEDUP_MAX_LOAD
+
+    :param table: table of digests
+    :param n_add: number of digests to be added
+    :returns: table
+    :rtype: dict
+
+    """
+    import numpy as np
+    capacity = table["capacity"]
+    while (table["n"] + n_add) > capacity * DEDUP_MAX_LOAD:
+        capacity *= 2
+    if capacity == table["capacity"]:
+        return table
+    used = (table["hi"] != 0) | (table["lo"] != 0)
+    o_hi = np.asarray(table["hi"][used])
+    o_lo = np.asarray(table["lo"][used])
+    new_table = make_digest_table(capacity, spill_dir=table["spill_dir"])
+    probe_digest_table(new_table, o_hi, o_lo)
+    for k in ["hi", "lo"]:
+        if isinstance(table[k], np.memmap):
+            path = table[k].filename
+            del table[k]
+            os.remove(path)
+    return new_table
+
+
+def drop_duplicated_digests(tables, hi, lo):
+    """find rows, that have digest that was already seen, and register new digests
+
+    :param tables: list of tables of digests, those are partitioned by upper bits of digests
+    :param hi: upper 64bits of digests
+    :param lo: lower 64bits of digests
+    :returns: True for rows to keep
+    :rtype: numpy.ndarray
+
+    """
+    import numpy as np
+    import pandas as pd
+    keep = np.zeros(len(hi), dtype=bool)
+    first = np.flatnonzero(~pd.DataFrame({"hi": hi, "lo": lo}).duplicated(keep="first").to_numpy())
+    n_part = len(tables)
+    part = (hi[first] % np.uint64(n_part)).astype(np.int64) if n_part > 1 else np.zeros(len(first), dtype=np.int64)
+    for ip in np.unique(part):
+        idx = first[part == ip]
+        tables[ip] = grow_digest_table(tables[ip], len(idx))
+        keep[idx] = probe_digest_table(tables[ip], hi[idx], lo[idx])
+    return keep
+
+
+def collect_referred_columns(add_columns=[],
+                             trm_columns=[],
+                             typ_columns=[],
+                             fillna_defs=[],
+                             replace_defs=[],
+                             split_csvs=[],
+                             split_flags=[],
+                             decomp_bits_columns=[],
+                             ch_timefreqs=[],
+                             drop_na_columns=[],
+                             drop_dup_columns=[],
+                             sort_defs=None,
+                             stack_group_column=None):
+    """names of columns that are referred by processings
+
+    :returns: list of names of columns, or None if all columns may be referred.
+    :rtype: list[str]
+
+    """
+    if len(drop_na_columns) > 0 and drop_na_columns[0] == "all":
+        return None
+    if len(drop_dup_columns) > 0 and drop_dup_columns[0] == "all":
+        return None
+    result = drop_na_columns + drop_dup_columns
+    if len(add_columns) > 0:
+        ac_cols = referred_columns_of_add_columns(add_columns)
+        if ac_cols is None:
+            return None
+        result.extend(ac_cols)
+    for defs in [trm_columns, typ_columns, fillna_defs, replace_defs]:
+        result.extend([re.split(r"\s*(?<!\\)=\s*", v)[0] for v in defs])
+    for defs in [split_csvs, split_flags]:
+        result.extend([re.split(r"\s*(?<!\\):\s*", v)[0] for v in defs])
+    result.extend([re.split(r":", v)[0] for v in decomp_bits_columns])
+    for cdf in ch_timefreqs:
+        cvs = re.split(r"\s*(?<!\\)=\s*", cdf)
+        if len(cvs) > 1:
+            result.append(re.split(r"\s*(?<!\\):\s*", cvs[1])[0])
+    if sort_defs is not None:
+        result.extend(re.split(r"\s*,\s*", re.split(r"\|", sort_defs)[-1]))
+    if stack_group_column is not None:
+        result.append(stack_group_column)
+
+    return result
+
+
+def plan_read_columns(in_file, output_columns, output_columns_regex, drop_columns, drop_columns_regex, referred_columns, rename_columns):
+    """make plan of columns to read from header of csv file
+
+    :param in_file: path of csv file
+    :param output_columns: names of columns to output
+    :param output_columns_regex: pattern of names of columns to output
+    :param drop_columns: names of columns to drop
+    :param drop_columns_regex: pattern of names of columns to drop
+    :param referred_columns: names of columns that are referred by processings, None means all columns
+    :param rename_columns: dict of renaming
+    :returns: plan, 'usecols' is list of columns to read or None for all columns
+    :rtype: dict
+
+    """
+    import pandas as pd
+    header = list(pd.read_csv(in_file, dtype="string", nrows=0).columns)
+    dropped = [v for v in header if v in drop_columns]
+    if drop_columns_regex is not None:
+        dropped.extend([v for v in header if re.search(drop_columns_regex, v) and v not in dropped])
+
+    o_cols = list(output_columns)
+    if output_columns_regex is not None:
+        o_cols.extend([v for v in header if re.search(output_columns_regex, v)])
+        # columns selected by regex are read to be dropped after selection, as before.
+        dropped = [v for v in dropped if not re.search(output_columns_regex, v)]
+
+    needed = None
+    if len(o_cols) > 0 and referred_columns is not None:
+        r_rename = {}
+        for k, v in rename_columns.items():
+            r_rename.setdefault(v, []).append(k)
+        needed = set(referred_columns)
+        for oc in o_cols:
+            needed.add(oc)
+            needed.update(r_rename.get(oc, []))
+
+    usecols = [v for v in header if v not in dropped and (needed is None or v in needed)]
+    plan = {
+        "header": header,
+        "usecols": usecols if len(usecols) < len(header) else None,
+        "dropped": dropped,
+        "output": o_cols,
+        "referred": referred_columns if referred_columns is not None else "all"
+    }
+    print("%inf:csv_uty:plan:number of columns to read={} of {}".format(len(usecols), len(header)), file=sys.stderr)
+    return plan
+
+
+def print_read_plan(plan, output=sys.stderr):
+    """print plan of reading columns
+
+    :param plan: result of plan_read_columns
+    :param output: file to print
+
+    """
+    print("==== plan of reading columns", file=output)
+    print("-- number of columns in header: {}".format(len(plan["header"])), file=output)
+    print("-- columns to output          : {}".format(plan["output"] if len(plan["output"]) > 0 else "all"), file=output)
+    print("-- columns referred           : {}".format(plan["referred"]), file=output)
+    print("-- columns to drop            : {}".format(plan["dropped"]), file=output)
+    if plan["usecols"] is None:
+        print("-- columns to read            : all", file=output)
+    else:
+        print("-- columns to read            : {}".format(plan["usecols"]), file=output)
+        print("-- columns to skip            : {}".format([v for v in plan["header"] if v not in plan["usecols"]]), file=output)
+
+
+def output_dataframe(df, output_file, output_format, index=False, columns=[], append=False):
     """FIXME! briefly describe function
 
     :param df: 
@@ -832,16 +1769,21 @@ def output_dataframe(df, output_file, output_format, index=False, columns=[]):
     :param output_format: 
     :param index: 
     :param columns: 
+    :param append: if True, df is appended into output_file without header, only for csv format.
     :returns: 
     :rtype: 
 
     """
-    print("%inf:csv_uty:output into:{} with '{}' format".format(output_file, output_format), file=sys.stderr)
+    if not append:
+        print("%inf:csv_uty:output into:{} with '{}' format".format(output_file, output_format), file=sys.stderr)
     if len(columns) > 0:
         d_cols = list(set(df.columns) - set(columns))
         df.drop(columns=d_cols, inplace=True)
     if output_format == "csv":
-        df.to_csv(output_file, index=index)
+        if append:
+            df.to_csv(output_file, index=index, header=False, mode="a")
+        else:
+            df.to_csv(output_file, index=index)
     elif output_format == "hdf":
         df.to_hdf(output_file, key="csv_uty", mode="w", complevel=6)
     elif output_format == "parquet":
@@ -854,14 +1796,33 @@ def output_dataframe(df, output_file, output_format, index=False, columns=[]):
         df.to_feather(output_file)
     elif output_format == "stata":
         df.to_stata(output_file, write_index=index)
+    elif output_format == "arrow_stream":
+        from csv_arrow import write_arrow_stream
+        write_arrow_stream(df, output_file, index=index)
 
 
 # def do_join_columns(df):
 #     df[cname] = df[columns].agg(sep.join, axis=1)
 #     pass
 
-if __name__ == "__main__":
-    args = init()
+
+def main(args, in_df=None, to_pipe=False):
+    """run csv_uty.py with parsed arguments
+
+    :param args: result of init()
+    :param in_df: pandas.DataFrame as input instead of csv file, given by csv_pipeline.py
+    :param to_pipe: if True, result is returned instead of output, for csv_pipeline.py
+    :returns: result and flag whether index is a part of result, only if 'to_pipe' is True.
+    :rtype: tuple
+
+    """
+    import pandas as pd
+    from csv_arrow import is_arrow_stream, read_arrow_stream, iter_arrow_stream
+    from csv_schema import read_csv_with_schema
+    if version_tuple(PANDAS_MIN_VERSION) > version_tuple(pd.__version__):
+        print("??Error:csv_uty:padnas version must be newer than {}.".format(PANDAS_MIN_VERSION), file=sys.stderr)
+        sys.exit(1)
+
     csv_file = args.csv_file
     output_file = args.OUTPUT
     trans_mode = args.TRANS
@@ -878,7 +1839,7 @@ if __name__ == "__main__":
             if len(pp) == 0:
                 continue
             print("%Inf:csv_uty:exec python code:{}".format(pp), file=sys.stderr)
-            exec(pp)
+            exec(pp, get_user_code_namespace())
 
     output_columns_s = args.OCOLS
     output_columns = []
@@ -979,6 +1940,7 @@ if __name__ == "__main__":
     add_columns = []
     if add_columns_s is not None:
         add_columns = re.split(r"\s*(?<!\\),\s*", add_columns_s)
+        add_columns = compile_add_columns(add_columns)
 
     # trim columns
     trm_columns_s = args.TRMS
@@ -1023,174 +1985,389 @@ if __name__ == "__main__":
         print("??error:csv_uty:invalid combination: '--stack' and '--transpose'", file=sys.stderr)
         sys.exit(1)
 
-    #--- processig
-    print("%Inf:csv_uty:read data from {}".format(in_file), file=sys.stderr)
-    csv_df = pd.read_csv(in_file, dtype="string")
-    # csv_df = pd.read_csv(in_file)
-
-    # columsn to output
-    if output_columns_regex is not None:
-        o_cols = [v for v in csv_df.columns if re.search(output_columns_regex, v)]
-        print("%inf:csv_uty:output_columns_regex:columns to output:{}".format(o_cols), file=sys.stderr)
-        output_columns.extend(o_cols)
-
-    # add serial column
-    if len(serial_column) > 0:
-        print("%Inf:csv_uty:add serial column:{}".format(serial_column), file=sys.stderr)
-        if serial_column in csv_df:
-            print("#Warn:csv_uty:{} already exits, it was overwritten.", file=sys.stderr)
-        csv_df[serial_column] = list(range(0, len(csv_df) * serial_step, serial_step))
-
-    # drop columns
-    if drop_columns_regex is not None:
-        d_cols = [v for v in csv_df.columns if re.search(drop_columns_regex, v)]
-        print("%inf:csv_uty:drop_columns_regex: columns to drop:{}".format(d_cols), file=sys.stderr)
-        drop_columns.extend(d_cols)
-        for dc in drop_columns:
+    # streaming mode
+    chunk_size = args.CHUNKSIZE
+    if chunk_size < 0:
+        print("??error:csv_uty:'--chunksize' must be positive:{}".format(chunk_size), file=sys.stderr)
+        sys.exit(1)
+    if chunk_size > 0:
+        global_opts = {
+            "--transpose": trans_mode,
+            "--stack": stack_group_column is not None,
+        }
+        global_opts = [k for k, v in global_opts.items() if v]
+        if len(global_opts) > 0:
+            print("??error:csv_uty:'--chunksize' is not available with {}, those require entire data.".format(",".join(global_opts)),
+                  file=sys.stderr)
+            sys.exit(1)
+        for fd in fillna_defs:
+            if re.search(r"(?<!\\)=\s*@(interpolate|backward)$", fd) is not None:
+                print("??error:csv_uty:'--chunksize' is not available with '--fillna':{}".format(fd), file=sys.stderr)
+                sys.exit(1)
+        if output_format != "csv":
+            print("??error:csv_uty:'--chunksize' is available only for 'csv' output format:{}".format(output_format), file=sys.stderr)
+            sys.exit(1)
+        if sort_defs is not None and get_pyarrow() is None:
+            print("??error:csv_uty:pyarrow is required for '--sort' and '--sort_datetime' with '--chunksize'", file=sys.stderr)
+            sys.exit(1)
+        if args.DEDUP_PARTITIONS < 0:
+            print("??error:csv_uty:'--dedup_partitions' must be positive:{}".format(args.DEDUP_PARTITIONS), file=sys.stderr)
+            sys.exit(1)
+        if args.SORT_MEMORY <= 0:
+            print("??error:csv_uty:'--sort_memory' must be positive:{}".format(args.SORT_MEMORY), file=sys.stderr)
+            sys.exit(1)
+        if in_df is not None:
+            print("??error:csv_uty:'--chunksize' is not available in pipeline", file=sys.stderr)
+            sys.exit(1)
+        print("%Inf:csv_uty:streaming mode:chunk size={}".format(chunk_size), file=sys.stderr)
+
+    # columns to read
+    read_plan = None
+    usecols = None
+    if csv_file != "-" and in_df is None:
+        referred_columns = collect_referred_columns(add_columns=add_columns,
+                                                    trm_columns=trm_columns,
+                                                    typ_columns=typ_columns,
+                                                    fillna_defs=fillna_defs,
+                                                    replace_defs=replace_defs,
+                                                    split_csvs=split_csvs,
+                                                    split_flags=split_flags,
+                                                    decomp_bits_columns=decomp_bits_columns,
+                                                    ch_timefreqs=ch_timefreqs,
+                                                    drop_na_columns=drop_na_columns,
+                                                    drop_dup_columns=drop_dup_columns,
+                                                    sort_defs=sort_defs,
+                                                    stack_group_column=stack_group_column)
+        read_plan = plan_read_columns(in_file, output_columns, output_columns_regex, drop_columns, drop_columns_regex, referred_columns,
+                                      rename_columns)
+        usecols = read_plan["usecols"]
+        for dc in read_plan["dropped"]:
             if dc in output_columns:
                 output_columns.remove(dc)
                 print("#warning:csv_uty:{} was rmoved from output columns by regex".format(dc), file=sys.stderr)
+    if args.PRINT_PLAN:
+        if read_plan is None:
+            print("#warn:csv_uty:plan of columns to read is not available for stdin", file=sys.stderr)
+        else:
+            print_read_plan(read_plan)
+        sys.exit(0)
 
-    # dropping columns
-    if len(drop_columns) > 0:
-        print("%Inf:csv_uty:drop columns:{}".format(drop_columns), file=sys.stderr)
-        try:
-            csv_df.drop(columns=drop_columns, inplace=True)
-        except KeyError as e:
-            print("??Error:csv_uty:invalid name of column in '--drop_columns':{} ".format(e), file=sys.stderr)
-            sys.exit(1)
+    #--- processig
+    if in_df is not None:
+        csv_reader = [in_df]
+    elif is_arrow_stream(in_file):
+        print("%Inf:csv_uty:read Arrow IPC stream from {}".format(in_file), file=sys.stderr)
+        if chunk_size > 0:
+            csv_reader = iter_arrow_stream(in_file, chunk_size, usecols=usecols, dtype="string")
+        else:
+            csv_reader = [read_arrow_stream(in_file, usecols=usecols, dtype="string")]
+    elif chunk_size > 0:
+        print("%Inf:csv_uty:read data from {}".format(in_file), file=sys.stderr)
+        csv_reader = pd.read_csv(in_file, dtype="string", chunksize=chunk_size, usecols=usecols)
+    else:
+        print("%Inf:csv_uty:read data from {}".format(in_file), file=sys.stderr)
+        csv_reader = [read_csv_with_schema(in_file, dtype="string", usecols=usecols)]
+    # csv_df = pd.read_csv(in_file)
 
-    # dropping rows
     if len(drop_rows) > 0:
         print("%Inf:csv_uty:drop rows:{}".format(drop_rows), file=sys.stderr)
         drop_rows = parse_drop_rows(drop_rows)
-        try:
-            csv_df.drop(index=csv_df.index[drop_rows], inplace=True)
-        except IndexError as e:
-            print("??Error:csv_uty:invalid index of row in '--drop_rows':{} ".format(e), file=sys.stderr)
-            sys.exit(1)
 
-    # dropping na
-    if len(drop_na_columns) > 0:
-        nr0 = len(csv_df)
-        print("%Inf:csv_uty:drop na rows for {}".format(drop_na_columns), file=sys.stderr)
-        if drop_na_columns[0] == "all":
-            csv_df.dropna(how="any", axis="rows", inplace=True)
-        else:
+    # external sort in streaming mode
+    external_sort = chunk_size > 0 and sort_defs is not None
+    if external_sort:
+        sort_columns, sort_ascending = parse_sort_defs(sort_defs)
+        sort_keys = [rename_columns.get(v, v) for v in sort_columns]
+        sort_memory = args.SORT_MEMORY * 1024 * 1024
+        sort_spill_dir = tempfile.TemporaryDirectory(prefix="csv_uty_sort_")
+        sort_runs = []
+        sort_buffer = []
+        sort_buffer_bytes = 0
+        sort_total_bytes = 0
+        print("%inf:csv_uty:external sort:{},fmt={},memory={}MB".format(sort_defs, dt_sort_fmt, args.SORT_MEMORY), file=sys.stderr)
+
+    # streaming dedup
+    stream_dedup = chunk_size > 0 and len(drop_dup_columns) > 0
+    if stream_dedup:
+        dedup_spill_dir = None
+        if args.DEDUP_PARTITIONS > 0:
+            dedup_spill_dir = tempfile.TemporaryDirectory(prefix="csv_uty_dedup_")
+        dedup_tables = [
+            make_digest_table(DEDUP_TABLE_CAPACITY, spill_dir=dedup_spill_dir.name if dedup_spill_dir is not None else None)
+            for _ in range(max(1, args.DEDUP_PARTITIONS))
+        ]
+        n_dedup_rows = 0
+
+    pipe_result = None
+    i_chunk = -1
+    n_read_rows = 0
+    output_header = None
+    fillna_carry = {}
+    toint_columns = None
+    for i_chunk, csv_df in enumerate(csv_reader):
+        row_offset = n_read_rows
+        n_read_rows += len(csv_df)
+
+        if i_chunk == 0:
+            # columsn to output
+            if output_columns_regex is not None:
+                o_cols = [v for v in csv_df.columns if re.search(output_columns_regex, v)]
+                print("%inf:csv_uty:output_columns_regex:columns to output:{}".format(o_cols), file=sys.stderr)
+                output_columns.extend(o_cols)
+
+        # add serial column
+        if len(serial_column) > 0:
+            if i_chunk == 0:
+                print("%Inf:csv_uty:add serial column:{}".format(serial_column), file=sys.stderr)
+                if serial_column in csv_df:
+                    print("#Warn:csv_uty:{} already exits, it was overwritten.", file=sys.stderr)
+            csv_df[serial_column] = list(range(row_offset * serial_step, n_read_rows * serial_step, serial_step))
+
+        if i_chunk == 0:
+            # drop columns
+            if drop_columns_regex is not None:
+                d_cols = [v for v in csv_df.columns if re.search(drop_columns_regex, v)]
+                print("%inf:csv_uty:drop_columns_regex: columns to drop:{}".format(d_cols), file=sys.stderr)
+                drop_columns.extend(d_cols)
+                for dc in drop_columns:
+                    if dc in output_columns:
+                        output_columns.remove(dc)
+                        print("#warning:csv_uty:{} was rmoved from output columns by regex".format(dc), file=sys.stderr)
+
+        # dropping columns
+        if len(drop_columns) > 0:
+            if i_chunk == 0:
+                print("%Inf:csv_uty:drop columns:{}".format(drop_columns), file=sys.stderr)
             try:
-                csv_df.dropna(subset=drop_na_columns, axis="rows", inplace=True)
+                if usecols is not None:
+                    # columns that were not read
+                    csv_df.drop(columns=[v for v in drop_columns if v in csv_df.columns or v not in read_plan["header"]], inplace=True)
+                else:
+                    csv_df.drop(columns=drop_columns, inplace=True)
             except KeyError as e:
-                print("??Error:csv_uty:invalid name of column in '--drop_na_columns':{} ".format(e), file=sys.stderr)
+                print("??Error:csv_uty:invalid name of column in '--drop_columns':{} ".format(e), file=sys.stderr)
                 sys.exit(1)
-        print("%Inf:csv_uty:number of dropped rows as na: {}".format(nr0 - len(csv_df)), file=sys.stderr)
-
-    # dropping duplicated
-    if len(drop_dup_columns) > 0:
-        nr0 = len(csv_df)
-        print("%Inf:csv_uty:drop duplicated rows for {}".format(drop_dup_columns), file=sys.stderr)
-        if drop_dup_columns[0] == "all":
-            csv_df.drop_duplicates(keep="first", inplace=True)
-        else:
+
+        # dropping rows
+        if len(drop_rows) > 0:
+            if chunk_size > 0:
+                c_drop_rows = [v - row_offset for v in drop_rows if row_offset <= v < n_read_rows]
+            else:
+                c_drop_rows = drop_rows
             try:
-                csv_df.drop_duplicates(subset=drop_dup_columns, keep="first", inplace=True)
-            except KeyError as e:
-                print("??Error:csv_uty:invalid name of column in '--drop_duplicated':{} ".format(e), file=sys.stderr)
+                csv_df.drop(index=csv_df.index[c_drop_rows], inplace=True)
+            except IndexError as e:
+                print("??Error:csv_uty:invalid index of row in '--drop_rows':{} ".format(e), file=sys.stderr)
                 sys.exit(1)
-        print("%Inf:csv_uty:number of dropped rows as duplicated: {}".format(nr0 - len(csv_df)), file=sys.stderr)
 
-    try:
-        # adding new columns for changing time frequency
-        if len(ch_timefreqs) > 0:
-            print("%Inf:csv_uty:changing time frequency", file=sys.stderr)
-            csv_df = change_time_frequency(csv_df, ch_timefreqs)
-
-        # adding columns
-        if len(add_columns) > 0:
-            print("%Inf:csv_uty:adding columns", file=sys.stderr)
-            toint_columns = prefix_number_to_int(csv_df)
-            add_columns_to_df(csv_df, add_columns)
-            int_to_prefix_numer(csv_df, toint_columns)
-
-        # triming columns
-        if len(trm_columns) > 0:
-            print("%Inf:csv_uty:trim column", file=sys.stderr)
-            trim_columns_in_df(csv_df, trm_columns)
-
-        # type columns
-        if len(typ_columns) > 0:
-            print("%Inf:csv_uty:set data type", file=sys.stderr)
-            type_columns_in_df(csv_df, typ_columns)
-
-    except NameError as e:
-        print("??Error:csv_uty:you may use '--prologe' option: {}".format(e), file=sys.stderr)
-        sys.exit(1)
-
-    # fill na
-    if len(fillna_defs) > 0:
-        csv_df = do_fillna(csv_df, fillna_defs)
+        # dropping na
+        if len(drop_na_columns) > 0:
+            nr0 = len(csv_df)
+            print("%Inf:csv_uty:drop na rows for {}".format(drop_na_columns), file=sys.stderr)
+            if drop_na_columns[0] == "all":
+                csv_df.dropna(how="any", axis="rows", inplace=True)
+            else:
+                try:
+                    csv_df.dropna(subset=drop_na_columns, axis="rows", inplace=True)
+                except KeyError as e:
+                    print("??Error:csv_uty:invalid name of column in '--drop_na_columns':{} ".format(e), file=sys.stderr)
+                    sys.exit(1)
+            print("%Inf:csv_uty:number of dropped rows as na: {}".format(nr0 - len(csv_df)), file=sys.stderr)
+
+        # dropping duplicated
+        if len(drop_dup_columns) > 0:
+            nr0 = len(csv_df)
+            print("%Inf:csv_uty:drop duplicated rows for {}".format(drop_dup_columns), file=sys.stderr)
+            if stream_dedup:
+                try:
+                    hi, lo = row_digests(csv_df, None if drop_dup_columns[0] == "all" else drop_dup_columns)
+                except KeyError as e:
+                    print("??Error:csv_uty:invalid name of column in '--drop_duplicated':{} ".format(e), file=sys.stderr)
+                    sys.exit(1)
+                csv_df = csv_df[drop_duplicated_digests(dedup_tables, hi, lo)]
+                n_dedup_rows += nr0 - len(csv_df)
+            elif drop_dup_columns[0] == "all":
+                csv_df.drop_duplicates(keep="first", inplace=True)
+            else:
+                try:
+                    csv_df.drop_duplicates(subset=drop_dup_columns, keep="first", inplace=True)
+                except KeyError as e:
+                    print("??Error:csv_uty:invalid name of column in '--drop_duplicated':{} ".format(e), file=sys.stderr)
+                    sys.exit(1)
+            print("%Inf:csv_uty:number of dropped rows as duplicated: {}".format(nr0 - len(csv_df)), file=sys.stderr)
 
-    # replace
-    if len(replace_defs) > 0:
-        csv_df = do_replace(csv_df, replace_defs)
+        try:
+            # adding new columns for changing time frequency
+            if len(ch_timefreqs) > 0:
+                print("%Inf:csv_uty:changing time frequency", file=sys.stderr)
+                csv_df = change_time_frequency(csv_df, ch_timefreqs)
+
+            # adding columns
+            if len(add_columns) > 0:
+                print("%Inf:csv_uty:adding columns", file=sys.stderr)
+                toint_columns = prefix_number_to_int(csv_df,
+                                                     columns=referred_columns_of_add_columns(add_columns),
+                                                     done_columns=toint_columns)
+                add_columns_to_df(csv_df, add_columns)
+                int_to_prefix_numer(csv_df, toint_columns)
+
+            # triming columns
+            if len(trm_columns) > 0:
+                print("%Inf:csv_uty:trim column", file=sys.stderr)
+                trim_columns_in_df(csv_df, trm_columns)
+
+            # type columns
+            if len(typ_columns) > 0:
+                print("%Inf:csv_uty:set data type", file=sys.stderr)
+                type_columns_in_df(csv_df, typ_columns)
+
+        except NameError as e:
+            print("??Error:csv_uty:you may use '--prologe' option: {}".format(e), file=sys.stderr)
+            sys.exit(1)
 
-    # split csv
-    if len(split_csvs) > 0:
-        csv_df = do_split_into_rows(csv_df, split_csvs)
+        # fill na
+        if len(fillna_defs) > 0:
+            csv_df = do_fillna(csv_df, fillna_defs, carry=fillna_carry if chunk_size > 0 else None)
+
+        # replace
+        if len(replace_defs) > 0:
+            csv_df = do_replace(csv_df, replace_defs)
+
+        # split csv
+        if len(split_csvs) > 0:
+            csv_df = do_split_into_rows(csv_df, split_csvs)
+
+        # split flag
+        if len(split_flags) > 0:
+            csv_df = do_split_into_columns(csv_df, split_flags)
+
+        # decomposing bits string
+        for decomp_bits_column in decomp_bits_columns:
+            cvs = re.split(r":", decomp_bits_column)
+            cn = cvs[0]
+            print("%Inf:csv_uty:decompose bit pattern:{}".format(cn), file=sys.stderr)
+            if len(cvs) > 1:
+                nb = int(cvs[1])
+            else:
+                nb = 0
+            csv_df = decomp_bits_pattern(csv_df, cn, nbits=nb)
+
+        # sort
+        if external_sort:
+            if dt_sort_fmt is not None:
+                csv_df = convert_sort_datetime(csv_df, sort_columns, dt_sort_fmt)
+        elif sort_defs is not None:
+            csv_df = do_sort(csv_df, sort_defs, datetime_fmt=dt_sort_fmt)
+
+        # rename columns
+        if len(rename_columns) > 0:
+            if i_chunk == 0:
+                print("%Inf:csv_uty:rename columns:{}".format(rename_columns), file=sys.stderr)
+                invalid_cols = list(set(rename_columns.keys()) - set(csv_df.columns))
+                if len(invalid_cols) > 0:
+                    print("#warn:csv_uty: invalid columns in renaming:{}".format(invalid_cols), file=sys.stderr)
+            csv_df.rename(columns=rename_columns, inplace=True, errors='ignore')
+
+        if not all([v in csv_df.columns for v in output_columns]):
+            print("??Error:csv_uty:'--columns' was inconsist for input", file=sys.stderr)
+            sys.exit(1)
 
-    # split flag
-    if len(split_flags) > 0:
-        csv_df = do_split_into_columns(csv_df, split_flags)
-
-    # decomposing bits string
-    for decomp_bits_column in decomp_bits_columns:
-        cvs = re.split(r":", decomp_bits_column)
-        cn = cvs[0]
-        print("%Inf:csv_uty:decompose bit pattern:{}".format(cn), file=sys.stderr)
-        if len(cvs) > 1:
-            nb = int(cvs[1])
+        if stack_group_column is not None:
+            if len(output_columns) > 0:
+                csv_df2 = csv_df[output_columns]
+            else:
+                csv_df2 = csv_df
+            csv_df2.set_index(stack_group_column, inplace=True)
+            csv_df2 = csv_df2.stack()
+            csv_df2.name = "stacked_result"
+            inames = list(csv_df2.index.names)
+            inames[1] = "category"
+            csv_df2.index.set_names(inames, inplace=True)
+            # csv_df2.to_csv(output_file)
+            if to_pipe:
+                pipe_result = (csv_df2.to_frame(), True)
+            else:
+                output_dataframe(csv_df2, output_file, output_format, index=True)
+        elif trans_mode:
+            if len(output_columns) > 0:
+                csv_df = csv_df[output_columns]
+            csv_df = csv_df.T
+            csv_df.index.name = "column"
+            # csv_df.to_csv(output_file)
+            if to_pipe:
+                pipe_result = (csv_df, True)
+            else:
+                output_dataframe(csv_df, output_file, output_format, index=True)
+        else:
+            # if len(output_columns) == 0:
+            #     csv_df.to_csv(output_file, index=False)
+            # else:
+            #     csv_df.to_csv(output_file, index=False, columns=output_columns)
+            if output_header is None:
+                output_header = list(csv_df.columns)
+            elif list(csv_df.columns) != output_header:
+                if set(csv_df.columns) != set(output_header):
+                    print("??Error:csv_uty:columns of result were changed at chunk {}:{}".format(
+                        i_chunk, sorted(set(csv_df.columns) ^ set(output_header))),
+                          file=sys.stderr)
+                    print("  for '--decompose_bit_string', NBITS may be given.", file=sys.stderr)
+                    sys.exit(1)
+                csv_df = csv_df[output_header]
+            if external_sort:
+                sort_buffer.append(csv_df)
+                sort_buffer_bytes += csv_df.memory_usage(deep=True).sum()
+                if sort_buffer_bytes >= sort_memory / 2:
+                    sort_runs.append(spill_sorted_run(pd.concat(sort_buffer), sort_keys, sort_ascending, sort_spill_dir.name, len(sort_runs)))
+                    sort_total_bytes += sort_buffer_bytes
+                    sort_buffer = []
+                    sort_buffer_bytes = 0
+            elif to_pipe:
+                if len(output_columns) > 0:
+                    csv_df = csv_df.drop(columns=list(set(csv_df.columns) - set(output_columns)))
+                pipe_result = (csv_df, False)
+            else:
+                output_dataframe(csv_df, output_file, output_format, index=False, columns=output_columns, append=i_chunk > 0)
+
+    if external_sort:
+        if len(sort_runs) == 0:
+            # all rows are in memory
+            if len(sort_buffer) > 0:
+                csv_df = pd.concat(sort_buffer)
+                csv_df.sort_values(sort_keys, ascending=sort_ascending, inplace=True, axis=0, na_position="last", kind="mergesort")
+                output_dataframe(csv_df, output_file, output_format, index=False, columns=output_columns)
         else:
-            nb = 0
-        csv_df = decomp_bits_pattern(csv_df, cn, nbits=nb)
+            if len(sort_buffer) > 0:
+                sort_runs.append(spill_sorted_run(pd.concat(sort_buffer), sort_keys, sort_ascending, sort_spill_dir.name, len(sort_runs)))
+                sort_total_bytes += sort_buffer_bytes
+            sort_buffer = []
+            row_bytes = max(1, sort_total_bytes / max(1, n_read_rows))
+            batch_rows = max(SORT_SPILL_BATCH_ROWS, int(sort_memory / 2 / len(sort_runs) / row_bytes))
+            print("%inf:csv_uty:external sort:number of runs={}:rows to merge from each run={}".format(len(sort_runs), batch_rows),
+                  file=sys.stderr)
+            for i_out, s_df in enumerate(merge_sorted_runs(sort_runs, sort_keys, sort_ascending, batch_rows)):
+                output_dataframe(s_df, output_file, output_format, index=False, columns=output_columns, append=i_out > 0)
+        sort_spill_dir.cleanup()
 
-    # sort
-    if sort_defs is not None:
-        csv_df = do_sort(csv_df, sort_defs, datetime_fmt=dt_sort_fmt)
-
-    # rename columns
-    if len(rename_columns) > 0:
-        print("%Inf:csv_uty:rename columns:{}".format(rename_columns), file=sys.stderr)
-        invalid_cols = list(set(rename_columns.keys()) - set(csv_df.columns))
-        if len(invalid_cols) > 0:
-            print("#warn:csv_uty: invalid columns in renaming:{}".format(invalid_cols), file=sys.stderr)
-        csv_df.rename(columns=rename_columns, inplace=True, errors='ignore')
-
-    if not all([v in csv_df.columns for v in output_columns]):
-        print("??Error:csv_uty:'--columns' was inconsist for input", file=sys.stderr)
-        sys.exit(1)
+    if chunk_size > 0:
+        if any([v >= n_read_rows for v in drop_rows]):
+            print("#warn:csv_uty:invalid index of row in '--drop_rows':{}".format([v for v in drop_rows if v >= n_read_rows]),
+                  file=sys.stderr)
+        print("%Inf:csv_uty:streaming mode:number of chunks={}:number of rows={}".format(i_chunk + 1, n_read_rows), file=sys.stderr)
+    if stream_dedup:
+        print("%Inf:csv_uty:streaming mode:number of dropped rows as duplicated: {}:number of digests={}".format(
+            n_dedup_rows, sum([v["n"] for v in dedup_tables])),
+              file=sys.stderr)
+        del dedup_tables
+        if dedup_spill_dir is not None:
+            dedup_spill_dir.cleanup()
 
-    if stack_group_column is not None:
-        if len(output_columns) > 0:
-            csv_df2 = csv_df[output_columns]
-        else:
-            csv_df2 = csv_df
-        csv_df2.set_index(stack_group_column, inplace=True)
-        csv_df2 = csv_df2.stack()
-        csv_df2.name = "stacked_result"
-        inames = list(csv_df2.index.names)
-        inames[1] = "category"
-        csv_df2.index.set_names(inames, inplace=True)
-        # csv_df2.to_csv(output_file)
-        output_dataframe(csv_df2, output_file, output_format, index=True)
-    elif trans_mode:
-        if len(output_columns) > 0:
-            csv_df = csv_df[output_columns]
-        csv_df = csv_df.T
-        csv_df.index.name = "column"
-        # csv_df.to_csv(output_file)
-        output_dataframe(csv_df, output_file, output_format, index=True)
-    else:
-        # if len(output_columns) == 0:
-        #     csv_df.to_csv(output_file, index=False)
-        # else:
-        #     csv_df.to_csv(output_file, index=False, columns=output_columns)
-        output_dataframe(csv_df, output_file, output_format, index=False, columns=output_columns)
+    if len(add_columns) > 0:
+        report_add_columns(add_columns)
+
+    if to_pipe:
+        return pipe_result
+
+
+if __name__ == "__main__":
+    args = init()
+    main(args)
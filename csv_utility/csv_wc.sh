@@ -45,7 +45,7 @@ options:
   -t : line terminator
 remark:
   as assumption, there is only one header row in csv file.
-  number of rows means one without header row.
+  number of rows means one without header row, that is given by row-offset index, see csv_index.py.
 EOF
     exit 1
 }
@@ -77,6 +77,7 @@ if [ "${INPUT}" = "-" ]; then
     TMPFILE="${TMPDIR}/${SNAME}_input.tmp"
     cat > ${TMPFILE}
     INPUT=${TMPFILE}
+    INDEX_OPT="--no_store"
     INPUT0="stdin"
 elif [ ! -e "${INPUT}" ]; then
     echo "??Error: file not found: ${INPUT}" 1>&2
@@ -84,6 +85,8 @@ elif [ ! -e "${INPUT}" ]; then
 fi
 
 #----
+# CR+LF is handled by row-offset index
+INDEX_INPUT=${INPUT}
 CHECK_CR=$(grep -l -zP "\r" ${INPUT})
 CHECK_CRLF=$(grep -l -zP "\r\n" ${INPUT})
 if [ "${CHECK_CRLF}" != "" ]; then
@@ -96,6 +99,8 @@ elif [ "${CHECK_CR}" != "" ]; then
     TMPFILE2="${TMPDIR}/${SNAME}_input2.tmp"
     sed 's/\r/\n/g' ${INPUT} > ${TMPFILE2}
     INPUT=${TMPFILE2}
+    INDEX_INPUT=${TMPFILE2}
+    INDEX_OPT="--no_store"
 else
     CHECK_CR="LF"
 fi
@@ -120,7 +125,7 @@ done
 NC=${#HEADERS[@]}
 #NR=($(wc -l ${INPUT}))
 #NR=$((${NR[0]}-1))
-NR=$(csvstat --count ${INPUT} | awk '{print $3}')
+NR=$(${DDIR}/csv_index.py ${INDEX_OPT} --count "${INDEX_INPUT}")
 CC=$(nkf -guess ${INPUT})
 if [ "${MODE}" = "1" ]; then
     echo ${NC}
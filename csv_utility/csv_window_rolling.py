@@ -18,7 +18,8 @@ import textwrap
 import sys
 
 import re
-import pandas as pd
+from pathlib import Path
+sys.path.insert(0, format(Path(__file__).parent))
 
 VERSION = 1.0
 
@@ -58,6 +59,11 @@ example:
                             type=str,
                             metavar='FILE',
                             default=sys.stdout)
+    arg_parser.add_argument("--output_format",
+                            dest="OFORMAT",
+                            help="format of output, 'arrow_stream' is Arrow IPC stream for other csv_tools, default=csv",
+                            choices=["csv", "arrow_stream"],
+                            default="csv")
 
     arg_parser.add_argument('csv_file', metavar='CSV_FILE', help='files to read, if empty, stdin is used')
     arg_parser.add_argument('columns', metavar='COLUMN[,COLUMN..]', type=str, help='columns to process')
@@ -68,8 +74,13 @@ example:
 
 if __name__ == "__main__":
     args = init()
+    import pandas as pd
+    from csv_schema import read_csv_with_schema
+    from csv_arrow import write_dataframe
+
     csv_file = args.csv_file
     output_file = args.OUTPUT
+    output_format = args.OFORMAT
 
     columns_s = args.columns
     columns = re.split(r"\s*,\s*", columns_s)
@@ -88,7 +99,7 @@ if __name__ == "__main__":
     if csv_file == "-":
         csv_file = sys.stdin
 
-    csv_df = pd.read_csv(csv_file)
+    csv_df = read_csv_with_schema(csv_file)
 
     r_params = {"center": True}
     if idx_col is not None:
@@ -124,4 +135,4 @@ if __name__ == "__main__":
 
         print("%inf:csv_window_rolling:new column {} was added".format(cn2), file=sys.stderr)
 
-    csv_df.to_csv(output_file)
+    write_dataframe(csv_df, output_file, output_format)
@@ -21,17 +21,8 @@ import re
 
 from pathlib import Path
 
-import pandas as pd
-
-from openpyxl import Workbook
-from openpyxl.utils import get_column_letter
-from openpyxl.utils.units import pixels_to_points
-from openpyxl.drawing.image import Image as XLImage
-from openpyxl.styles import Alignment, Font
-
-from PIL import Image
-
 from io import BytesIO
+sys.path.insert(0, format(Path(__file__).parent))
 
 VERSION = 1.0
 
@@ -225,6 +216,15 @@ def write_to_excel(df, output_file, columns, image_column, image_output_column,
 
 if __name__ == "__main__":
     args = init()
+    import pandas as pd
+    from openpyxl import Workbook
+    from openpyxl.utils import get_column_letter
+    from openpyxl.utils.units import pixels_to_points
+    from openpyxl.drawing.image import Image as XLImage
+    from openpyxl.styles import Alignment, Font
+    from PIL import Image
+    from csv_schema import read_csv_with_schema
+
     csv_file = args.csv_file
 
     columns_s = args.COLUMNS
@@ -244,7 +244,7 @@ if __name__ == "__main__":
     if csv_file == "-":
         csv_file = sys.stdin
 
-    csv_df = pd.read_csv(csv_file)
+    csv_df = read_csv_with_schema(csv_file)
 
     columns = []
     if columns_s is not None:
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+# ----------------------------------------------------------------------
+# Name:         test_calendar_bucket.py
+# Description:
+#    calendar_bucket() of csv_trimtime.py against the former python functions for each row
+#    of '--change_timefreq' with 'W' and 'M'.
+#
+# Author:       m.akei
+# Copyright:    (c) 2021 by m.na.akei
+# Licence:
+#  Copyright (c) 2021 Masaharu N. Akei
+#
+#  This software is released under the MIT License.
+#    http://opensource.org/licenses/mit-license.php
+# ----------------------------------------------------------------------
+import sys
+from datetime import timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+from dateutil.relativedelta import relativedelta
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "csv_utility"))
+from csv_trimtime import calendar_bucket
+
+# functions for each row of former csv_trimtime.py
+REFERENCE = {
+    ("floor", "W"): lambda x: x - timedelta(days=x.weekday(), hours=x.hour, minutes=x.minute, seconds=x.second),
+    ("floor", "M"): lambda x: x - timedelta(days=x.day - 1) - timedelta(hours=x.hour, minutes=x.minute, seconds=x.second),
+    ("ceil", "W"): lambda x: x - timedelta(days=x.weekday() - 7, hours=x.hour, minutes=x.minute, seconds=x.second),
+    ("ceil", "M"): lambda x: x + relativedelta(days=-x.day + 1, months=1) - timedelta(hours=x.hour, minutes=x.minute, seconds=x.second),
+    ("round", "W"): lambda x: x - timedelta(days=x.weekday() - (7 if x.weekday() > 4 else 0), hours=x.hour, minutes=x.minute, seconds=x.second),
+    ("round", "M"): lambda x: x + relativedelta(days=-x.day + 1, months=1 if x.day > 15 else 0) - timedelta(
+        hours=x.hour, minutes=x.minute, seconds=x.second),
+}
+
+
+def make_datetimes(tz=None):
+    """every day of 2020(leap year) and 2021 at midnight, just before midnight and at random time with fraction of second
+
+    :param tz: time zone, if None, datetime is naive.
+    :returns: pandas.Series of datetime
+    :rtype: pandas.Series
+
+    """
+    days = pd.date_range("2020-01-01", "2021-12-31", freq="D")
+    rng = np.random.default_rng(1)
+    offsets = [pd.Timedelta(0), pd.Timedelta(days=1) - pd.Timedelta(microseconds=1)]
+    offsets.append(pd.to_timedelta(rng.integers(0, 86400 * 10**9, size=len(days)), unit="ns"))
+    ts = pd.Series(np.concatenate([(days + v).to_numpy() for v in offsets]))
+    if tz is not None:
+        ts = ts.dt.tz_localize(tz)
+    return ts
+
+
+def shorter_next_month(ts):
+    """mask of days that do not exist in the next month, ex. 2021-08-31, 2021-01-29
+
+    :param ts: pandas.Series of datetime
+    :returns: numpy.ndarray of bool
+
+    """
+    next_month = ts.dt.tz_localize(None).to_numpy(dtype="datetime64[M]") + 1
+    return (ts.dt.day > pd.Series(next_month.astype("datetime64[ns]")).dt.days_in_month).to_numpy()
+
+
+@pytest.mark.parametrize("tz", [None, "UTC", "Asia/Tokyo"])
+@pytest.mark.parametrize("t_freq", ["W", "M"])
+@pytest.mark.parametrize("t_method", ["floor", "ceil", "round"])
+def test_same_as_former(t_method, t_freq, tz):
+    ts = make_datetimes(tz)
+    expected = ts.apply(REFERENCE[(t_method, t_freq)])
+    result = calendar_bucket(ts, t_method, t_freq)
+
+    assert result.dtype == ts.dtype
+    same = (result == expected).to_numpy()
+    if t_freq == "M" and t_method != "floor":
+        # former function clipped day to the end of the next month before subtracting days.
+        diverged = shorter_next_month(ts)
+        if t_method == "round":
+            diverged &= (ts.dt.day > 15).to_numpy()
+        assert diverged.any()
+        assert same[~diverged].all()
+        assert not same[diverged].any()
+    else:
+        assert same.all()
+
+
+@pytest.mark.parametrize("t_method", ["ceil", "round"])
+def test_month_after_shorter_month(t_method):
+    ts = pd.Series(pd.to_datetime(["2021-08-31 10:00:00", "2021-01-29 00:00:00", "2020-01-31 23:59:59.5", "2021-12-31 12:00:00"]))
+    result = calendar_bucket(ts, t_method, "M")
+    expected = pd.Series(pd.to_datetime(["2021-09-01 00:00:00", "2021-02-01 00:00:00", "2020-02-01 00:00:00.5", "2022-01-01 00:00:00"]))
+    assert result.equals(expected)
+    assert ts.apply(REFERENCE[(t_method, "M")]).iloc[0] == pd.Timestamp("2021-08-31 00:00:00")
+
+
+@pytest.mark.parametrize(
+    "t_method,t_freq,value,expected",
+    [
+        ("floor", "W", "2021-06-07 00:00:00", "2021-06-07 00:00:00"),  # monday
+        ("floor", "W", "2021-06-06 23:59:59", "2021-05-31 00:00:00"),  # sunday
+        ("ceil", "W", "2021-06-07 00:00:00", "2021-06-14 00:00:00"),  # ceil of monday is the next monday
+        ("round", "W", "2021-06-11 23:59:59", "2021-06-07 00:00:00"),  # friday
+        ("round", "W", "2021-06-12 00:00:00", "2021-06-14 00:00:00"),  # saturday
+        ("round", "M", "2021-06-15 23:59:59", "2021-06-01 00:00:00"),
+        ("round", "M", "2021-06-16 00:00:00", "2021-07-01 00:00:00"),
+        ("floor", "M", "2021-06-16 12:34:56.789", "2021-06-01 00:00:00.789"),  # fraction of second is kept
+    ])
+def test_boundaries(t_method, t_freq, value, expected):
+    result = calendar_bucket(pd.Series(pd.to_datetime([value])), t_method, t_freq)
+    assert result.iloc[0] == pd.Timestamp(expected)
+
+
+@pytest.mark.parametrize("t_freq", ["W", "M"])
+@pytest.mark.parametrize("t_method", ["floor", "ceil", "round"])
+def test_nat(t_method, t_freq):
+    ts = pd.Series(pd.to_datetime(["2021-06-16 12:00:00", None, "2021-06-07 00:00:00"]))
+    result = calendar_bucket(ts, t_method, t_freq)
+    assert result.isna().tolist() == [False, True, False]
+    assert (result[ts.notna()] == ts[ts.notna()].apply(REFERENCE[(t_method, t_freq)])).all()